@@ -1,12 +1,21 @@
 """
 Streaming chat endpoint using Server-Sent Events (SSE).
+
+Default: one `data:` event carrying the final `{answer, results}` payload.
+With `"stream": true` in the request body the graph is streamed instead –
+named events `route`, `result`, `token` and a final `done` (see
+`agent_router.stream_events`).  An optional `"filters"` object
+(`category`, `min_price`, `max_price`) constrains product search.
 """
 from __future__ import annotations
 
 import json
-from flask import Blueprint, Response, request
+from flask import Blueprint, Response, request, stream_with_context
 
-from app.services.agent_router import router
+from app.core import metrics
+from app.services import agent_router
+from app.services.agent_router import stream_events
+from app.services.search_filters import SearchFilters
 
 chat_bp = Blueprint("chat", __name__)
 
@@ -17,17 +26,32 @@ def chat():
     query: str = data.get("query", "").strip()
     if not query:
         return {"error": "query required"}, 400
+    filters = data.get("filters") or {}
+    try:
+        SearchFilters.from_mapping(filters)
+    except (ValueError, AttributeError) as err:
+        return {"error": f"invalid filters: {err}"}, 400
 
-    # ---------- single-tick execution ----------
-    final_state = router.invoke({"query": query})
+    if data.get("stream"):
+        def token_stream():
+            for event, payload in stream_events(query, filters or None):
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
 
-    def event_stream():
+        # keep the request context (and its trace) alive while streaming
+        return Response(stream_with_context(token_stream()), mimetype="text/event-stream")
+
+    # ---------- single-tick execution ----------
+    state = {"query": query, "filters": filters} if filters else {"query": query}
+    final_state = agent_router.cached_router.invoke(state)  # built on first use
+    with metrics.timer(metrics.STAGE_SECONDS, "serialize", stage="serialize"):
         payload = json.dumps(
             {
                 "answer": final_state["answer"],
                 "results": final_state.get("results", []),
             }
         )
+
+    def event_stream():
         yield f"data: {payload}\n\n"
 
     return Response(event_stream(), mimetype="text/event-stream")
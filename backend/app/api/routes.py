@@ -1,11 +1,19 @@
 """Flask blueprint exposing API routes (Phase-2)."""
 from __future__ import annotations
 
-from flask import Blueprint, jsonify, request
-from sqlalchemy.orm import Session
+import json
+from typing import Any, List, Mapping, Tuple
 
-from app.core.database import get_db
-from app.services.indexer import search_products
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from app.config import settings
+from app.core import metrics
+from app.core.embedding_cache import default_cache
+from app.services.agent_router import classifier_stats, response_cache_stats
+from app.services.indexer import search_product_payloads, search_product_payloads_batch
+from app.services.search_filters import SearchFilters
+from app.services import warmup
+from app.services.support_rag import answer_cache_stats, snapshot_stats
 
 api_bp = Blueprint("api", __name__)
 
@@ -18,11 +26,85 @@ def health() -> tuple[dict, int]:
 
 @api_bp.route("/search", methods=["GET"])
 def search() -> tuple[list[dict], int]:
-    """Semantic product search."""
+    """
+    Semantic product search.
+
+    Optional `category`, `min_price` and `max_price` params narrow the
+    vector query; constraints in `q` ("under $50") are applied as well.
+    """
     query = request.args.get("q", "").strip()
     if not query:
         return jsonify([]), 200
 
-    db: Session = next(get_db())
-    results = search_products(db, query)
-    return jsonify([p.as_dict() for p in results]), 200
+    try:
+        filters = SearchFilters.from_mapping(request.args)
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+    results = search_product_payloads(query, filters=filters)
+    with metrics.timer(metrics.STAGE_SECONDS, "serialize", stage="serialize"):
+        body = jsonify(results)
+    return body, 200
+
+
+@api_bp.route("/search/batch", methods=["POST"])
+def search_batch() -> Response | tuple[dict, int]:
+    """
+    Product search for many queries at once (bulk / offline jobs).
+
+    Body: `{"queries": [...], "k": 5, "filters": {...}}`.  Answered as
+    NDJSON, one `{"index", "query", "results"}` line per query in order,
+    streamed while later chunks are still being searched.
+    """
+    try:
+        queries, k, filters = batch_request(request.get_json(silent=True))
+    except ValueError as err:
+        return jsonify({"error": str(err)}), 400
+
+    def lines():
+        results = search_product_payloads_batch(queries, k=k, filters=filters)
+        for i, (query, hits) in enumerate(zip(queries, results)):
+            yield json.dumps({"index": i, "query": query, "results": hits}) + "\n"
+
+    return Response(stream_with_context(lines()), mimetype="application/x-ndjson")
+
+
+@api_bp.route("/stats", methods=["GET"])
+def stats() -> tuple[dict, int]:
+    """In-process cache / fast-path statistics (hits, reloads, sizes)."""
+    return jsonify(stats_payload()), 200
+
+
+@api_bp.route("/metrics", methods=["GET"])
+def metrics_endpoint() -> Response:
+    """Latency histograms and counters in the Prometheus text format."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+def batch_request(data: Any) -> Tuple[List[str], int, SearchFilters]:
+    """Validate a `/api/search/batch` body (shared with the ASGI app); raises `ValueError`."""
+    if not isinstance(data, Mapping):
+        raise ValueError("JSON object expected")
+    queries = data.get("queries")
+    if not isinstance(queries, list) or not queries or not all(isinstance(q, str) for q in queries):
+        raise ValueError("queries must be a non-empty list of strings")
+    if len(queries) > settings.SEARCH_BATCH_MAX:
+        raise ValueError(f"at most {settings.SEARCH_BATCH_MAX} queries per request")
+    k = data.get("k", 5)
+    if isinstance(k, bool) or not isinstance(k, int) or not 1 <= k <= 50:
+        raise ValueError("k must be an integer between 1 and 50")
+    filters = data.get("filters") or {}
+    if not isinstance(filters, Mapping):
+        raise ValueError("filters must be an object")
+    return queries, k, SearchFilters.from_mapping(filters)
+
+
+def stats_payload() -> dict:
+    """Body of `/api/stats` (shared with the ASGI app)."""
+    return {
+        "support_kb_snapshot": snapshot_stats(),
+        "intent_classifier": classifier_stats(),
+        "chat_response_cache": response_cache_stats(),
+        "support_answer_cache": answer_cache_stats(),
+        "embedding_cache": default_cache().stats(),
+        "warmup": warmup.status(),
+    }
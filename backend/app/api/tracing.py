@@ -0,0 +1,63 @@
+"""
+Request tracing hooks for the Flask app.
+
+Every request gets an id – the caller's `X-Request-ID` or a fresh one – and
+a `metrics.Trace` collecting the spans recorded while it runs.  Responses
+carry `X-Request-ID` and, with metrics on, a `Server-Timing` header listing
+the spans finished before the headers went out.  Total latency is observed
+at teardown, i.e. after a streamed body has been sent.
+"""
+from __future__ import annotations
+
+import logging
+import time
+
+from flask import Flask, g, request
+
+from app.core import metrics
+
+log = logging.getLogger(__name__)
+
+_MAX_ID_LEN = 128
+
+
+def init_app(app: Flask) -> None:
+    @app.before_request
+    def _begin_trace() -> None:
+        incoming = request.headers.get("X-Request-ID", "")[:_MAX_ID_LEN].strip()
+        g.trace, g.trace_token = metrics.start_trace(incoming or None)
+
+    @app.after_request
+    def _trace_headers(response):
+        trace = g.get("trace")
+        if trace is not None:
+            response.headers["X-Request-ID"] = trace.request_id
+            if metrics.enabled() and trace.spans:
+                response.headers["Server-Timing"] = trace.server_timing()
+        g.status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _end_trace(exc) -> None:
+        trace = g.pop("trace", None)
+        if trace is None:
+            return
+        metrics.end_trace(g.pop("trace_token"))
+        if not metrics.enabled():
+            return
+        labels = {
+            "method": request.method,
+            "endpoint": request.url_rule.rule if request.url_rule else "unmatched",
+            "status": str(g.get("status", 500)),
+        }
+        elapsed = time.perf_counter() - trace.started
+        metrics.HTTP_SECONDS.observe(elapsed, **labels)
+        metrics.HTTP_TOTAL.inc(**labels)
+        log.debug(
+            "request %s %s %s %.1fms spans=%s",
+            trace.request_id,
+            labels["method"],
+            request.path,
+            elapsed * 1000.0,
+            trace.server_timing(),
+        )
@@ -0,0 +1,281 @@
+"""
+Async serving mode: the chat / search API as a plain ASGI application.
+
+    uvicorn app.asgi:app --host 0.0.0.0 --port 8000      (from backend/)
+
+Same endpoints and payloads as the Flask app in `app.main`, but every
+request is a coroutine: the LLM is streamed with `LLMInterface.astream`,
+query embeddings come from the async provider calls and Chroma is reached
+through `vector_store.aget_collection` (native `AsyncHttpClient` with
+CHROMA_HOST).  A request waiting on the LLM therefore holds no thread, so
+one worker keeps thousands of chats in flight.
+
+  GET  /                 service banner
+  GET  /api/health       {"status": "ok"}
+  GET  /api/search?q=    product search (`category`, `min_price`, `max_price`)
+  POST /api/search/batch many queries in one request, streamed as NDJSON
+  GET  /api/stats        cache / fast-path statistics
+  GET  /api/metrics      Prometheus metrics (see `app.core.metrics`)
+  POST /api/chat         SSE, `"stream": true` for per-node events
+
+Written against the bare ASGI spec (no framework dependency); CORS is open
+("*") like the Flask app, and requests are traced the same way
+(`X-Request-ID`, `Server-Timing`).  The Flask app stays the default
+entry-point.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from itertools import islice
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+from urllib.parse import parse_qs
+
+from app.api.routes import batch_request, stats_payload
+from app.config import settings
+from app.core import metrics
+from app.core.database import init_db
+from app.services import agent_router, warmup
+from app.services.agent_router import astream_events
+from app.services.indexer import asearch_product_payloads, search_product_payloads_batch
+from app.services.search_filters import SearchFilters
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+_CORS_HEADERS: List[Tuple[bytes, bytes]] = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-headers", b"*"),
+    (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+]
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+# --------------------------------------------------------------------------- #
+# Response helpers
+# --------------------------------------------------------------------------- #
+async def _start(send: Send, status: int, content_type: bytes) -> None:
+    headers = [(b"content-type", content_type), *_CORS_HEADERS]
+    trace = metrics.current_trace()
+    if trace is not None:
+        headers.append((b"x-request-id", trace.request_id.encode("latin-1", "replace")))
+        if metrics.enabled() and trace.spans:
+            headers.append((b"server-timing", trace.server_timing().encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+
+
+async def _json(send: Send, status: int, body: Any) -> None:
+    with metrics.timer(metrics.STAGE_SECONDS, "serialize", stage="serialize"):
+        data = json.dumps(body).encode()
+    await _start(send, status, b"application/json")
+    await send({"type": "http.response.body", "body": data})
+
+
+async def _sse(send: Send, events) -> None:
+    """Stream an async iterator of SSE frames, one body chunk per frame."""
+    await _start(send, 200, b"text/event-stream; charset=utf-8")
+    async for frame in events:
+        await send({"type": "http.response.body", "body": frame.encode(), "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _read_json(receive: Receive) -> Dict[str, Any]:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    try:
+        data = json.loads(b"".join(chunks) or b"null")
+    except ValueError:
+        raise HTTPError(400, "invalid JSON body") from None
+    if not isinstance(data, dict):
+        raise HTTPError(400, "JSON object expected")
+    return data
+
+
+# --------------------------------------------------------------------------- #
+# Endpoints
+# --------------------------------------------------------------------------- #
+async def root(scope: Scope, receive: Receive, send: Send) -> None:
+    await _json(
+        send,
+        200,
+        {
+            "message": "AI-Support Platform backend is running.",
+            "available_endpoints": ["/api/health", "/api/search?q=<query>", "/api/chat"],
+        },
+    )
+
+
+async def health(scope: Scope, receive: Receive, send: Send) -> None:
+    await _json(send, 200, {"status": "ok"})
+
+
+async def search(scope: Scope, receive: Receive, send: Send) -> None:
+    args = {k: v[0] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()}
+    query = args.get("q", "").strip()
+    if not query:
+        return await _json(send, 200, [])
+    try:
+        filters = SearchFilters.from_mapping(args)
+    except ValueError as err:
+        raise HTTPError(400, str(err)) from None
+    await _json(send, 200, await asearch_product_payloads(query, filters=filters))
+
+
+async def search_batch(scope: Scope, receive: Receive, send: Send) -> None:
+    try:
+        queries, k, filters = batch_request(await _read_json(receive))
+    except ValueError as err:
+        raise HTTPError(400, str(err)) from None
+
+    results = search_product_payloads_batch(queries, k=k, filters=filters)
+    chunk = max(settings.SEARCH_BATCH_CHUNK, 1)
+    await _start(send, 200, b"application/x-ndjson")
+    for start in range(0, len(queries), chunk):
+        hits = await asyncio.to_thread(lambda: list(islice(results, chunk)))
+        body = "".join(
+            json.dumps({"index": start + i, "query": queries[start + i], "results": h}) + "\n"
+            for i, h in enumerate(hits)
+        )
+        await send({"type": "http.response.body", "body": body.encode(), "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def stats(scope: Scope, receive: Receive, send: Send) -> None:
+    await _json(send, 200, stats_payload())
+
+
+async def metrics_endpoint(scope: Scope, receive: Receive, send: Send) -> None:
+    await _start(send, 200, b"text/plain; version=0.0.4")
+    await send({"type": "http.response.body", "body": metrics.render().encode()})
+
+
+async def chat(scope: Scope, receive: Receive, send: Send) -> None:
+    data = await _read_json(receive)
+    query: str = str(data.get("query", "")).strip()
+    if not query:
+        raise HTTPError(400, "query required")
+    filters = data.get("filters") or {}
+    try:
+        SearchFilters.from_mapping(filters)
+    except ValueError as err:
+        raise HTTPError(400, f"invalid filters: {err}") from None
+
+    if data.get("stream"):
+        async def token_stream():
+            async for event, payload in astream_events(query, filters or None):
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+        return await _sse(send, token_stream())
+
+    # ---------- single-tick execution ----------
+    state = {"query": query, "filters": filters} if filters else {"query": query}
+    final_state = await agent_router.cached_router.ainvoke(state)
+
+    async def event_stream():
+        payload = json.dumps(
+            {
+                "answer": final_state["answer"],
+                "results": final_state.get("results", []),
+            }
+        )
+        yield f"data: {payload}\n\n"
+
+    await _sse(send, event_stream())
+
+
+_ROUTES: Dict[Tuple[str, str], Callable[[Scope, Receive, Send], Awaitable[None]]] = {
+    ("GET", "/"): root,
+    ("GET", "/api/health"): health,
+    ("GET", "/api/search"): search,
+    ("POST", "/api/search/batch"): search_batch,
+    ("GET", "/api/stats"): stats,
+    ("GET", "/api/metrics"): metrics_endpoint,
+    ("POST", "/api/chat"): chat,
+}
+
+
+# --------------------------------------------------------------------------- #
+# Application
+# --------------------------------------------------------------------------- #
+class ASGIApp:
+    """Routes HTTP requests to the endpoints above; creates tables on startup."""
+
+    def __init__(self) -> None:
+        self._started = False
+
+    async def startup(self) -> None:
+        if not self._started:  # `init_db` is idempotent, a racing call is harmless
+            await asyncio.to_thread(init_db)
+            self._started = True
+            warmup.start()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+
+        if not self._started:  # servers / test clients without lifespan support
+            await self.startup()
+        method, path = scope["method"], scope["path"].rstrip("/") or "/"
+        incoming = dict(scope.get("headers") or ()).get(b"x-request-id", b"")[:128].decode("latin-1").strip()
+        trace, token = metrics.start_trace(incoming or None)
+        status = 500
+
+        async def traced_send(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self._dispatch(method, path, scope, receive, traced_send)
+        finally:
+            metrics.end_trace(token)
+            if metrics.enabled():
+                endpoint = path if any(p == path for _, p in _ROUTES) else "unmatched"
+                labels = {"method": method, "endpoint": endpoint, "status": str(status)}
+                metrics.HTTP_SECONDS.observe(time.perf_counter() - trace.started, **labels)
+                metrics.HTTP_TOTAL.inc(**labels)
+
+    async def _dispatch(self, method: str, path: str, scope: Scope, receive: Receive, send: Send) -> None:
+        if method == "OPTIONS":  # CORS pre-flight
+            await _start(send, 204, b"text/plain")
+            return await send({"type": "http.response.body", "body": b""})
+
+        handler = _ROUTES.get((method, path))
+        if handler is None:
+            known = any(p == path for _, p in _ROUTES)
+            return await _json(send, 405 if known else 404, {"error": "method not allowed" if known else "not found"})
+        try:
+            await handler(scope, receive, send)
+        except HTTPError as err:
+            await _json(send, err.status, {"error": str(err)})
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as exc:  # report instead of crashing the server loop
+                    await send({"type": "lifespan.startup.failed", "message": str(exc)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+app = ASGIApp()
@@ -21,6 +21,18 @@ class Settings:
         "DATABASE_URL",
         f"sqlite:///{Path(__file__).resolve().parent.parent.parent / 'app.db'}",
     )
+    # Rows per INSERT … ON CONFLICT statement when bulk-loading products.
+    DB_UPSERT_BATCH: int = int(os.getenv("DB_UPSERT_BATCH", "1000"))
+    # Connection pool (ignored for in-memory SQLite).
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # Seconds after which a pooled connection is replaced (-1 = never).
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # SQLite file databases: write-ahead log + pragmas set on every connection.
+    SQLITE_WAL: bool = os.getenv("SQLITE_WAL", "true").lower() == "true"
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
 
     # External APIs --------------------------------------------------
     FAKESTORE_API_URL: str = os.getenv("FAKESTORE_API_URL", "https://fakestoreapi.com")
@@ -28,5 +40,93 @@ class Settings:
     # Secrets --------------------------------------------------------
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
 
+    # Embeddings without OPENAI_API_KEY: "hashing" (hashed n-gram TF-IDF,
+    # meaningful offline) or "fake" (deterministic noise).  Products are
+    # embedded with it too unless their collection has its own function.
+    LOCAL_EMBEDDINGS: str = os.getenv("LOCAL_EMBEDDINGS", "hashing").lower()
+
+    # Retrieval ------------------------------------------------------
+    # Distance used to rank support articles: "l2" or "cosine".
+    SUPPORT_RAG_METRIC: str = os.getenv("SUPPORT_RAG_METRIC", "l2")
+    # Support KBs of at least this many vectors are searched through the IVF
+    # index (core.ann_index) instead of exactly; nprobe = cells scanned per
+    # query (the recall / latency knob), nlist = cell count (0 = about sqrt(n)).
+    SUPPORT_ANN_MIN_DOCS: int = int(os.getenv("SUPPORT_ANN_MIN_DOCS", "20000"))
+    SUPPORT_ANN_NPROBE: int = int(os.getenv("SUPPORT_ANN_NPROBE", "8"))
+    SUPPORT_ANN_NLIST: int = int(os.getenv("SUPPORT_ANN_NLIST", "0"))
+    # Seconds between re-reads of the shared collection-generation registry.
+    VECTOR_REGISTRY_TTL: float = float(os.getenv("VECTOR_REGISTRY_TTL", "2.0"))
+    # Hybrid BM25 + vector ranking (reciprocal-rank fusion).
+    HYBRID_RRF_K: int = int(os.getenv("HYBRID_RRF_K", "60"))
+    HYBRID_VECTOR_WEIGHT: float = float(os.getenv("HYBRID_VECTOR_WEIGHT", "1.0"))
+    HYBRID_LEXICAL_WEIGHT: float = float(os.getenv("HYBRID_LEXICAL_WEIGHT", "1.0"))
+    # Candidates taken from each ranking before fusion (at least 2*k).
+    HYBRID_CANDIDATES: int = int(os.getenv("HYBRID_CANDIDATES", "20"))
+    # Rows streamed from the DB (and upserted to Chroma) per product-index chunk.
+    PRODUCT_INDEX_CHUNK: int = int(os.getenv("PRODUCT_INDEX_CHUNK", "500"))
+    # Product vector index: "chroma", or "quantized" (int8 codes in memory-
+    # mapped files shared by all workers, see core.quantized_index).
+    PRODUCT_INDEX_BACKEND: str = os.getenv("PRODUCT_INDEX_BACKEND", "chroma").lower()
+    # Quantized index: candidates re-ranked exactly per requested result.
+    QUANTIZED_RERANK: int = int(os.getenv("QUANTIZED_RERANK", "8"))
+    # POST /api/search/batch: queries per request, and per multi-query
+    # Chroma call (results stream out chunk by chunk).
+    SEARCH_BATCH_MAX: int = int(os.getenv("SEARCH_BATCH_MAX", "10000"))
+    SEARCH_BATCH_CHUNK: int = int(os.getenv("SEARCH_BATCH_CHUNK", "64"))
+
+    # Agent router ---------------------------------------------------
+    # Local intent classifier in front of the LLM (see intent_classifier).
+    INTENT_FAST_PATH: bool = os.getenv("INTENT_FAST_PATH", "true").lower() == "true"
+    INTENT_CONFIDENCE_THRESHOLD: float = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.75"))
+    # Let confident model predictions skip the LLM too (off: rules only).
+    INTENT_MODEL_FAST_PATH: bool = os.getenv("INTENT_MODEL_FAST_PATH", "false").lower() == "true"
+    # Optional JSONL of {"query": ..., "label": ...} rows to train on.
+    INTENT_TRAINING_PATH: str = os.getenv("INTENT_TRAINING_PATH", "")
+    # Run product search and support retrieval while the LLM routes the
+    # request, keeping the branch it picks (the other one is wasted work).
+    ROUTER_SPECULATIVE: bool = os.getenv("ROUTER_SPECULATIVE", "false").lower() == "true"
+    ROUTER_SPECULATIVE_WORKERS: int = int(os.getenv("ROUTER_SPECULATIVE_WORKERS", "8"))
+
+    # Response cache -------------------------------------------------
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_TTL: float = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+    RESPONSE_CACHE_MAX_BYTES: int = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+    # Cosine similarity for a semantic hit; > 1 disables the embedding tier.
+    RESPONSE_CACHE_SIMILARITY: float = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.95"))
+
+    # Observability --------------------------------------------------
+    # Latency histograms, /api/metrics and request traces (see core.metrics).
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+    # Startup -------------------------------------------------------
+    # Build the lazily created clients (Chroma, LangGraph graphs, OpenAI
+    # wrappers, KB snapshot) on a background thread once the app is up.
+    STARTUP_WARMUP: bool = os.getenv("STARTUP_WARMUP", "false").lower() == "true"
+
+    # Embedding cache ------------------------------------------------
+    EMBED_CACHE_ENABLED: bool = os.getenv("EMBED_CACHE_ENABLED", "true").lower() == "true"
+    EMBED_CACHE_SIZE: int = int(os.getenv("EMBED_CACHE_SIZE", "4096"))
+    # SQLite file for the persistent tier; empty = memory only.
+    EMBED_CACHE_PATH: str = os.getenv("EMBED_CACHE_PATH", "")
+    EMBED_CACHE_DISK_MAX: int = int(os.getenv("EMBED_CACHE_DISK_MAX", "100000"))
+
+    # Support KB ingestion -------------------------------------------
+    INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", "4"))
+    INGEST_BATCH_TOKENS: int = int(os.getenv("INGEST_BATCH_TOKENS", "8000"))
+    INGEST_BATCH_DOCS: int = int(os.getenv("INGEST_BATCH_DOCS", "64"))
+    INGEST_WRITE_CHUNK: int = int(os.getenv("INGEST_WRITE_CHUNK", "256"))
+    INGEST_MAX_RETRIES: int = int(os.getenv("INGEST_MAX_RETRIES", "5"))
+    # Client-side cap on embedding requests per second (0 = unlimited).
+    INGEST_MAX_RPS: float = float(os.getenv("INGEST_MAX_RPS", "0"))
+    # Index heading-aware passages instead of whole articles.
+    SUPPORT_CHUNKING: bool = os.getenv("SUPPORT_CHUNKING", "true").lower() == "true"
+    SUPPORT_CHUNK_CHARS: int = int(os.getenv("SUPPORT_CHUNK_CHARS", "800"))
+    SUPPORT_CHUNK_OVERLAP: int = int(os.getenv("SUPPORT_CHUNK_OVERLAP", "120"))
+    # JSON manifest of ingested files; empty = next to the local Chroma data.
+    SUPPORT_MANIFEST_PATH: str = os.getenv("SUPPORT_MANIFEST_PATH", "")
+    # Poll interval (seconds) of `support_loader --watch`.
+    SUPPORT_WATCH_INTERVAL: float = float(os.getenv("SUPPORT_WATCH_INTERVAL", "2.0"))
+
 
 settings = Settings()
@@ -0,0 +1,319 @@
+"""
+Inverted-file (IVF) approximate nearest-neighbour index.
+
+`IVFIndex` partitions its vectors with k-means into `nlist` cells.  A
+query ranks the centroids and scores exactly only the vectors of the
+`nprobe` nearest cells, so `nprobe` is the recall / latency knob:
+`nprobe = nlist` is an exact scan, `nprobe = 1` reads about 1/nlist of
+the vectors.
+
+Inserts are incremental: a new vector joins the cell of its nearest
+centroid (cells are growable arrays) and removing one moves the cell's
+last row into the gap.  Once the index has grown to `_RETRAIN_GROWTH` ×
+the size its centroids were trained on, `add` re-clusters everything so
+cells stay balanced.
+
+Indexes persist as one `.npz` file per collection next to the local
+Chroma data (`ann_path`); `support_loader` keeps the file in step with
+`support_kb` at ingest time and `SnapshotCache` loads it with the KB.
+
+Distances match `VectorIndex`: Euclidean for "l2", 1 - cosine for "cosine".
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.retrieval import METRICS
+from app.core.vector_store import local_data_dir
+
+__all__ = ["IVFIndex", "kmeans", "ann_path"]
+
+_VERSION = 1
+_EPS = np.float32(1e-12)
+_BLOCK = 8192  # rows per block when assigning vectors to centroids
+_MIN_TRAIN = 1024  # below this many vectors the index stays one cell (exact)
+_RETRAIN_GROWTH = 2.0
+_TRAIN_PER_CELL = 64  # k-means sample size per centroid
+
+
+def ann_path(name: str) -> Path:
+    """Where the IVF index of logical collection `name` is stored."""
+    return local_data_dir() / "ann" / f"{name}.npz"
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the nearest centroid (L2) of every row of `vectors`."""
+    c_sq = np.einsum("ij,ij->i", centroids, centroids)
+    out = np.empty(len(vectors), dtype=np.intp)
+    for start in range(0, len(vectors), _BLOCK):
+        block = vectors[start : start + _BLOCK]
+        out[start : start + len(block)] = (c_sq - 2.0 * (block @ centroids.T)).argmin(axis=1)
+    return out
+
+
+def kmeans(vectors: np.ndarray, k: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """`k` centroids of `vectors` (Lloyd's algorithm from a random sample of rows)."""
+    rng = np.random.default_rng(seed)
+    k = max(1, min(k, len(vectors)))
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].astype(np.float32, copy=True)
+    for _ in range(iters):
+        assign = _nearest(vectors, centroids)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=k)
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+        centroids[filled] = np.add.reduceat(vectors[order], starts, axis=0) / counts[filled, None]
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):  # re-seed dead centroids on random rows
+            centroids[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+    return centroids
+
+
+class _Cell:
+    """Growable block of vectors (and their squared norms) of one IVF cell."""
+
+    __slots__ = ("vectors", "sq_norms", "ids")
+
+    def __init__(self, dim: int) -> None:
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+        self.sq_norms = np.empty(0, dtype=np.float32)
+        self.ids: List[str] = []
+
+    def append(self, ids: List[str], vectors: np.ndarray) -> None:
+        size, need = len(self.ids), len(self.ids) + len(ids)
+        if need > len(self.vectors):
+            capacity = max(need, 2 * len(self.vectors), 16)
+            grown = np.empty((capacity, self.vectors.shape[1]), dtype=np.float32)
+            grown[:size] = self.vectors[:size]
+            norms = np.empty(capacity, dtype=np.float32)
+            norms[:size] = self.sq_norms[:size]
+            self.vectors, self.sq_norms = grown, norms
+        self.vectors[size:need] = vectors
+        self.sq_norms[size:need] = np.einsum("ij,ij->i", vectors, vectors)
+        self.ids.extend(ids)
+
+    def pop(self, slot: int) -> Optional[str]:
+        """Remove row `slot`; returns the id moved into it (None if it was last)."""
+        last = len(self.ids) - 1
+        moved = None
+        if slot != last:
+            self.vectors[slot] = self.vectors[last]
+            self.sq_norms[slot] = self.sq_norms[last]
+            moved = self.ids[slot] = self.ids[last]
+        self.ids.pop()
+        return moved
+
+
+class IVFIndex:
+    """k-means inverted-file index over string ids; see the module docstring."""
+
+    def __init__(self, metric: str = "l2", nlist: int = 0, nprobe: int = 8, seed: int = 0) -> None:
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}; expected one of {METRICS}")
+        self.metric = metric
+        self.nlist = nlist  # 0 = about √n cells
+        self.nprobe = nprobe
+        self.seed = seed
+        self.dim: Optional[int] = None
+        self._centroids = np.empty((0, 0), dtype=np.float32)
+        self._cells: List[_Cell] = []
+        self._where: Dict[str, Tuple[int, int]] = {}  # id → (cell, slot)
+        self._trained_on = 0
+
+    @classmethod
+    def build(
+        cls, ids: Sequence[str], vectors: Sequence[Sequence[float]] | np.ndarray, metric: str = "l2", **kwargs
+    ) -> "IVFIndex":
+        """Index `vectors` and cluster them in one go."""
+        index = cls(metric=metric, **kwargs)
+        index.add(ids, vectors, retrain=False)
+        index.train()
+        return index
+
+    # ------------------------------------------------------------------#
+    # Introspection
+    # ------------------------------------------------------------------#
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._where
+
+    @property
+    def cells(self) -> int:
+        return len(self._cells)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by vectors, norms and centroids (allocated capacity)."""
+        return self._centroids.nbytes + sum(c.vectors.nbytes + c.sq_norms.nbytes for c in self._cells)
+
+    def vectors(self, ids: Iterable[str]) -> np.ndarray:
+        """Stored vectors of `ids` (unit length for "cosine"), in the given order."""
+        rows = [self._cells[c].vectors[s] for c, s in (self._where[i] for i in ids)]
+        return np.array(rows, dtype=np.float32).reshape(len(rows), self.dim or 0)
+
+    # ------------------------------------------------------------------#
+    # Updates
+    # ------------------------------------------------------------------#
+    def _prepare(self, vectors: Sequence[Sequence[float]] | np.ndarray) -> np.ndarray:
+        matrix = np.array(vectors, dtype=np.float32, ndmin=2)
+        if self.metric == "cosine":
+            matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), _EPS)
+        return matrix
+
+    def add(self, ids: Sequence[str], vectors: Sequence[Sequence[float]] | np.ndarray, retrain: bool = True) -> None:
+        """Insert (or replace) `ids`; re-clusters once the index outgrew its centroids."""
+        ids = list(ids)
+        if not ids:
+            return
+        matrix = self._prepare(vectors)
+        if len(matrix) != len(ids):
+            raise ValueError(f"Got {len(matrix)} vectors for {len(ids)} ids")
+        if self.dim is None:
+            self.dim = matrix.shape[1]
+            self._centroids = np.zeros((1, self.dim), dtype=np.float32)
+            self._cells = [_Cell(self.dim)]
+        elif matrix.shape[1] != self.dim:
+            raise ValueError(f"Vector dimension {matrix.shape[1]} does not match index dimension {self.dim}")
+        self.remove(i for i in ids if i in self._where)
+        assign = _nearest(matrix, self._centroids) if self.cells > 1 else np.zeros(len(ids), dtype=np.intp)
+        self._insert(ids, matrix, assign)
+        if retrain and len(self) >= _RETRAIN_GROWTH * max(self._trained_on, _MIN_TRAIN):
+            self.train()
+
+    def _insert(self, ids: List[str], matrix: np.ndarray, assign: np.ndarray) -> None:
+        order = np.argsort(assign, kind="stable")
+        cells, starts = np.unique(assign[order], return_index=True)
+        for cell, start, stop in zip(cells.tolist(), starts.tolist(), [*starts[1:].tolist(), len(order)]):
+            rows = order[start:stop]
+            target = self._cells[cell]
+            first = len(target.ids)
+            cell_ids = [ids[r] for r in rows.tolist()]
+            target.append(cell_ids, matrix[rows])
+            for slot, doc_id in enumerate(cell_ids, start=first):
+                self._where[doc_id] = (cell, slot)
+
+    def remove(self, ids: Iterable[str]) -> None:
+        """Drop `ids` (unknown ids are ignored); an emptied index forgets its dimension."""
+        removed = False
+        for doc_id in list(ids):
+            loc = self._where.pop(doc_id, None)
+            if loc is None:
+                continue
+            removed = True
+            moved = self._cells[loc[0]].pop(loc[1])
+            if moved is not None:
+                self._where[moved] = loc
+        if removed and not self._where:
+            self.dim = None
+            self._centroids = np.empty((0, 0), dtype=np.float32)
+            self._cells = []
+            self._trained_on = 0
+
+    def train(self) -> None:
+        """Re-cluster every stored vector into `nlist` (or about √n) cells."""
+        if self.dim is None:
+            return
+        ids = [i for cell in self._cells for i in cell.ids]
+        matrix = np.concatenate([cell.vectors[: len(cell.ids)] for cell in self._cells])
+        nlist = self.nlist or int(round(np.sqrt(len(ids))))
+        if len(ids) < _MIN_TRAIN and not self.nlist:
+            nlist = 1
+        nlist = max(1, min(nlist, len(ids)))
+        if nlist > 1:
+            rng = np.random.default_rng(self.seed)
+            sample = matrix[rng.choice(len(matrix), min(len(matrix), _TRAIN_PER_CELL * nlist), replace=False)]
+            self._centroids = kmeans(sample, nlist, seed=self.seed)
+            assign = _nearest(matrix, self._centroids)
+        else:
+            self._centroids = matrix.mean(axis=0, keepdims=True) if len(matrix) else self._centroids[:1]
+            assign = np.zeros(len(ids), dtype=np.intp)
+        self._cells = [_Cell(self.dim) for _ in range(len(self._centroids))]
+        self._where = {}
+        self._insert(ids, matrix, assign)
+        self._trained_on = len(ids)
+
+    # ------------------------------------------------------------------#
+    # Query
+    # ------------------------------------------------------------------#
+    def search(
+        self, query: Sequence[float] | np.ndarray, k: int, nprobe: int | None = None
+    ) -> Tuple[List[str], np.ndarray]:
+        """`(ids, distances)` of the `k` nearest vectors in the `nprobe` nearest cells."""
+        if not len(self) or k <= 0:
+            return [], np.empty(0, dtype=np.float32)
+        q = self._prepare(query)[0]
+        nprobe = max(1, min(nprobe or self.nprobe, self.cells))
+        c_dist = np.einsum("ij,ij->i", self._centroids, self._centroids) - 2.0 * (self._centroids @ q)
+        probe = np.argpartition(c_dist, nprobe - 1)[:nprobe] if nprobe < self.cells else np.arange(self.cells)
+
+        parts, owners = [], []
+        for cell_no in probe.tolist():
+            cell = self._cells[cell_no]
+            size = len(cell.ids)
+            if size:
+                # ‖q - x‖² - ‖q‖² = ‖x‖² - 2·q·x
+                parts.append(cell.sq_norms[:size] - 2.0 * (cell.vectors[:size] @ q))
+                owners.append(cell_no)
+        if not parts:
+            return [], np.empty(0, dtype=np.float32)
+        dist = np.concatenate(parts)
+        k = min(k, len(dist))
+        top = np.argpartition(dist, k - 1)[:k] if k < len(dist) else np.arange(len(dist))
+        top = top[np.argsort(dist[top], kind="stable")]
+
+        offsets = np.cumsum([0] + [len(p) for p in parts])
+        which = np.searchsorted(offsets, top, side="right") - 1
+        ids = [self._cells[owners[w]].ids[t - offsets[w]] for w, t in zip(which.tolist(), top.tolist())]
+        sq = np.maximum(dist[top] + q @ q, 0.0)
+        if self.metric == "cosine":  # unit vectors: ‖q - x‖² = 2 - 2·cos
+            return ids, (sq / 2.0).astype(np.float32)
+        return ids, np.sqrt(sq).astype(np.float32)
+
+    # ------------------------------------------------------------------#
+    # Persistence
+    # ------------------------------------------------------------------#
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        cells = self._cells
+        with open(tmp, "wb") as fh:
+            np.savez(
+                fh,
+                version=np.int64(_VERSION),
+                metric=np.str_(self.metric),
+                params=np.array([self.nlist, self.nprobe, self.seed, self._trained_on, self.dim or 0], np.int64),
+                centroids=self._centroids,
+                sizes=np.array([len(c.ids) for c in cells], dtype=np.int64),
+                vectors=np.concatenate([c.vectors[: len(c.ids)] for c in cells])
+                if cells
+                else np.empty((0, 0), np.float32),
+                ids=np.array([i for c in cells for i in c.ids], dtype=np.str_),
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["IVFIndex"]:
+        """The index stored at `path`, or None if missing / unreadable."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["version"]) != _VERSION:
+                    return None
+                nlist, nprobe, seed, trained_on, dim = data["params"].tolist()
+                index = cls(metric=str(data["metric"]), nlist=nlist, nprobe=nprobe, seed=seed)
+                centroids, sizes = data["centroids"], data["sizes"]
+                vectors, ids = data["vectors"], data["ids"].tolist()
+        except (FileNotFoundError, OSError, KeyError, ValueError):
+            return None
+        if dim:
+            index.dim = dim
+            index._centroids = centroids.astype(np.float32, copy=False)
+            index._cells = [_Cell(dim) for _ in range(len(centroids))]
+            index._insert(ids, vectors, np.repeat(np.arange(len(sizes)), sizes))
+            index._trained_on = trained_on
+        return index
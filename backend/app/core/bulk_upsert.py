@@ -0,0 +1,106 @@
+"""
+Chunked bulk upsert for ORM tables.
+
+`bulk_upsert` consumes any iterable of row dicts (a generator is fine, so
+the input never has to fit in memory) and writes it in batches of
+`batch_size` rows, one round of statements per batch:
+
+  • SQLite / PostgreSQL → `INSERT … ON CONFLICT (pk) DO UPDATE SET …`, compiled
+                          once and run as an executemany (PostgreSQL drivers
+                          fold it into multi-row VALUES pages)
+  • anything else       → one `SELECT pk … IN (…)` per batch, then a bulk
+                          INSERT of the new rows and a bulk UPDATE of the rest
+
+All rows must carry the same keys.  Rows repeated within a batch keep the
+last occurrence (PostgreSQL refuses to touch a row twice in one statement).
+Everything runs in the caller's session/transaction; committing is left to
+the caller.
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+__all__ = ["UpsertReport", "bulk_upsert"]
+
+Row = Dict[str, Any]
+
+
+class UpsertReport(NamedTuple):
+    rows: int
+    batches: int
+    seconds: float
+    batch_seconds: List[float]
+
+
+def _batches(rows: Iterable[Row], size: int, key: str) -> Iterator[List[Row]]:
+    batch: Dict[Any, Row] = {}
+    for row in rows:
+        batch[row[key]] = row  # last one wins
+        if len(batch) >= size:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+
+def _native(dialect: str, table, columns: List[str], key: str):
+    stmt = (sqlite_insert if dialect == "sqlite" else pg_insert)(table)
+    return stmt.on_conflict_do_update(
+        index_elements=[key],
+        set_={c: stmt.excluded[c] for c in columns if c != key},
+    )
+
+
+def _fallback(session: Session, model, batch: List[Row], key: str) -> None:
+    column = getattr(model, key)
+    existing = set(session.scalars(select(column).where(column.in_([r[key] for r in batch]))))
+    new = [r for r in batch if r[key] not in existing]
+    old = [r for r in batch if r[key] in existing]
+    if new:
+        session.execute(insert(model), new)
+    if old:
+        session.execute(update(model), old)  # ORM bulk UPDATE by primary key
+
+
+def bulk_upsert(
+    session: Session,
+    model,
+    rows: Iterable[Row],
+    *,
+    batch_size: int = 1000,
+    key: str = "id",
+    on_batch: Optional[Callable[[int, int, float], None]] = None,
+) -> UpsertReport:
+    """
+    Upsert `rows` into `model`'s table keyed on primary-key column `key`.
+
+    `on_batch(index, rows, seconds)` is called after every batch.
+    """
+    dialect = session.get_bind().dialect.name
+    table = model.__table__
+    native = dialect in ("sqlite", "postgresql")
+    statements: Dict[tuple, Any] = {}  # one compiled upsert per column set
+
+    total, timings = 0, []
+    t_start = time.perf_counter()
+    for batch in _batches(rows, batch_size, key):
+        t0 = time.perf_counter()
+        if native:
+            columns = tuple(batch[0])
+            if columns not in statements:
+                statements[columns] = _native(dialect, table, list(columns), key)
+            # executemany: the driver reuses one prepared statement per batch
+            session.connection().execute(statements[columns], batch)
+        else:
+            _fallback(session, model, batch, key)
+        timings.append(time.perf_counter() - t0)
+        total += len(batch)
+        if on_batch:
+            on_batch(len(timings) - 1, len(batch), timings[-1])
+    return UpsertReport(total, len(timings), time.perf_counter() - t_start, timings)
@@ -1,32 +1,132 @@
 """
 Database helpers: SQLAlchemy engine, session factory, and init_db utility.
+
+The engine's pool is sized by `DB_POOL_*` settings, and SQLite file
+databases run in WAL mode with the `SQLITE_*` pragmas.  Pool checkout wait
+and occupancy are exported through `app.core.metrics`.
+
+Request-path SQL opens short `with session_scope()` blocks (it also runs in
+`asyncio.to_thread` workers, where a thread-scoped session would never be
+torn down), so connections go back to the pool as soon as a block ends;
+each block's lifetime is recorded as `db_session_seconds`.
 """
 from __future__ import annotations
 
 import os
-from typing import Generator
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generator, Iterator, Optional
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import QueuePool
 
 from app.config import settings
+from app.core import metrics
+from app.core.metrics import DB_POOL_WAIT_SECONDS, DB_QUERY_SECONDS, DB_SESSION_SECONDS, record
 
 # ------------------------------------------------------------------#
 # Engine & session factory
 # ------------------------------------------------------------------#
 DATABASE_URL = settings.DATABASE_URL
 
-_ENGINE_KWARGS = {}
-if DATABASE_URL.startswith("sqlite"):
-    _ENGINE_KWARGS["connect_args"] = {"check_same_thread": False}
+_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+class _TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited."""
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            record(DB_POOL_WAIT_SECONDS, "db_pool_wait", time.perf_counter() - t0)
+
+
+def _set_sqlite_pragmas(dbapi_conn, _record) -> None:
+    synchronous = settings.SQLITE_SYNCHRONOUS
+    if synchronous not in _SYNCHRONOUS_MODES:
+        raise ValueError(f"SQLITE_SYNCHRONOUS must be one of {sorted(_SYNCHRONOUS_MODES)}")
+    cursor = dbapi_conn.cursor()
+    try:
+        if settings.SQLITE_WAL:
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    finally:
+        cursor.close()
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, **_ENGINE_KWARGS)  # type: ignore
+
+def make_engine(url: str) -> Engine:
+    """Engine for `url` with the configured pool and (SQLite) pragmas."""
+    parsed = make_url(url)
+    kwargs: Dict[str, Any] = {"pool_pre_ping": True}
+    is_sqlite = parsed.get_backend_name() == "sqlite"
+    in_memory = is_sqlite and parsed.database in (None, "", ":memory:")
+    if is_sqlite:
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if not in_memory:  # in-memory SQLite keeps SQLAlchemy's single-connection pool
+        kwargs.update(
+            poolclass=_TimedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+    eng = create_engine(url, **kwargs)
+    if is_sqlite and not in_memory:
+        event.listen(eng, "connect", _set_sqlite_pragmas)
+    return eng
+
+
+engine = make_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _pool_stat(name: str) -> float:
+    stat = getattr(engine.pool, name, None)
+    return float(stat()) if callable(stat) else 0.0
+
+
+metrics.gauge("db_pool_connections_in_use", "Connections checked out of the pool.", lambda: _pool_stat("checkedout"))
+metrics.gauge("db_pool_connections_idle", "Connections idle in the pool.", lambda: _pool_stat("checkedin"))
+metrics.gauge(
+    "db_pool_connections_overflow",
+    "Connections opened beyond the pool size.",
+    lambda: max(0.0, _pool_stat("overflow")),
+)
+
 # Declarative base for ORM models
 Base = declarative_base()
 
 
+# ------------------------------------------------------------------#
+# Statement timing (see app.core.metrics)
+# ------------------------------------------------------------------#
+@event.listens_for(engine, "before_cursor_execute")
+def _statement_started(conn, cursor, statement, parameters, context, executemany):
+    if settings.METRICS_ENABLED:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _statement_done(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if started:
+        op = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else "other"
+        record(DB_QUERY_SECONDS, f"sql:{op}", time.perf_counter() - started.pop(), op=op)
+
+
+@event.listens_for(engine, "handle_error")
+def _statement_failed(context):
+    conn = context.connection
+    started = conn.info.get("query_started") if conn is not None else None
+    if started:
+        started.pop()
+
+
 def init_db() -> None:
     """
     Create all tables (no-op if they exist).
@@ -34,16 +134,25 @@ def init_db() -> None:
     Called once at app start-up; imports model modules to make sure they are
     registered with the SQLAlchemy metadata before `create_all`.
     """
-    from app.models import product  # noqa: F401  (register model)
+    from app.models import index_state, product  # noqa: F401  (register models)
 
     Base.metadata.create_all(bind=engine)
 
 
-# Dependency helper for future routes/services
-def get_db() -> Generator:
-    """Fast dependency for obtaining and closing a session (used later)."""
-    db = SessionLocal()
+@contextmanager
+def session_scope(factory: Optional[Callable[[], Session]] = None) -> Iterator[Session]:
+    """Short-lived session (from `factory`, default `SessionLocal`), timed and closed."""
+    t0 = time.perf_counter()
+    db = (factory or SessionLocal)()
     try:
         yield db
     finally:
         db.close()
+        record(DB_SESSION_SECONDS, "db_session", time.perf_counter() - t0)
+
+
+# Dependency helper for future routes/services
+def get_db() -> Generator:
+    """Fast dependency for obtaining and closing a session (used later)."""
+    with session_scope() as db:
+        yield db
@@ -0,0 +1,243 @@
+"""
+Memoisation layer for embedding calls.
+
+`@cached_embeddings` decorates an `embed` method that takes either one
+string (`EmbeddingModel.embed`) or a list of strings
+(`EmbeddingProvider.embed`).  Vectors are keyed by a SHA-256 of
+(model name, text), so different models never share entries, and are
+returned as read-only float32 arrays.
+
+Two tiers, both size-bounded:
+  • in-memory LRU               – `EMBED_CACHE_SIZE` vectors
+  • optional SQLite file on disk – `EMBED_CACHE_PATH`, at most
+    `EMBED_CACHE_DISK_MAX` vectors, evicted FIFO (least recently written
+    first), so a warm restart does not re-embed anything.  The row count
+    is tracked in memory, so a write costs the same however full the file
+    is.
+"""
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.config import settings
+
+__all__ = ["EmbeddingCache", "cached_embeddings", "content_key", "default_cache"]
+
+
+def content_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode()).hexdigest()
+
+
+def _frozen(vec: Any) -> np.ndarray:
+    arr = np.array(vec, dtype=np.float32)  # always a private copy
+    arr.flags.writeable = False
+    return arr
+
+
+class EmbeddingCache:
+    """In-memory LRU of float32 vectors with an optional FIFO SQLite tier."""
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        disk_path: str | Path | None = None,
+        disk_max_entries: int = 100_000,
+    ) -> None:
+        self._max_entries = max_entries
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "disk_hits": 0, "misses": 0}
+
+        self._disk_max = disk_max_entries
+        self._disk_count = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if disk_path:
+            Path(disk_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(disk_path), check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " key TEXT PRIMARY KEY, vec BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_created_at ON embeddings (created_at)")
+            self._db.commit()
+            (self._disk_count,) = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+
+    # ------------------------------------------------------------------#
+    # Public API
+    # ------------------------------------------------------------------#
+    def get_many(self, keys: Sequence[str]) -> List[Optional[np.ndarray]]:
+        out: List[Optional[np.ndarray]] = [None] * len(keys)
+        cold: List[int] = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                vec = self._memory.get(key)
+                if vec is None:
+                    cold.append(i)
+                    continue
+                self._memory.move_to_end(key)
+                out[i] = vec
+                self._counts["hits"] += 1
+
+            if cold and self._db is not None:
+                found = self._disk_get([keys[i] for i in cold])
+                still_cold = []
+                for i in cold:
+                    vec = found.get(keys[i])
+                    if vec is None:
+                        still_cold.append(i)
+                        continue
+                    out[i] = vec
+                    self._remember(keys[i], vec)
+                    self._counts["disk_hits"] += 1
+                cold = still_cold
+
+            self._counts["misses"] += len(cold)
+        return out
+
+    def put_many(self, keys: Sequence[str], vectors: Sequence[np.ndarray]) -> None:
+        with self._lock:
+            for key, vec in zip(keys, vectors):
+                self._remember(key, vec)
+            if self._db is not None:
+                self._disk_put(keys, vectors)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = sum(self._counts.values())
+        hits = self._counts["hits"] + self._counts["disk_hits"]
+        return {
+            **self._counts,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "entries": len(self._memory),
+            "disk_entries": self._disk_count,
+        }
+
+    # ------------------------------------------------------------------#
+    # Internals (callers hold `_lock`)
+    # ------------------------------------------------------------------#
+    def _remember(self, key: str, vec: np.ndarray) -> None:
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_keys(self, keys: List[str], columns: str) -> List[tuple]:
+        rows: List[tuple] = []
+        for start in range(0, len(keys), 500):  # stay under SQLite's variable limit
+            chunk = keys[start : start + 500]
+            rows.extend(
+                self._db.execute(  # type: ignore[union-attr]
+                    f"SELECT {columns} FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+            )
+        return rows
+
+    def _disk_get(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        # frombuffer: read-only views
+        return {key: np.frombuffer(blob, dtype=np.float32) for key, blob in self._disk_keys(keys, "key, vec")}
+
+    def _disk_put(self, keys: Sequence[str], vectors: Sequence[np.ndarray]) -> None:
+        now = time.time()
+        unique = list(dict.fromkeys(keys))
+        existing = len(self._disk_keys(unique, "key"))  # primary-key lookups only
+        self._db.executemany(  # type: ignore[union-attr]
+            "INSERT OR REPLACE INTO embeddings (key, vec, created_at) VALUES (?, ?, ?)",
+            [(k, v.tobytes(), now) for k, v in zip(keys, vectors)],
+        )
+        self._disk_count += len(unique) - existing
+        if self._disk_count > self._disk_max:
+            cur = self._db.execute(  # type: ignore[union-attr]
+                "DELETE FROM embeddings WHERE rowid IN ("
+                " SELECT rowid FROM embeddings ORDER BY created_at LIMIT ?)",
+                (self._disk_count - self._disk_max,),
+            )
+            self._disk_count -= cur.rowcount
+        self._db.commit()  # type: ignore[union-attr]
+
+
+# --------------------------------------------------------------------------- #
+# Process-wide default + decorator
+# --------------------------------------------------------------------------- #
+_default: Optional[EmbeddingCache] = None
+_default_lock = threading.Lock()
+
+
+def default_cache() -> EmbeddingCache:
+    """Shared cache configured from `EMBED_CACHE_*` settings."""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                _default = EmbeddingCache(
+                    max_entries=settings.EMBED_CACHE_SIZE,
+                    disk_path=settings.EMBED_CACHE_PATH or None,
+                    disk_max_entries=settings.EMBED_CACHE_DISK_MAX,
+                )
+    return _default
+
+
+def cached_embeddings(method: Callable) -> Callable:
+    """
+    Memoise `embed(self, text)` / `embed(self, texts)`.
+
+    The model part of the key is `self.model_name`; the cache is
+    `self.embedding_cache` when set, else `default_cache()`.  For list input
+    only the misses are forwarded to the wrapped method, in one call.
+    Coroutine methods (`aembed`) get an async wrapper over the same cache,
+    so sync and async callers of one model share entries.
+    """
+
+    def lookup(self, texts):
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        cache: EmbeddingCache = getattr(self, "embedding_cache", None) or default_cache()
+        model = getattr(self, "model_name", type(self).__name__)
+        keys = [content_key(model, t) for t in batch]
+        out = cache.get_many(keys)
+        missing = [i for i, vec in enumerate(out) if vec is None]
+        request = None
+        if missing:
+            request = texts if single else [batch[i] for i in missing]
+        return single, cache, keys, out, missing, request
+
+    def store(single, cache, keys, out, missing, fresh):
+        if missing:
+            fresh = [fresh] if single else fresh
+            fresh_vecs = [_frozen(v) for v in fresh]
+            cache.put_many([keys[i] for i in missing], fresh_vecs)
+            for i, vec in zip(missing, fresh_vecs):
+                out[i] = vec
+        return out[0] if single else out
+
+    if inspect.iscoroutinefunction(method):
+
+        @functools.wraps(method)
+        async def async_wrapper(self, texts):
+            if not settings.EMBED_CACHE_ENABLED:
+                return await method(self, texts)
+            single, cache, keys, out, missing, request = lookup(self, texts)
+            fresh = await method(self, request) if missing else None
+            return store(single, cache, keys, out, missing, fresh)
+
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, texts):
+        if not settings.EMBED_CACHE_ENABLED:
+            return method(self, texts)
+        single, cache, keys, out, missing, request = lookup(self, texts)
+        fresh = method(self, request) if missing else None
+        return store(single, cache, keys, out, missing, fresh)
+
+    return wrapper
@@ -3,17 +3,31 @@ Embedding provider abstraction.
 
 * `OpenAIEmbeddingProvider` – production, hits OpenAI API (text-embedding-3-small)
 * `FakeEmbeddingProvider` – deterministic embeddings for unit tests
+* `HashingEmbeddingProvider` – offline TF-IDF over hashed word / character
+  n-grams: meaningful similarity with no model download and no network
+
+`fake_embeddings` is the noise generator behind the fake provider:
+production-width (1536) float32 vectors, each drawn from a NumPy
+`Generator` seeded with the SHA-256 of its text.  `local_provider()` picks
+the offline backend used when OPENAI_API_KEY is unset (`LOCAL_EMBEDDINGS`).
+
+Concrete `embed` methods are wrapped with `@cached_embeddings`, so repeated
+texts are served from the shared embedding cache as float32 arrays.
 """
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import os
+import zlib
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional, Sequence, Tuple
 
 import numpy as np
 
 from app.config import settings
+from app.core.embedding_cache import cached_embeddings
+from app.core.lexical_index import tokenize
 
 # --------------------------------------------------------------------------- #
 # Abstract base
@@ -23,8 +37,14 @@ from app.config import settings
 class EmbeddingProvider(ABC):
     """Strategy interface for embedding providers."""
 
+    model_name: str = "unknown"  # part of the embedding-cache key
+
     @abstractmethod
-    def embed(self, texts: List[str]) -> List[List[float]]: ...
+    def embed(self, texts: List[str]) -> List[np.ndarray]: ...
+
+    async def aembed(self, texts: List[str]) -> List[np.ndarray]:
+        """Async `embed`; the default runs it on a worker thread."""
+        return await asyncio.to_thread(self.embed, texts)
 
 
 # --------------------------------------------------------------------------- #
@@ -38,33 +58,229 @@ class OpenAIEmbeddingProvider(EmbeddingProvider):
         import openai  # type: ignore
 
         self._client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        self._async_client = openai.AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
         self._model = "text-embedding-3-small"
+        self.model_name = self._model
 
-    def embed(self, texts: List[str]) -> List[List[float]]:
+    @cached_embeddings
+    def embed(self, texts: List[str]) -> List[np.ndarray]:
         res = self._client.embeddings.create(model=self._model, input=texts)
         return [record.embedding for record in res.data]  # type: ignore[attr-defined]
 
+    @cached_embeddings
+    async def aembed(self, texts: List[str]) -> List[np.ndarray]:
+        res = await self._async_client.embeddings.create(model=self._model, input=texts)
+        return [record.embedding for record in res.data]  # type: ignore[attr-defined]
+
 
 # --------------------------------------------------------------------------- #
 # Fake implementation (deterministic – good for tests)
 # --------------------------------------------------------------------------- #
+FAKE_DIM = 1536  # same width as text-embedding-3-small
+FAKE_MODEL_NAME = f"fake-pcg64-{FAKE_DIM}"
+
+
+def fake_embeddings(texts: Sequence[str], dim: int = FAKE_DIM) -> np.ndarray:
+    """
+    Deterministic pseudo-embeddings: one float32 row in [0, 1) per text.
+
+    Every row comes from its own PCG64 `Generator` seeded with the text's
+    SHA-256, so a vector depends on nothing but its text – no global RNG
+    state, safe under concurrent requests, identical alone or in a batch.
+    Rows are written straight into one preallocated `(len(texts), dim)`
+    matrix; nothing else is allocated per text.
+    """
+    out = np.empty((len(texts), dim), dtype=np.float32)
+    for row, text in zip(out, texts):
+        seed = int.from_bytes(hashlib.sha256(text.encode()).digest(), "little")
+        np.random.Generator(np.random.PCG64(seed)).random(dtype=np.float32, out=row)
+    return out
+
+
 class FakeEmbeddingProvider(EmbeddingProvider):
-    """Returns a deterministic 8-dim vector derived from text hash."""
+    """Deterministic production-width vectors from `fake_embeddings`."""
+
+    model_name = FAKE_MODEL_NAME
+
+    @cached_embeddings
+    def embed(self, texts: List[str]) -> List[np.ndarray]:
+        return list(self.encode(texts))
+
+    @cached_embeddings
+    async def aembed(self, texts: List[str]) -> List[np.ndarray]:
+        return list(self.encode(texts))  # pure CPU, cheaper inline than a thread hop
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Uncached `(len(texts), FAKE_DIM)` float32 matrix."""
+        return fake_embeddings(texts)
+
+
+# --------------------------------------------------------------------------- #
+# Hashed n-gram TF-IDF (offline, meaningful)
+# --------------------------------------------------------------------------- #
+_M64 = np.uint64(0xFFFFFFFFFFFFFFFF)
+_FNV_PRIME = np.uint64(0x100000001B3)
+_FNV_OFFSET = 0xCBF29CE484222325
+
 
-    def embed(self, texts: List[str]) -> List[List[float]]:
-        out: List[List[float]] = []
-        for t in texts:
-            h = hashlib.md5(t.encode()).digest()  # 16 bytes
-            vec = [b / 255.0 for b in h[:8]]  # 8-dim vector values ∈ [0,1]
-            out.append(vec)
-        return out
+def _fmix64(keys: np.ndarray) -> np.ndarray:
+    """MurmurHash3 finaliser: spreads (crc32 / FNV) keys over all 64 bits."""
+    keys = keys ^ (keys >> np.uint64(33))
+    keys = keys * np.uint64(0xFF51AFD7ED558CCD)
+    keys = keys ^ (keys >> np.uint64(33))
+    keys = keys * np.uint64(0xC4CEB9FE1A85EC53)
+    return keys ^ (keys >> np.uint64(33))
+
+
+class HashingEmbeddingProvider(EmbeddingProvider):
+    """
+    TF-IDF vectors over hashed features, L2-normalised, float32.
+
+    Features per text: stemmed, stop-word-free words (`lexical_index.tokenize`),
+    adjacent word pairs and character n-grams (`char_ngrams`, over the
+    tokens with boundary spaces, so "lamps" still shares most grams with
+    "lamp").  Each distinct feature is hashed (crc32 for words, a vectorised
+    FNV-1a for character grams) to a column in `[0, dim)` with a hashed ±1
+    sign, weighted `(1 + log tf) × group weight`, and summed with one
+    `np.bincount` for the whole batch – the sparse-matrix product of a
+    hashing vectorizer without SciPy.
+
+    Unfitted, the word / pair / character group weights stand in for IDF;
+    `fit(corpus)` returns a provider that also scales every column by its
+    smoothed IDF over `corpus`.  Its `model_name` includes a digest of the
+    IDF table so vectors from different fits are never mixed.
+    """
+
+    def __init__(
+        self,
+        dim: int = FAKE_DIM,
+        char_ngrams: Tuple[int, ...] = (3, 4, 5),
+        weights: Tuple[float, float, float] = (1.0, 0.5, 0.3),
+        idf: Optional[np.ndarray] = None,
+    ) -> None:
+        self.dim = dim
+        self.char_ngrams = tuple(char_ngrams)
+        self.weights = weights
+        self.idf = None if idf is None else np.asarray(idf, dtype=np.float32)
+        grams = "".join(str(n) for n in self.char_ngrams)
+        self.model_name = f"hashing-tfidf-{dim}-c{grams}"
+        if self.idf is not None:
+            self.model_name += "-idf" + hashlib.sha256(self.idf.tobytes()).hexdigest()[:8]
+
+    @cached_embeddings
+    def embed(self, texts: List[str]) -> List[np.ndarray]:
+        return list(self.encode(texts))
+
+    @cached_embeddings
+    async def aembed(self, texts: List[str]) -> List[np.ndarray]:
+        return list(self.encode(texts))  # pure CPU, cheaper inline than a thread hop
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Uncached `(len(texts), dim)` float32 matrix of unit rows."""
+        matrix = self._tf(texts)
+        if self.idf is not None:
+            matrix *= self.idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix.astype(np.float32)
+
+    def fit(self, corpus: Sequence[str]) -> "HashingEmbeddingProvider":
+        """Same features, plus column IDF computed over `corpus`."""
+        df = np.count_nonzero(self._tf(corpus), axis=0)
+        idf = np.log((1.0 + len(corpus)) / (1.0 + df)) + 1.0
+        return HashingEmbeddingProvider(self.dim, self.char_ngrams, self.weights, idf=idf)
+
+    # ----------------------------------------------------------------------- #
+    def _tf(self, texts: Sequence[str]) -> np.ndarray:
+        """Signed, sublinear term frequencies summed into `dim` columns (float64)."""
+        n = len(texts)
+        tokens = [tokenize(t) for t in texts]
+        rows, keys, groups = [], [], []
+
+        word_keys: List[int] = []
+        word_rows: List[int] = []
+        word_groups: List[int] = []
+        for row, toks in enumerate(tokens):
+            for tok in toks:
+                word_keys.append(zlib.crc32(tok.encode()))
+                word_rows.append(row)
+                word_groups.append(0)
+            for a, b in zip(toks, toks[1:]):
+                word_keys.append(zlib.crc32(f"{a} {b}".encode(), 0x9E3779B9))
+                word_rows.append(row)
+                word_groups.append(1)
+        if word_keys:
+            rows.append(np.asarray(word_rows, dtype=np.int64))
+            keys.append(np.asarray(word_keys, dtype=np.uint64))
+            groups.append(np.asarray(word_groups, dtype=np.int8))
+
+        char_rows, char_keys = self._char_grams(tokens)
+        if len(char_keys):
+            rows.append(char_rows)
+            keys.append(char_keys)
+            groups.append(np.full(len(char_keys), 2, dtype=np.int8))
+
+        if not keys:
+            return np.zeros((n, self.dim))
+        row = np.concatenate(rows)
+        key = _fmix64(np.concatenate(keys))
+        group = np.concatenate(groups)
+
+        # distinct (row, feature) pairs and their counts → 1 + log(tf)
+        order = np.lexsort((key, row))
+        row, key, group = row[order], key[order], group[order]
+        start = np.ones(len(key), dtype=bool)
+        start[1:] = (row[1:] != row[:-1]) | (key[1:] != key[:-1])
+        first = np.flatnonzero(start)
+        tf = np.diff(np.append(first, len(key)))
+        row, key, group = row[first], key[first], group[first]
+
+        sign = np.where((key >> np.uint64(63)).astype(bool), -1.0, 1.0)
+        value = sign * np.asarray(self.weights)[group] * (1.0 + np.log(tf))
+        column = (key % np.uint64(self.dim)).astype(np.int64)
+        flat = np.bincount(row * self.dim + column, weights=value, minlength=n * self.dim)
+        return flat.reshape(n, self.dim)
+
+    def _char_grams(self, tokens: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+        """(row, FNV-1a key) of every character n-gram, hashed for the whole batch at once."""
+        docs = [(" " + " ".join(toks) + " ").encode() if toks else b"" for toks in tokens]
+        lengths = np.fromiter((len(d) for d in docs), dtype=np.int64, count=len(docs))
+        data = np.frombuffer(b"".join(docs), dtype=np.uint8).astype(np.uint64)
+        owner = np.repeat(np.arange(len(docs), dtype=np.int64), lengths)
+        rows, keys = [], []
+        with np.errstate(over="ignore"):
+            for size in self.char_ngrams:
+                count = len(data) - size + 1
+                if count <= 0:
+                    continue
+                valid = np.flatnonzero(owner[:count] == owner[size - 1 :])
+                h = np.full(len(valid), _FNV_OFFSET ^ size, dtype=np.uint64)
+                for offset in range(size):
+                    h = ((h ^ data[valid + offset]) * _FNV_PRIME) & _M64
+                rows.append(owner[valid])
+                keys.append(h)
+        if not keys:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint64)
+        return np.concatenate(rows), np.concatenate(keys)
 
 
 # --------------------------------------------------------------------------- #
 # Provider factory util
 # --------------------------------------------------------------------------- #
+_local: Optional[EmbeddingProvider] = None
+
+
+def local_provider() -> EmbeddingProvider:
+    """Shared offline provider selected by `LOCAL_EMBEDDINGS` (hashing | fake)."""
+    global _local
+    wanted = HashingEmbeddingProvider if settings.LOCAL_EMBEDDINGS == "hashing" else FakeEmbeddingProvider
+    if not isinstance(_local, wanted):
+        _local = wanted()
+    return _local
+
+
 def get_default_provider() -> EmbeddingProvider:
-    """Return OpenAI provider if key present, else Fake (offline)."""
+    """Return OpenAI provider if key present, else the local (offline) one."""
     if settings.OPENAI_API_KEY:
         return OpenAIEmbeddingProvider()
-    return FakeEmbeddingProvider()
+    return local_provider()
@@ -0,0 +1,205 @@
+"""
+Inverted-index BM25 engine and reciprocal-rank fusion.
+
+`BM25Index` keeps postings (term → {doc id: tf}) plus a forward index so a
+document can be replaced or removed without a rebuild; IDF and average
+length are derived at query time, so incremental updates stay exact.
+Indexes persist as one JSON file per collection next to the local Chroma
+data (`index_path`) and are written at ingest time by `support_loader` and
+`indexer`.
+
+Readers go through `lexical_index(name)`, which re-reads the file only when
+the collection's generation moves on (same contract as `SnapshotCache`).
+
+`rrf` fuses several rankings with reciprocal rank fusion:
+    score(d) = Σ weight_i / (k + rank_i(d))
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.vector_store import collection_generation, local_data_dir
+
+__all__ = ["BM25Index", "tokenize", "rrf", "index_path", "lexical_index"]
+
+_VERSION = 1
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i if in is it its me my "
+    "of on or our so that the their there this to was we what when where which who why "
+    "will with you your".split()
+)
+
+
+def _stem(token: str) -> str:
+    """Very light plural folding ("returns" → "return", "boxes" → "box")."""
+    if len(token) > 4 and token.endswith("es") and token[-3] in "sxz":
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased, stop-word-free, lightly stemmed word tokens."""
+    return [_stem(t) for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """Okapi BM25 over an updatable inverted index."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._docs: Dict[str, Dict[str, int]] = {}  # forward index: id → {term: tf}
+        self._lengths: Dict[str, int] = {}
+        self._total_len = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._docs
+
+    # ------------------------------------------------------------------#
+    # Updates
+    # ------------------------------------------------------------------#
+    def add(self, doc_id: str, text: str) -> None:
+        """Index `text` under `doc_id`, replacing any previous version."""
+        self.remove(doc_id)
+        terms: Dict[str, int] = {}
+        for tok in tokenize(text):
+            terms[tok] = terms.get(tok, 0) + 1
+        self._insert(doc_id, terms)
+
+    def _insert(self, doc_id: str, terms: Dict[str, int]) -> None:
+        self._docs[doc_id] = terms
+        length = sum(terms.values())
+        self._lengths[doc_id] = length
+        self._total_len += length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_id: str) -> None:
+        terms = self._docs.pop(doc_id, None)
+        if terms is None:
+            return
+        self._total_len -= self._lengths.pop(doc_id)
+        for term in terms:
+            posting = self._postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self._postings[term]
+
+    def update(self, docs: Iterable[Tuple[str, str]]) -> None:
+        for doc_id, text in docs:
+            self.add(doc_id, text)
+
+    @classmethod
+    def build(cls, docs: Iterable[Tuple[str, str]], **kwargs) -> "BM25Index":
+        index = cls(**kwargs)
+        index.update(docs)
+        return index
+
+    # ------------------------------------------------------------------#
+    # Scoring
+    # ------------------------------------------------------------------#
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-`k` `(doc id, score)` pairs; documents sharing no term are omitted."""
+        n = len(self._docs)
+        if not n or k <= 0:
+            return []
+        avg_len = self._total_len / n or 1.0
+        k1, b = self.k1, self.b
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            df = len(posting)
+            idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+            for doc_id, tf in posting.items():
+                norm = k1 * (1.0 - b + b * self._lengths[doc_id] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return ranked[:k]
+
+    # ------------------------------------------------------------------#
+    # Persistence
+    # ------------------------------------------------------------------#
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        payload = {"version": _VERSION, "k1": self.k1, "b": self.b, "docs": self._docs}
+        tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["BM25Index"]:
+        """The index stored at `path`, or None if missing / unreadable."""
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        if data.get("version") != _VERSION:
+            return None
+        index = cls(k1=data["k1"], b=data["b"])
+        for doc_id, terms in data["docs"].items():
+            index._insert(doc_id, terms)
+        return index
+
+
+def rrf(
+    rankings: Sequence[Sequence[Hashable]],
+    weights: Sequence[float] | None = None,
+    k: int = 60,
+) -> List[Tuple[Hashable, float]]:
+    """
+    Reciprocal-rank fusion of ranked id lists, best first.
+
+    Ties are broken in favour of ids found by more rankings, then by the
+    earlier ranking's order.
+    """
+    weights = weights or [1.0] * len(rankings)
+    scores: Dict[Hashable, float] = {}
+    seen_in: Dict[Hashable, int] = {}
+    first_rank: Dict[Hashable, Tuple[int, int]] = {}
+    for r, (ranking, weight) in enumerate(zip(rankings, weights)):
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+            seen_in[doc_id] = seen_in.get(doc_id, 0) + 1
+            first_rank.setdefault(doc_id, (r, rank))
+    return sorted(scores.items(), key=lambda kv: (-kv[1], -seen_in[kv[0]], first_rank[kv[0]]))
+
+
+# --------------------------------------------------------------------------- #
+# On-disk indexes per collection
+# --------------------------------------------------------------------------- #
+def index_path(name: str) -> Path:
+    """Where the BM25 index of logical collection `name` is stored."""
+    return local_data_dir() / "lexical" / f"{name}.json"
+
+
+_cache: Dict[str, Tuple[int, BM25Index]] = {}
+_cache_lock = threading.Lock()
+
+
+def lexical_index(name: str) -> BM25Index:
+    """BM25 index of `name` for readers, re-read once per collection generation."""
+    generation = collection_generation(name)
+    entry = _cache.get(name)
+    if entry is not None and entry[0] == generation:
+        return entry[1]
+    with _cache_lock:
+        entry = _cache.get(name)
+        if entry is None or entry[0] != generation:
+            entry = (generation, BM25Index.load(index_path(name)) or BM25Index())
+            _cache[name] = entry
+    return entry[1]
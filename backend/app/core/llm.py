@@ -1,15 +1,22 @@
 """
 LLM & embedding helpers shared across services.
+
+langchain is only imported when an OpenAI-backed client is first used, so
+importing this module (and building the provider singletons) stays cheap.
 """
 from __future__ import annotations
+import asyncio
 import os
-import hashlib
-import random
-from typing import List
+from typing import TYPE_CHECKING, AsyncIterator
+
+import numpy as np
 
-from langchain.chat_models import ChatOpenAI
-from langchain.schema import BaseMessage
-from langchain.embeddings import OpenAIEmbeddings
+from app.core.embedding_cache import cached_embeddings
+from app.core.embeddings import local_provider
+from app.core.metrics import EMBED_SECONDS, timed
+
+if TYPE_CHECKING:
+    from langchain.schema import BaseMessage
 
 
 # ─────────────────── Chat-LLM interface ───────────────────────────────────────
@@ -17,46 +24,137 @@ class LLMInterface:
     def stream(self, messages: list[dict | BaseMessage]) -> str:
         raise NotImplementedError
 
+    async def astream(self, messages: list[dict | BaseMessage]) -> AsyncIterator[str]:
+        """
+        Async variant of `stream`.  The default pulls the sync stream one
+        chunk at a time on a worker thread; providers with a native async
+        client override it so no thread is held while waiting on tokens.
+        """
+        chunks = iter(self.stream(messages))
+        done = object()
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, done)
+            if chunk is done:
+                return
+            yield chunk
+
+    def warm(self) -> None:
+        """Create any lazily built client now (no-op by default)."""
+
 
 class OpenAIProvider(LLMInterface):
     def __init__(self, model: str = "gpt-3.5-turbo-0125"):
-        self._client = ChatOpenAI(model=model, temperature=0.2, streaming=True)
+        self._model = model
+        self._chat = None
+
+    @property
+    def _client(self):
+        if self._chat is None:
+            from langchain.chat_models import ChatOpenAI
+
+            self._chat = ChatOpenAI(model=self._model, temperature=0.2, streaming=True)
+        return self._chat
+
+    def warm(self) -> None:
+        self._client
 
     def stream(self, messages):
         for chunk in self._client.stream(messages):
             yield chunk.content or ""
 
+    async def astream(self, messages):
+        async for chunk in self._client.astream(messages):
+            yield chunk.content or ""
+
 
 class FakeLLM(LLMInterface):
-    """Deterministic stub for CI / offline usage."""
+    """
+    Deterministic stub for CI / offline usage.
+
+    `chunk_size` > 0 splits the reply into pieces of that many characters so
+    streaming code paths see several chunks, like a real token stream.
+    """
+
+    def __init__(self, chunk_size: int = 0):
+        self._chunk_size = chunk_size
 
     def stream(self, messages):
+        yield from self._chunks(messages)
+
+    async def astream(self, messages):
+        for chunk in self._chunks(messages):
+            yield chunk
+
+    def _chunks(self, messages):
         last = messages[-1]["content"].lower()
         if any(w in last for w in ("how", "return", "policy", "shipping", "order")):
-            yield "support"
+            reply = "support"
         elif any(w in last for w in ("recommend", "suggest")):
-            yield "fallback"        # keep legacy label expected by tests
+            reply = "fallback"        # keep legacy label expected by tests
         else:
-            yield "search"
+            reply = "search"
+
+        if self._chunk_size <= 0:
+            return [reply]
+        return [reply[i : i + self._chunk_size] for i in range(0, len(reply), self._chunk_size)]
 
 
 # ─────────────────── Embedding wrapper ────────────────────────────────────────
 class EmbeddingModel:
     """
     Thin wrapper returning a 1536-dim vector.
-    Uses OpenAIEmbeddings when OPENAI_API_KEY is set, otherwise
-    produces deterministic fake vectors so tests don't hit the API.
+    Uses OpenAIEmbeddings when OPENAI_API_KEY is set, otherwise the local
+    provider (`embeddings.local_provider`: hashed n-gram TF-IDF, or
+    deterministic fake vectors) so nothing hits the API.
+    Results are memoised (see `app.core.embedding_cache`) and come back as
+    read-only float32 arrays.
     """
 
     def __init__(self):
         self._use_openai = bool(os.getenv("OPENAI_API_KEY"))
+        self._local = None if self._use_openai else local_provider()
+        self.model_name = "text-embedding-3-small" if self._use_openai else self._local.model_name
+        self._openai = None
+
+    @property
+    def _model(self):
+        if self._openai is None:
+            from langchain.embeddings import OpenAIEmbeddings
+
+            self._openai = OpenAIEmbeddings(model=self.model_name)
+        return self._openai
+
+    def warm(self) -> None:
+        """Import / build the OpenAI client now instead of on the first call."""
         if self._use_openai:
-            self._model = OpenAIEmbeddings(model="text-embedding-3-small")
+            self._model
 
-    def embed(self, text: str) -> List[float]:
+    @timed(EMBED_SECONDS, "embed", op="embed")
+    @cached_embeddings
+    def embed(self, text: str) -> np.ndarray:
         if self._use_openai:
             return self._model.embed_query(text)
-        # deterministic pseudo-embedding
-        h = hashlib.sha256(text.encode()).digest()
-        random.seed(h)
-        return [random.random() for _ in range(1536)]
+        return self._local.encode([text])[0]
+
+    @timed(EMBED_SECONDS, "embed", op="embed_batch")
+    @cached_embeddings
+    def embed_batch(self, texts: list[str]) -> list[np.ndarray]:
+        """Embed many texts in one provider call (same vectors as `embed`)."""
+        if self._use_openai:
+            return self._model.embed_documents(texts)
+        return list(self._local.encode(texts))
+
+    # Async variants share the cache entries of `embed` / `embed_batch`.
+    @timed(EMBED_SECONDS, "embed", op="aembed")
+    @cached_embeddings
+    async def aembed(self, text: str) -> np.ndarray:
+        if self._use_openai:
+            return await self._model.aembed_query(text)
+        return self._local.encode([text])[0]
+
+    @timed(EMBED_SECONDS, "embed", op="aembed_batch")
+    @cached_embeddings
+    async def aembed_batch(self, texts: list[str]) -> list[np.ndarray]:
+        if self._use_openai:
+            return await self._model.aembed_documents(texts)
+        return list(self._local.encode(texts))
@@ -0,0 +1,305 @@
+"""
+Latency metrics and per-request tracing for the chat / search hot path.
+
+Counters and histograms live in a process-local registry and are rendered
+in the Prometheus text format by `render()` (served at `/api/metrics`) –
+no client library needed.  Instrumented stages:
+
+  chat_node_seconds{node}       each `agent_router` graph node
+  chat_route_total{tool}        routing decisions
+  embedding_seconds{op}         `EmbeddingModel` calls (cache hits included)
+  chroma_seconds{op}            collection `query` / `get`
+  db_query_seconds{op}          every SQL statement (engine events)
+  db_session_seconds            `session_scope` session lifetime
+  db_pool_wait_seconds          pool checkout wait (incl. opening connections)
+  db_pool_connections_*         pool gauges: in use, idle, overflow
+  stage_seconds{stage}          misc. steps (SQL hydration, serialization)
+  http_request_seconds{...}     whole requests, by endpoint and status
+  http_requests_total{...}
+
+Each request also opens a `Trace` (request id + list of spans) in a context
+variable; every observation made while it is active is appended to it, so
+the API layer can return the id in `X-Request-ID` and the spans in a
+`Server-Timing` header / debug log.
+
+With METRICS_ENABLED=false every hook is a single settings check: `timed`
+calls straight through, `instrument_collection` returns the collection
+itself and `timer` yields at once.
+"""
+from __future__ import annotations
+
+import bisect
+import contextvars
+import functools
+import inspect
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+__all__ = [
+    "Counter",
+    "Histogram",
+    "Gauge",
+    "gauge",
+    "Trace",
+    "enabled",
+    "record",
+    "timed",
+    "timer",
+    "instrument_collection",
+    "start_trace",
+    "end_trace",
+    "current_trace",
+    "render",
+]
+
+_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def enabled() -> bool:
+    return settings.METRICS_ENABLED
+
+
+# --------------------------------------------------------------------------- #
+# Metric types
+# --------------------------------------------------------------------------- #
+def _label_str(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(tuple(str(labels[n]) for n in self.labelnames), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:  # snapshot; `inc` may add label sets concurrently
+            values = list(self._values.items())
+        for key, value in sorted(values):
+            yield f"{self.name}{_label_str(self.labelnames, key)} {value:g}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = _BUCKETS
+    ) -> None:
+        self.name, self.help, self.labelnames = name, help, tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values → [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][slot] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, **labels: Any) -> int:
+        series = self._series.get(tuple(str(labels[n]) for n in self.labelnames))
+        return series[2] if series else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:  # snapshot; `observe` mutates series in place
+            series = [(key, (list(counts), total, n)) for key, (counts, total, n) in self._series.items()]
+        for key, (counts, total, n) in sorted(series):
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), counts):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _label_str(self.labelnames, key, 'le="' + le + '"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{_label_str(self.labelnames, key)} {total:g}"
+            yield f"{self.name}_count{_label_str(self.labelnames, key)} {n}"
+
+
+class Gauge:
+    """Value read from `read()` at scrape time (e.g. pool occupancy)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, read: Callable[[], float]) -> None:
+        self.name, self.help, self._read = name, help, read
+
+    def samples(self) -> Iterator[str]:
+        yield f"{self.name} {float(self._read()):g}"
+
+
+_REGISTRY: Dict[str, Any] = {}
+
+
+def _register(metric):
+    return _REGISTRY.setdefault(metric.name, metric)
+
+
+def gauge(name: str, help: str, read: Callable[[], float]) -> Gauge:
+    """Register (or replace) gauge `name`."""
+    metric = _REGISTRY[name] = Gauge(name, help, read)
+    return metric
+
+
+NODE_SECONDS = _register(Histogram("chat_node_seconds", "Agent-router graph node latency.", ("node",)))
+ROUTES_TOTAL = _register(Counter("chat_route_total", "Routing decisions by tool.", ("tool",)))
+EMBED_SECONDS = _register(Histogram("embedding_seconds", "EmbeddingModel call latency.", ("op",)))
+CHROMA_SECONDS = _register(Histogram("chroma_seconds", "Chroma collection call latency.", ("op",)))
+DB_QUERY_SECONDS = _register(Histogram("db_query_seconds", "SQL statement latency.", ("op",)))
+DB_SESSION_SECONDS = _register(Histogram("db_session_seconds", "Database session lifetime."))
+DB_POOL_WAIT_SECONDS = _register(Histogram("db_pool_wait_seconds", "Connection pool checkout wait."))
+STAGE_SECONDS = _register(Histogram("stage_seconds", "Latency of other request stages.", ("stage",)))
+HTTP_SECONDS = _register(
+    Histogram("http_request_seconds", "HTTP request latency.", ("method", "endpoint", "status"))
+)
+HTTP_TOTAL = _register(Counter("http_requests_total", "HTTP requests served.", ("method", "endpoint", "status")))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format (0.0.4)."""
+    lines: List[str] = []
+    for metric in _REGISTRY.values():
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+# --------------------------------------------------------------------------- #
+# Request traces
+# --------------------------------------------------------------------------- #
+class Trace:
+    """Request id plus `(span, seconds)` pairs observed while it was active."""
+
+    __slots__ = ("request_id", "spans", "started")
+
+    def __init__(self, request_id: Optional[str] = None) -> None:
+        self.request_id = request_id or uuid.uuid4().hex
+        self.spans: List[Tuple[str, float]] = []
+        self.started = time.perf_counter()
+
+    def server_timing(self) -> str:
+        """`Server-Timing` header value (durations in ms)."""
+        return ", ".join(f"{name.replace(':', '-')};dur={sec * 1000:.2f}" for name, sec in self.spans)
+
+
+_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+
+
+def start_trace(request_id: Optional[str] = None) -> Tuple[Trace, contextvars.Token]:
+    trace = Trace(request_id)
+    return trace, _trace.set(trace)
+
+
+def end_trace(token: contextvars.Token) -> None:
+    try:
+        _trace.reset(token)
+    except ValueError:  # ended from another context (e.g. a streamed body)
+        _trace.set(None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+# --------------------------------------------------------------------------- #
+# Recording helpers
+# --------------------------------------------------------------------------- #
+def record(metric: Histogram, span: str, seconds: float, **labels: Any) -> None:
+    """Observe `seconds` and add the span to the current trace (if enabled)."""
+    if not settings.METRICS_ENABLED:
+        return
+    metric.observe(seconds, **labels)
+    trace = _trace.get()
+    if trace is not None:
+        trace.spans.append((span, seconds))
+
+
+@contextmanager
+def timer(metric: Histogram, span: str, **labels: Any) -> Iterator[None]:
+    if not settings.METRICS_ENABLED:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(metric, span, time.perf_counter() - t0, **labels)
+
+
+def timed(metric: Histogram, span: str, **labels: Any) -> Callable[[Callable], Callable]:
+    """Decorator form of `timer`; works on plain and coroutine functions."""
+
+    def decorate(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not settings.METRICS_ENABLED:
+                    return await fn(*args, **kwargs)
+                t0 = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    record(metric, span, time.perf_counter() - t0, **labels)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not settings.METRICS_ENABLED:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                record(metric, span, time.perf_counter() - t0, **labels)
+
+        return wrapper
+
+    return decorate
+
+
+class _InstrumentedCollection:
+    """Times `query` / `get` of a (sync or async) collection; delegates the rest."""
+
+    def __init__(self, collection: Any) -> None:
+        self._collection = collection
+        self.query = timed(CHROMA_SECONDS, "chroma:query", op="query")(collection.query)
+        self.get = timed(CHROMA_SECONDS, "chroma:get", op="get")(collection.get)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._collection, name)
+
+
+def instrument_collection(collection: Any) -> Any:
+    """`collection` with timed reads, or unchanged when metrics are off."""
+    if not settings.METRICS_ENABLED:
+        return collection
+    return _InstrumentedCollection(collection)
@@ -0,0 +1,478 @@
+"""
+Quantized, memory-mapped vector store for large, read-mostly collections.
+
+`QuantizedCollection` implements the part of the Chroma collection API the
+product index uses (`upsert`, `delete`, `get`, `query`, `count`) on top of
+a directory of flat files:
+
+  codes.i8       int8 vector codes, one row per entry (see `quantize`)
+  scales.f32     per-row scale: vector ≈ scale * code
+  vectors.f32    full-precision vectors, only read to re-rank candidates
+  sq_norms.f32   squared norms of the full vectors
+  hashes.u64     64-bit hash of each id (lookups by id)
+  live.u8        cleared once an entry is deleted or replaced
+  spans.i64      (offset, length) of each entry's record
+  records.jsonl  id, document and metadata of each entry
+  manifest.json  dimension, metric and number of published rows
+
+Readers open every file with `np.memmap(mode="r")`, so all worker
+processes of a host share one copy of the vectors through the page cache
+instead of each holding them in its own heap.  A query scans the int8
+codes block by block (one float32 matrix product per block), keeps the
+best `QUANTIZED_RERANK` × `n_results` rows and re-ranks them with exact
+distances from `vectors.f32`.  `where` clauses are checked on those
+candidates; the candidate set widens until enough of them match.
+
+Writes are append-only: `upsert` appends rows, publishes the new row count
+by atomically replacing the manifest, then clears the `live` flag of the
+rows it replaced.  Readers re-map when the manifest changes.  One writer
+per collection (the indexer) is assumed; replaced rows stay on disk until
+the collection is rebuilt (`indexer.rebuild_product_index`).
+
+Distances follow Chroma: squared L2 for "l2", 1 - cosine for "cosine".
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+__all__ = ["QuantizedCollection", "quantize", "matches_where"]
+
+_VERSION = 1
+_METRICS = ("l2", "cosine")
+_BLOCK = 4096  # rows per coarse-scan matrix product
+_GROUP_CELLS = 1 << 24  # cap on the (queries × rows) coarse distance matrix
+_EPS = np.float32(1e-12)
+_DEFAULT_INCLUDE = ("metadatas", "documents", "distances")
+
+# column → (file name, dtype, values per row; 0 = the vector dimension)
+_COLUMNS: Dict[str, Tuple[str, Any, int]] = {
+    "codes": ("codes.i8", np.int8, 0),
+    "scales": ("scales.f32", np.float32, 1),
+    "vectors": ("vectors.f32", np.float32, 0),
+    "sq_norms": ("sq_norms.f32", np.float32, 1),
+    "hashes": ("hashes.u64", np.uint64, 1),
+    "live": ("live.u8", np.uint8, 1),
+    "spans": ("spans.i64", np.int64, 2),
+}
+_RECORDS = "records.jsonl"
+_MANIFEST = "manifest.json"
+
+
+def quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 codes and scales: `vectors ≈ scales[:, None] * codes`."""
+    peak = np.abs(vectors).max(axis=1) if vectors.size else np.zeros(len(vectors), np.float32)
+    scales = np.maximum(peak / np.float32(127.0), _EPS).astype(np.float32)
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)  # |v / s| ≤ 127
+    return codes, scales
+
+
+def _hash_ids(ids: Sequence[str]) -> np.ndarray:
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(i.encode(), digest_size=8).digest(), "little") for i in ids),
+        dtype=np.uint64,
+        count=len(ids),
+    )
+
+
+# --------------------------------------------------------------------------- #
+# `where` clauses
+# --------------------------------------------------------------------------- #
+_OPS: Dict[str, Callable[[Any, Any], bool]] = {
+    "$eq": lambda a, b: a == b,
+    "$ne": lambda a, b: a != b,
+    "$gt": lambda a, b: a > b,
+    "$gte": lambda a, b: a >= b,
+    "$lt": lambda a, b: a < b,
+    "$lte": lambda a, b: a <= b,
+    "$in": lambda a, b: a in b,
+    "$nin": lambda a, b: a not in b,
+}
+
+
+def matches_where(metadata: Mapping[str, Any] | None, where: Mapping[str, Any] | None) -> bool:
+    """Whether `metadata` satisfies Chroma `where` clause `where` (missing keys never match)."""
+    if not where:
+        return True
+    metadata = metadata or {}
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, c) for c in cond):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, c) for c in cond):
+                return False
+        else:
+            value = metadata.get(key)
+            if value is None:
+                return False
+            for op, operand in (cond if isinstance(cond, Mapping) else {"$eq": cond}).items():
+                if op not in _OPS:
+                    raise ValueError(f"Unsupported where operator {op!r}")
+                try:
+                    if not _OPS[op](value, operand):
+                        return False
+                except TypeError:  # e.g. str compared with a number
+                    return False
+    return True
+
+
+# --------------------------------------------------------------------------- #
+# Read side
+# --------------------------------------------------------------------------- #
+class _View:
+    """Read-only maps of the first `count` published rows."""
+
+    def __init__(self, path: Path, manifest: Dict[str, Any]) -> None:
+        self.count = int(manifest["count"])
+        self.dim = int(manifest["dim"])
+        self.metric = manifest["metric"]
+        for column, (file, dtype, width) in _COLUMNS.items():
+            shape = (self.count, width or self.dim) if width != 1 else (self.count,)
+            setattr(self, column, np.memmap(path / file, dtype=dtype, mode="r", shape=shape))
+        end = int(self.spans[-1].sum())
+        self.records = np.memmap(path / _RECORDS, dtype=np.uint8, mode="r", shape=(end,))
+
+    def record(self, row: int) -> Dict[str, Any]:
+        offset, length = self.spans[row]
+        return json.loads(self.records[offset : offset + length].tobytes())
+
+    def rows_for(self, ids: Sequence[str]) -> Dict[str, int]:
+        """Live row of each id in `ids` that is stored."""
+        wanted = set(ids)
+        hits = np.flatnonzero(np.isin(self.hashes, _hash_ids(ids)) & (self.live != 0))
+        found: Dict[str, int] = {}
+        for row in hits.tolist():
+            rid = self.record(row)["id"]
+            if rid in wanted:  # guards against hash collisions
+                found[rid] = row
+        return found
+
+    def coarse(self, queries: np.ndarray) -> np.ndarray:
+        """Approximate distance of every query to every row (inf for dead rows)."""
+        qt = np.ascontiguousarray(queries.T)
+        dots = np.empty((len(queries), self.count), dtype=np.float32)
+        for start in range(0, self.count, _BLOCK):
+            stop = min(start + _BLOCK, self.count)
+            block = self.codes[start:stop].astype(np.float32) @ qt
+            block *= self.scales[start:stop, None]
+            dots[:, start:stop] = block.T
+        dist = self._distances(dots, self.sq_norms[None, :], queries)
+        dist[:, self.live == 0] = np.inf
+        return dist
+
+    def exact(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Distance of `query` to the full-precision vectors of `rows`."""
+        dots = (self.vectors[rows] @ query)[None, :]
+        return self._distances(dots, self.sq_norms[rows][None, :], query[None, :])[0]
+
+    def _distances(self, dots: np.ndarray, sq_norms: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        if self.metric == "cosine":  # rows and queries are unit length
+            return np.subtract(1.0, dots, out=dots)
+        q_sq = np.einsum("ij,ij->i", queries, queries)[:, None]
+        dots *= -2.0
+        dots += sq_norms
+        dots += q_sq
+        return np.maximum(dots, 0.0, out=dots)
+
+
+def _smallest(dist: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the `k` smallest values of `dist`, in ascending order."""
+    if k < len(dist):
+        top = np.argpartition(dist, k - 1)[:k]
+    else:
+        top = np.arange(len(dist))
+    return top[np.argsort(dist[top], kind="stable")]
+
+
+# --------------------------------------------------------------------------- #
+# Collection
+# --------------------------------------------------------------------------- #
+class QuantizedCollection:
+    """Chroma-shaped collection stored as int8 codes in memory-mapped files."""
+
+    def __init__(self, path: Path, name: str | None = None, metric: str = "l2") -> None:
+        if metric not in _METRICS:
+            raise ValueError(f"Unknown metric {metric!r}; expected one of {_METRICS}")
+        self.path = Path(path)
+        self.name = name or self.path.name
+        self.metadata: Optional[Dict[str, Any]] = None
+        self._embedding_function = None  # callers may pass their own vectors
+        self._metric = metric
+        self._lock = threading.Lock()
+        self._view_key: Any = None
+        self._view_cache: Optional[_View] = None
+        self._rows: Optional[Dict[int, int]] = None  # writer: id hash → live row
+
+    # ---- manifest ---------------------------------------------------------- #
+    def _manifest(self) -> Dict[str, Any]:
+        try:
+            return json.loads((self.path / _MANIFEST).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {"version": _VERSION, "dim": None, "metric": self._metric, "count": 0}
+
+    def _publish(self, manifest: Dict[str, Any]) -> None:
+        tmp = self.path / (_MANIFEST + ".tmp")
+        tmp.write_text(json.dumps(manifest), encoding="utf-8")
+        os.replace(tmp, self.path / _MANIFEST)
+
+    def _view(self) -> Optional[_View]:
+        """Maps of the published rows, re-opened when the manifest changed."""
+        try:
+            st = os.stat(self.path / _MANIFEST)
+        except FileNotFoundError:
+            self._view_key, self._view_cache = None, None
+            return None
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if key != self._view_key:
+            manifest = self._manifest()
+            self._view_cache = _View(self.path, manifest) if manifest["count"] else None
+            self._view_key = key
+        return self._view_cache
+
+    # ---- embedding --------------------------------------------------------- #
+    def _prepare(self, vectors: Any, metric: str) -> np.ndarray:
+        matrix = np.array(vectors, dtype=np.float32, ndmin=2)
+        if metric == "cosine":
+            matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), _EPS)
+        return matrix
+
+    def _embed(self, texts: Sequence[str]) -> np.ndarray:
+        from app.core.embeddings import get_default_provider
+
+        provider = get_default_provider()
+        if hasattr(provider, "encode"):
+            return provider.encode(list(texts))
+        return np.asarray(provider.embed(list(texts)), dtype=np.float32)
+
+    # ---- writes ------------------------------------------------------------ #
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Any = None,
+        metadatas: Sequence[Mapping[str, Any] | None] | None = None,
+        documents: Sequence[str | None] | None = None,
+    ) -> None:
+        ids = list(ids)
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate ids in upsert")
+        if embeddings is None:
+            if documents is None:
+                raise ValueError("upsert needs embeddings or documents")
+            embeddings = self._embed(documents)
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            manifest = self._manifest()
+            vectors = self._prepare(embeddings, manifest["metric"])
+            if len(vectors) != len(ids):
+                raise ValueError(f"Got {len(vectors)} embeddings for {len(ids)} ids")
+            if manifest["dim"] is None:
+                manifest["dim"] = int(vectors.shape[1])
+            elif vectors.shape[1] != manifest["dim"]:
+                raise ValueError(
+                    f"Embedding dimension {vectors.shape[1]} does not match collection dimensionality {manifest['dim']}"
+                )
+            count = int(manifest["count"])
+            rows = self._row_index(manifest)
+            hashes = _hash_ids(ids)
+            replaced = [rows[h] for h in hashes.tolist() if h in rows]
+
+            records_end = self._truncate(count, int(manifest["dim"]))
+            spans = np.empty((len(ids), 2), dtype=np.int64)
+            with open(self.path / _RECORDS, "ab") as fh:
+                for i, rid in enumerate(ids):
+                    blob = json.dumps(
+                        {
+                            "id": rid,
+                            "document": documents[i] if documents is not None else None,
+                            "metadata": metadatas[i] if metadatas is not None else None,
+                        },
+                        separators=(",", ":"),
+                    ).encode()
+                    fh.write(blob)
+                    spans[i] = (records_end, len(blob))
+                    records_end += len(blob)
+            codes, scales = quantize(vectors)
+            self._append(
+                codes=codes,
+                scales=scales,
+                vectors=vectors,
+                sq_norms=np.einsum("ij,ij->i", vectors, vectors),
+                hashes=hashes,
+                live=np.ones(len(ids), dtype=np.uint8),
+                spans=spans,
+            )
+            manifest["count"] = count + len(ids)
+            self._publish(manifest)
+            self._tombstone(replaced)
+            rows.update(zip(hashes.tolist(), range(count, count + len(ids))))
+
+    def delete(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            manifest = self._manifest()
+            if not manifest["count"]:
+                return
+            rows = self._row_index(manifest)
+            self._tombstone([rows.pop(h) for h in _hash_ids(list(ids)).tolist() if h in rows])
+
+    def _row_index(self, manifest: Dict[str, Any]) -> Dict[int, int]:
+        # 64-bit hashes stand in for the ids here: collisions are negligible
+        # at catalogue sizes, and readers still compare the stored ids.
+        if self._rows is None:
+            view = _View(self.path, manifest) if manifest["count"] else None
+            if view is None:
+                self._rows = {}
+            else:
+                live = np.flatnonzero(view.live)
+                self._rows = dict(zip(view.hashes[live].tolist(), live.tolist()))
+        return self._rows
+
+    def _truncate(self, count: int, dim: int) -> int:
+        """Drop bytes past the published rows (an interrupted write); returns the records size."""
+        end = 0
+        for column, (file, dtype, width) in _COLUMNS.items():
+            path = self.path / file
+            size = count * (width or dim) * np.dtype(dtype).itemsize
+            if path.exists() and path.stat().st_size > size:
+                os.truncate(path, size)
+            if column == "spans" and count:
+                last = np.memmap(path, dtype=np.int64, mode="r", shape=(count, 2))[-1]
+                end = int(last.sum())
+        records = self.path / _RECORDS
+        if records.exists() and records.stat().st_size > end:
+            os.truncate(records, end)
+        return end
+
+    def _append(self, **columns: np.ndarray) -> None:
+        for column, values in columns.items():
+            file, dtype, _ = _COLUMNS[column]
+            with open(self.path / file, "ab") as fh:
+                fh.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+
+    def _tombstone(self, rows: List[int]) -> None:
+        if not rows:
+            return
+        with open(self.path / _COLUMNS["live"][0], "r+b") as fh:
+            for row in sorted(rows):
+                fh.seek(row)
+                fh.write(b"\0")
+
+    # ---- reads ------------------------------------------------------------- #
+    def count(self) -> int:
+        view = self._view()
+        return int(np.count_nonzero(view.live)) if view is not None else 0
+
+    def get(
+        self,
+        ids: Sequence[str] | None = None,
+        where: Mapping[str, Any] | None = None,
+        limit: int | None = None,
+        include: Sequence[str] = ("metadatas", "documents"),
+    ) -> Dict[str, Any]:
+        view = self._view()
+        if view is None:
+            rows: List[int] = []
+        elif ids is not None:
+            found = view.rows_for(list(ids))
+            rows = [found[i] for i in ids if i in found]
+        else:
+            rows = np.flatnonzero(view.live).tolist()
+        records = [view.record(r) for r in rows] if rows else []
+        if where:
+            keep = [i for i, rec in enumerate(records) if matches_where(rec["metadata"], where)]
+            rows, records = [rows[i] for i in keep], [records[i] for i in keep]
+        if limit is not None:
+            rows, records = rows[:limit], records[:limit]
+        out: Dict[str, Any] = {"ids": [rec["id"] for rec in records]}
+        if "metadatas" in include:
+            out["metadatas"] = [rec["metadata"] for rec in records]
+        if "documents" in include:
+            out["documents"] = [rec["document"] for rec in records]
+        if "embeddings" in include:
+            out["embeddings"] = np.asarray(view.vectors[rows]) if rows else np.empty((0, 0), np.float32)
+        return out
+
+    def query(
+        self,
+        query_embeddings: Any = None,
+        query_texts: Sequence[str] | None = None,
+        n_results: int = 10,
+        where: Mapping[str, Any] | None = None,
+        include: Sequence[str] = _DEFAULT_INCLUDE,
+    ) -> Dict[str, Any]:
+        if query_embeddings is None:
+            if query_texts is None:
+                raise ValueError("query needs query_embeddings or query_texts")
+            query_embeddings = self._embed(query_texts)
+        view = self._view()
+        out: Dict[str, List[Any]] = {"ids": []}
+        for key in include:
+            out[key] = []
+        if view is None:
+            for key in out:
+                out[key] = [[] for _ in range(len(query_embeddings))]
+            return out
+
+        queries = self._prepare(query_embeddings, view.metric)
+        if queries.shape[1] != view.dim:
+            raise ValueError(
+                f"Embedding dimension {queries.shape[1]} does not match collection dimensionality {view.dim}"
+            )
+        want = max(n_results * max(settings.QUANTIZED_RERANK, 1), n_results)
+        group = max(1, _GROUP_CELLS // view.count)
+        for start in range(0, len(queries), group):
+            coarse = view.coarse(queries[start : start + group])
+            for query, dist in zip(queries[start : start + group], coarse):
+                rows, records = self._candidates(view, dist, want, where)
+                order = np.argsort(rows, kind="stable")  # ascending rows read the maps in order
+                rows = rows[order]
+                exact = view.exact(rows, query)
+                best = np.argsort(exact, kind="stable")[:n_results]
+                hits = rows[best].tolist()
+                if records is None:
+                    records = [view.record(r) for r in hits]
+                else:
+                    records = [records[i] for i in order[best].tolist()]
+                out["ids"].append([rec["id"] for rec in records])
+                if "distances" in out:
+                    out["distances"].append(exact[best].tolist())
+                if "metadatas" in out:
+                    out["metadatas"].append([rec["metadata"] for rec in records])
+                if "documents" in out:
+                    out["documents"].append([rec["document"] for rec in records])
+                if "embeddings" in out:
+                    out["embeddings"].append(np.asarray(view.vectors[hits]))
+        return out
+
+    def _candidates(self, view: _View, dist: np.ndarray, want: int, where: Mapping[str, Any] | None):
+        """Rows to re-rank exactly (and their records when `where` had to read them)."""
+        live = int(np.count_nonzero(np.isfinite(dist)))
+        if not where:
+            return _smallest(dist, min(want, live)), None
+        # Widen until `want` rows match; a very selective filter ends up
+        # reading every live record, like an unindexed scan would.
+        rows: List[int] = []
+        records: List[Dict[str, Any]] = []
+        seen: set = set()
+        limit = want
+        while True:
+            top = _smallest(dist, min(limit, live))
+            for row in top.tolist():
+                if row in seen:
+                    continue
+                seen.add(row)
+                rec = view.record(row)
+                if matches_where(rec["metadata"], where):
+                    rows.append(row)
+                    records.append(rec)
+            if len(rows) >= want or len(top) >= live:
+                return np.asarray(rows[:want], dtype=np.intp), records[:want]
+            limit *= 4
@@ -0,0 +1,255 @@
+"""
+Two-tier response cache for query → answer-dict functions.
+
+Tier 1 – exact: key is the normalised query text (case, punctuation and
+         whitespace folded).
+Tier 2 – semantic: on a tier-1 miss the query is embedded and compared
+         (cosine) against every cached query in one mat-vec product; the
+         best match is served if its similarity ≥ `similarity`.
+
+Entries expire after `ttl` seconds and are evicted LRU-first once either
+`max_entries` or the `max_bytes` budget is exceeded.  The whole cache is
+dropped when any of the vector collections it `depends_on` changes
+generation (i.e. the product index or support KB was re-ingested).
+The semantic matrix is pre-allocated (`max_entries` × dim float32); the
+byte budget covers cached payloads and their query vectors.
+"""
+from __future__ import annotations
+
+import copy
+import functools
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.core.vector_store import collection_generation
+
+_PUNCT_RE = re.compile(r"[^\w\s$]")
+
+Embedder = Callable[[str], Sequence[float]]
+
+
+def normalize_query(query: str) -> str:
+    """Fold case, drop punctuation and collapse whitespace."""
+    return " ".join(_PUNCT_RE.sub(" ", query.lower()).split())
+
+
+class _Entry:
+    __slots__ = ("value", "nbytes", "expires_at", "slot")
+
+    def __init__(self, value: Dict[str, Any], nbytes: int, expires_at: float, slot: int) -> None:
+        self.value = value
+        self.nbytes = nbytes
+        self.expires_at = expires_at
+        self.slot = slot  # row in the semantic matrix, -1 if not embedded
+
+
+class ResponseCache:
+    """Exact + embedding-similarity cache with TTL, LRU and a byte budget."""
+
+    def __init__(
+        self,
+        name: str,
+        depends_on: Sequence[str] = (),
+        embed: Optional[Embedder] = None,
+        ttl: float = 300.0,
+        max_entries: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+        similarity: float = 0.95,
+        enabled: bool = True,
+    ) -> None:
+        self.name = name
+        self.enabled = enabled
+        self._depends_on = tuple(depends_on)
+        self._embed = embed if similarity <= 1.0 else None
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._similarity = similarity
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes = 0
+        self._generations: Optional[Tuple[int, ...]] = None
+        # semantic tier: one unit-norm row per cached query
+        self._vectors: Optional[np.ndarray] = None
+        self._slot_keys: List[Optional[str]] = [None] * max_entries
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+        # last (query, vector) embedded by `get` on this thread – lets the
+        # `put` that follows a miss skip a second embedding call
+        self._last_embedded = threading.local()
+
+        self._counts = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @classmethod
+    def from_settings(
+        cls, name: str, depends_on: Sequence[str] = (), embed: Optional[Embedder] = None
+    ) -> "ResponseCache":
+        """Build a cache configured by the `RESPONSE_CACHE_*` settings."""
+        return cls(
+            name,
+            depends_on=depends_on,
+            embed=embed,
+            ttl=settings.RESPONSE_CACHE_TTL,
+            max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+            max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+            similarity=settings.RESPONSE_CACHE_SIMILARITY,
+            enabled=settings.RESPONSE_CACHE_ENABLED,
+        )
+
+    # ------------------------------------------------------------------#
+    # Public API
+    # ------------------------------------------------------------------#
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached answer for `query`, or `None`."""
+        if not self.enabled:
+            return None
+        key = normalize_query(query)
+        self._check_generations()
+        with self._lock:
+            hit = self._lookup(key)
+            if hit is not None:
+                self._counts["exact_hits"] += 1
+                return copy.deepcopy(hit.value)
+            if self._embed is None or len(self._entries) == 0:
+                self._counts["misses"] += 1
+                return None
+
+        q = self._query_vector(query)
+        with self._lock:
+            hit = self._semantic_lookup(q)
+            if hit is not None:
+                self._counts["semantic_hits"] += 1
+                return copy.deepcopy(hit.value)
+            self._counts["misses"] += 1
+            return None
+
+    def put(self, query: str, value: Dict[str, Any]) -> None:
+        """Store `value` (a JSON-serialisable dict) for `query`."""
+        if not self.enabled:
+            return
+        key = normalize_query(query)
+        self._check_generations()
+        vec = self._query_vector(query) if self._embed is not None else None
+        nbytes = len(json.dumps(value, default=str)) + (vec.nbytes if vec is not None else 0)
+        if nbytes > self._max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            slot = -1
+            if vec is not None:
+                slot = self._free_slots.pop() if self._free_slots else self._evict_one_slot()
+                if self._vectors is None:
+                    self._vectors = np.zeros((self._max_entries, vec.shape[0]), dtype=np.float32)
+                self._vectors[slot] = vec
+                self._slot_keys[slot] = key
+            self._entries[key] = _Entry(copy.deepcopy(value), nbytes, time.monotonic() + self._ttl, slot)
+            self._bytes += nbytes
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._counts["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def memoize(self, fn: Callable[[str], Dict[str, Any]]) -> Callable[[str], Dict[str, Any]]:
+        """Decorate a `fn(query) -> dict` so it is served from this cache."""
+
+        @functools.wraps(fn)
+        def wrapper(query: str) -> Dict[str, Any]:
+            cached = self.get(query)
+            if cached is not None:
+                return cached
+            result = fn(query)
+            self.put(query, result)
+            return result
+
+        wrapper.cache = self  # type: ignore[attr-defined]
+        return wrapper
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self._counts["exact_hits"] + self._counts["semantic_hits"]
+        lookups = hits + self._counts["misses"]
+        return {
+            "name": self.name,
+            **self._counts,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+        }
+
+    # ------------------------------------------------------------------#
+    # Internals (callers hold `_lock` unless noted)
+    # ------------------------------------------------------------------#
+    def _check_generations(self) -> None:
+        """Drop everything if a dependency was re-ingested (takes the lock)."""
+        if not self._depends_on:
+            return
+        current = tuple(collection_generation(n) for n in self._depends_on)
+        if current != self._generations:
+            if self._generations is not None:
+                self.clear()
+                self._counts["invalidations"] += 1
+            self._generations = current
+
+    def _lookup(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _semantic_lookup(self, q: np.ndarray) -> Optional[_Entry]:
+        if self._vectors is None:
+            return None
+        sims = self._vectors @ q
+        best = int(np.argmax(sims))
+        key = self._slot_keys[best]
+        if key is None or sims[best] < self._similarity:
+            return None
+        return self._lookup(key)
+
+    def _query_vector(self, query: str) -> np.ndarray:
+        """Unit-norm embedding of `query`, reusing this thread's last one."""
+        last = getattr(self._last_embedded, "pair", None)
+        if last is not None and last[0] == query:
+            return last[1]
+        vec = self._unit(self._embed(query))  # type: ignore[misc]
+        self._last_embedded.pair = (query, vec)
+        return vec
+
+    def _evict_one_slot(self) -> int:
+        """Evict the LRU entry that owns a semantic slot; return that slot."""
+        for key, entry in self._entries.items():
+            if entry.slot >= 0:
+                self._remove(key)
+                self._counts["evictions"] += 1
+                return self._free_slots.pop()
+        raise RuntimeError("no semantic slot available")  # pragma: no cover
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.nbytes
+        if entry.slot >= 0:
+            self._vectors[entry.slot] = 0.0  # type: ignore[index]
+            self._slot_keys[entry.slot] = None
+            self._free_slots.append(entry.slot)
+
+    @staticmethod
+    def _unit(vec: Sequence[float]) -> np.ndarray:
+        v = np.asarray(vec, dtype=np.float32)
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm else v
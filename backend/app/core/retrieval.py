@@ -0,0 +1,112 @@
+"""
+In-process dense retrieval over a fixed set of embeddings.
+
+`VectorIndex` keeps every vector in one contiguous float32 matrix together
+with pre-computed squared L2 norms, scores all rows with a single
+matrix-vector product and selects the top-k with `np.argpartition`
+(O(n) selection, only the k winners are sorted).  `search_many` scores a
+batch of queries with one matrix-matrix product.
+
+Supported metrics (both reported as *distances* – lower is better):
+  • "l2"     – Euclidean distance
+  • "cosine" – 1 - cosine similarity
+"""
+from __future__ import annotations
+
+from typing import Sequence, Tuple
+
+import numpy as np
+
+METRICS = ("l2", "cosine")
+
+_EPS = np.float32(1e-12)
+
+
+class VectorIndex:
+    """Brute-force, fully vectorised nearest-neighbour index."""
+
+    def __init__(self, embeddings: Sequence[Sequence[float]] | np.ndarray, metric: str = "l2"):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric {metric!r}; expected one of {METRICS}")
+        self.metric = metric
+
+        matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if matrix.ndim == 1:  # empty input or a single vector
+            matrix = matrix.reshape(0, 0) if matrix.size == 0 else matrix.reshape(1, -1)
+        self._matrix = matrix
+        self._sq_norms = np.einsum("ij,ij->i", matrix, matrix)
+        if metric == "cosine":
+            # Normalise once so a query costs a single mat-vec product.
+            norms = np.sqrt(self._sq_norms)
+            self._matrix = matrix / np.maximum(norms, _EPS)[:, None]
+
+    # ------------------------------------------------------------------#
+    # Introspection
+    # ------------------------------------------------------------------#
+    def __len__(self) -> int:
+        return self._matrix.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self._matrix.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the vector matrix and its norms."""
+        return self._matrix.nbytes + self._sq_norms.nbytes
+
+    # ------------------------------------------------------------------#
+    # Query
+    # ------------------------------------------------------------------#
+    def distances(self, query: Sequence[float] | np.ndarray) -> np.ndarray:
+        """Return the distance from `query` to every indexed vector."""
+        q = np.asarray(query, dtype=np.float32)
+        dots = self._matrix @ q
+        if self.metric == "cosine":
+            q_norm = max(float(np.sqrt(q @ q)), float(_EPS))
+            return 1.0 - dots / q_norm
+        # ‖q - x‖² = ‖q‖² + ‖x‖² - 2·q·x  (clamped against rounding noise)
+        sq = np.maximum(self._sq_norms + (q @ q) - 2.0 * dots, 0.0)
+        return np.sqrt(sq, out=sq)
+
+    def search(self, query: Sequence[float] | np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return `(indices, distances)` of the `k` nearest rows, nearest first.
+        """
+        n = len(self)
+        k = min(k, n)
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float32)
+
+        dist = self.distances(query)
+        if k < n:
+            top = np.argpartition(dist, k - 1)[:k]
+        else:
+            top = np.arange(n)
+        top = top[np.argsort(dist[top], kind="stable")]
+        return top, dist[top]
+
+    def search_many(self, queries: Sequence[Sequence[float]] | np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Row-wise `search` for a batch of queries: `(indices, distances)`,
+        both shaped `(len(queries), k)`.
+        """
+        q = np.asarray(queries, dtype=np.float32).reshape(len(queries), -1)
+        n = len(self)
+        k = min(k, n)
+        if k <= 0 or not len(q):
+            return np.empty((len(q), 0), dtype=np.intp), np.empty((len(q), 0), dtype=np.float32)
+
+        dots = q @ self._matrix.T
+        if self.metric == "cosine":
+            q_norms = np.maximum(np.sqrt(np.einsum("ij,ij->i", q, q)), _EPS)
+            dist = 1.0 - dots / q_norms[:, None]
+        else:
+            sq = self._sq_norms[None, :] + np.einsum("ij,ij->i", q, q)[:, None] - 2.0 * dots
+            dist = np.sqrt(np.maximum(sq, 0.0, out=sq), out=sq)
+        if k < n:
+            top = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(n), (len(q), n))
+        top = np.take_along_axis(top, np.argsort(np.take_along_axis(dist, top, 1), axis=1, kind="stable"), 1)
+        return top, np.take_along_axis(dist, top, 1)
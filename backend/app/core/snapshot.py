@@ -0,0 +1,192 @@
+"""
+Process-level, versioned snapshots of a Chroma collection.
+
+A `SnapshotCache` loads the whole collection once (ids, documents,
+metadatas, a float32 `VectorIndex` and, optionally, the collection's BM25
+index) and keeps serving that immutable
+`Snapshot` until the collection's generation (see
+`vector_store.bump_generation`) moves on.
+
+With `ann=True`, collections of at least `SUPPORT_ANN_MIN_DOCS` vectors
+are searched through the persisted IVF index (`core.ann_index`) instead,
+scanning `SUPPORT_ANN_NPROBE` cells per query; the exact `VectorIndex`
+is then only built if something asks for `Snapshot.index`.
+
+Readers never take a lock: they read the current snapshot reference, and
+a reload swaps in a fresh object with a single attribute assignment.  Only
+one thread reloads at a time; concurrent readers keep getting the previous
+snapshot meanwhile instead of queueing behind the reload.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.core.ann_index import IVFIndex, ann_path
+from app.core.lexical_index import BM25Index, index_path
+from app.core.retrieval import VectorIndex
+from app.core.vector_store import collection_generation, get_collection
+
+
+class Snapshot:
+    """Immutable view of a collection at a given generation."""
+
+    __slots__ = ("generation", "ids", "documents", "metadatas", "_index", "lexical", "ann", "positions", "loaded_at")
+
+    def __init__(
+        self,
+        generation: int,
+        ids: Tuple[str, ...],
+        documents: Tuple[str, ...],
+        metadatas: Tuple[Dict[str, Any], ...],
+        index: Optional[VectorIndex],
+        lexical: Optional[BM25Index] = None,
+        ann: Optional[IVFIndex] = None,
+    ) -> None:
+        self.generation = generation
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self._index = index
+        self.lexical = lexical
+        self.ann = ann
+        self.positions = {doc_id: i for i, doc_id in enumerate(ids)}
+        self.loaded_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def index(self) -> VectorIndex:
+        """Exact index over all vectors (built on first use when `ann` serves searches)."""
+        if self._index is None:
+            self._index = VectorIndex(self.ann.vectors(self.ids), metric=self.ann.metric)
+        return self._index
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate payload size: vectors plus document text."""
+        vectors = self._index.nbytes if self._index is not None else 0
+        if self.ann is not None:
+            vectors += self.ann.nbytes
+        return vectors + sum(len(d) for d in self.documents)
+
+    def search(self, query: Sequence[float] | np.ndarray, k: int) -> np.ndarray:
+        """Positions of the `k` nearest documents, nearest first."""
+        if self.ann is None:
+            return self.index.search(query, k)[0]
+        ids, _ = self.ann.search(query, k, nprobe=settings.SUPPORT_ANN_NPROBE)
+        return np.array([self.positions[i] for i in ids], dtype=np.intp)
+
+    def search_many(self, queries: Sequence[Sequence[float]] | np.ndarray, k: int) -> List[np.ndarray]:
+        """`search` for a batch of queries (one matrix product without `ann`)."""
+        if self.ann is None:
+            return list(self.index.search_many(queries, k)[0])
+        return [self.search(q, k) for q in queries]
+
+
+class SnapshotCache:
+    """Loads a collection once per generation and hands out the snapshot."""
+
+    def __init__(self, collection_name: str, metric: str = "l2", lexical: bool = False, ann: bool = False) -> None:
+        self._name = collection_name
+        self._metric = metric
+        self._lexical = lexical
+        self._ann = ann
+        self._snapshot: Optional[Snapshot] = None
+        self._reload_lock = threading.Lock()
+        # best-effort counters (unlocked increments, good enough for stats)
+        self._hits = 0
+        self._stale_hits = 0
+        self._reloads = 0
+
+    # ------------------------------------------------------------------#
+    # Public API
+    # ------------------------------------------------------------------#
+    def get(self) -> Snapshot:
+        """Return the snapshot for the collection's current generation."""
+        generation = collection_generation(self._name)
+        snap = self._snapshot
+        if snap is not None and snap.generation == generation:
+            self._hits += 1
+            return snap
+
+        if snap is not None and not self._reload_lock.acquire(blocking=False):
+            # Another thread is already reloading – don't wait for it.
+            self._stale_hits += 1
+            return snap
+        if snap is None:
+            self._reload_lock.acquire()
+
+        try:
+            snap = self._snapshot
+            if snap is None or snap.generation != generation:
+                snap = self._load(generation)
+                self._snapshot = snap  # atomic swap for lock-free readers
+                self._reloads += 1
+            else:
+                self._hits += 1
+            return snap
+        finally:
+            self._reload_lock.release()
+
+    def is_current(self) -> bool:
+        """True when `get` would return without reloading from Chroma."""
+        snap = self._snapshot
+        return snap is not None and snap.generation == collection_generation(self._name)
+
+    def invalidate(self) -> None:
+        """Drop the current snapshot; the next `get` reloads."""
+        self._snapshot = None
+
+    def stats(self) -> Dict[str, Any]:
+        snap = self._snapshot
+        return {
+            "collection": self._name,
+            "hits": self._hits,
+            "stale_hits": self._stale_hits,
+            "reloads": self._reloads,
+            "generation": snap.generation if snap else None,
+            "documents": len(snap) if snap else 0,
+            "bytes": snap.nbytes if snap else 0,
+            "ann_cells": snap.ann.cells if snap and snap.ann is not None else 0,
+        }
+
+    # ------------------------------------------------------------------#
+    # Internals
+    # ------------------------------------------------------------------#
+    def _load(self, generation: int) -> Snapshot:
+        store = get_collection(self._name).get(include=["documents", "embeddings", "metadatas"])
+        embeddings = store["embeddings"]
+        if embeddings is None or len(embeddings) == 0:
+            embeddings = []
+        ids = tuple(store["ids"])
+        documents = tuple(store["documents"] or ())
+        ann = self._load_ann(ids, embeddings) if self._ann and len(ids) >= settings.SUPPORT_ANN_MIN_DOCS else None
+        return Snapshot(
+            generation=generation,
+            ids=ids,
+            documents=documents,
+            metadatas=tuple(m or {} for m in (store["metadatas"] or ())),
+            index=VectorIndex(embeddings, metric=self._metric) if ann is None else None,
+            lexical=self._load_lexical(ids, documents) if self._lexical else None,
+            ann=ann,
+        )
+
+    def _load_lexical(self, ids: Tuple[str, ...], documents: Tuple[str, ...]) -> BM25Index:
+        """The persisted BM25 index, rebuilt in memory if it doesn't match."""
+        lexical = BM25Index.load(index_path(self._name))
+        if lexical is None or len(lexical) != len(ids) or not all(i in lexical for i in ids):
+            lexical = BM25Index.build(zip(ids, documents))
+        return lexical
+
+    def _load_ann(self, ids: Tuple[str, ...], embeddings: Any) -> IVFIndex:
+        """The persisted IVF index, rebuilt in memory if it doesn't match."""
+        ann = IVFIndex.load(ann_path(self._name))
+        if ann is None or ann.metric != self._metric or len(ann) != len(ids) or not all(i in ann for i in ids):
+            ann = IVFIndex.build(ids, embeddings, metric=self._metric, nlist=settings.SUPPORT_ANN_NLIST)
+        return ann
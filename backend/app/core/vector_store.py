@@ -5,20 +5,53 @@ Unified Chroma helper.
 • Otherwise spin-up / reuse a **local on-disk** Chroma client so the test-
   suite works without extra services.
 • Compatible with both Chroma 0.4 and 0.5 API shapes.
+• Tracks a per-collection *generation* counter so in-process caches can tell
+  when a collection has been re-ingested (see `bump_generation`).
+• Logical names can be aliased to a physical collection, which lets a full
+  rebuild fill a shadow collection and swap it in (see `swap_alias`).
+• `aget_collection` is the async twin of `get_collection` for the ASGI
+  serving mode: a native `AsyncHttpClient` collection against a server,
+  the local collection with its calls moved to worker threads otherwise.
+• `has_own_embedding_function` tells collections created with an explicit
+  embedding function apart from ones relying on Chroma's bundled default
+  model, which callers may replace with their own vectors.
+• With PRODUCT_INDEX_BACKEND=quantized the product collections ("products"
+  and its rebuild shadows) are `QuantizedCollection`s – int8 codes in
+  memory-mapped files under `local_data_dir()/quantized` shared by all
+  worker processes – instead of Chroma collections.
+• Nothing is imported or opened at import time: `chromadb` is loaded and
+  the client created on the first call to `client()` (`_client` is kept as
+  a lazy module attribute for existing callers).
 """
 from __future__ import annotations
 
+import asyncio
 import os
+import shutil
 import tempfile
+import threading
+import time
+import weakref
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Any, Dict, List
 
-import chromadb
-from chromadb.api.models import Collection
+from app.config import settings as app_settings
+from app.core.metrics import instrument_collection
+from app.core.quantized_index import QuantizedCollection
+
+if TYPE_CHECKING:
+    from chromadb.api.models import Collection
+
+
+def local_data_dir() -> Path:
+    """Directory of the local on-disk Chroma store (also home to side files)."""
+    return Path(os.getenv("CHROMA_DATA", tempfile.gettempdir())) / "chromadb"
 
 
 def _make_client() -> "chromadb.api.client.ClientAPI":
     """Return a Chroma client suited for the current environment."""
+    import chromadb
+
     host = os.getenv("CHROMA_HOST")
     if host:  # ─── remote server explicitly requested ─────────────────────────
         from chromadb import Settings
@@ -36,33 +69,233 @@ def _make_client() -> "chromadb.api.client.ClientAPI":
             pass
 
     # ─── local on-disk client (default path = tmpdir/chromadb) ────────────────
-    data_dir = Path(os.getenv("CHROMA_DATA", tempfile.gettempdir())) / "chromadb"
+    data_dir = local_data_dir()
     if hasattr(chromadb, "PersistentClient"):  # ≥ 0.5
         return chromadb.PersistentClient(path=str(data_dir))
     return chromadb.Client(path=str(data_dir))  # 0.4.x
 
 
-# global singleton used across the backend
-_client = _make_client()
+# global singleton used across the backend, created on first use
+_CLIENT = None
+_client_lock = threading.Lock()
+
+
+def client() -> "chromadb.api.client.ClientAPI":
+    """The shared Chroma client (imports `chromadb` and connects on first call)."""
+    global _CLIENT
+    if _CLIENT is None:
+        with _client_lock:
+            if _CLIENT is None:
+                _CLIENT = _make_client()
+    return _CLIENT
+
+
+def __getattr__(name: str) -> Any:
+    if name == "_client":
+        return client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def _collection_names() -> List[str]:
     """Version-agnostic helper to list existing collection names."""
-    if hasattr(_client, "get_collection_names"):  # HTTP client (0.5)
-        return _client.get_collection_names()  # type: ignore[attr-defined]
-    if hasattr(_client, "list_collections"):  # local client (0.4/0.5)
-        return [c.name for c in _client.list_collections()]  # type: ignore[attr-defined]
+    chroma = client()
+    if hasattr(chroma, "get_collection_names"):  # HTTP client (0.5)
+        return chroma.get_collection_names()  # type: ignore[attr-defined]
+    if hasattr(chroma, "list_collections"):  # local client (0.4/0.5)
+        return [c.name for c in chroma.list_collections()]  # type: ignore[attr-defined]
     raise AttributeError("Unable to list Chroma collections with this client")
 
 
-def get_collection(name: str = "products") -> Collection:
+def get_collection(name: str = "products") -> "Collection":
     """
     Lazily create (if necessary) and return a Chroma collection.
 
     Common names:
       • “products”    – product embeddings
       • “support_kb”  – customer-support knowledge-base
+
+    Aliased names resolve to their current physical collection.
     """
+    name = resolve_alias(name)
+    if _is_quantized(name):
+        return instrument_collection(_quantized_collection(name))
     if name not in _collection_names():
-        _client.create_collection(name)  # type: ignore[attr-defined]
-    return _client.get_collection(name)  # type: ignore[attr-defined]
+        client().create_collection(name)  # type: ignore[attr-defined]
+    return instrument_collection(client().get_collection(name))  # type: ignore[attr-defined]
+
+
+def has_own_embedding_function(collection: Any) -> bool:
+    """False when `collection` would embed texts with Chroma's default model."""
+    ef = getattr(collection, "_embedding_function", None)
+    if ef is None:
+        return False
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+    return not isinstance(ef, DefaultEmbeddingFunction)
+
+
+def drop_collection(name: str) -> None:
+    """Delete physical collection `name` if it exists."""
+    if (_quantized_dir() / name).is_dir():
+        with _quantized_lock:
+            _quantized.pop(name, None)
+        shutil.rmtree(_quantized_dir() / name)
+    if name in _collection_names():
+        client().delete_collection(name)  # type: ignore[attr-defined]
+
+
+def collection_names() -> List[str]:
+    """Names of all physical collections in the store."""
+    names = list(_collection_names())
+    if _quantized_dir().is_dir():
+        names += sorted(p.name for p in _quantized_dir().iterdir() if p.is_dir() and p.name not in names)
+    return names
+
+
+# --------------------------------------------------------------------------- #
+# Quantized product collections
+# --------------------------------------------------------------------------- #
+_quantized: Dict[str, QuantizedCollection] = {}
+_quantized_lock = threading.Lock()
+
+
+def _quantized_dir() -> Path:
+    return local_data_dir() / "quantized"
+
+
+def _is_quantized(name: str) -> bool:
+    if app_settings.PRODUCT_INDEX_BACKEND != "quantized":
+        return False
+    return name == "products" or name.startswith("products-")
+
+
+def _quantized_collection(name: str) -> QuantizedCollection:
+    """One instance per physical name, so its memory maps are shared by all callers."""
+    with _quantized_lock:
+        col = _quantized.get(name)
+        if col is None:
+            for stale in [n for n, c in _quantized.items() if not c.path.is_dir()]:
+                del _quantized[stale]  # dropped by another process's rebuild
+            col = _quantized[name] = QuantizedCollection(_quantized_dir() / name, name)
+        return col
+
+
+# --------------------------------------------------------------------------- #
+# Collection generations
+# --------------------------------------------------------------------------- #
+# Generations live in the metadata of a tiny bookkeeping collection so every
+# process sharing the same Chroma store sees ingests done by the others.
+_REGISTRY_NAME = "vector-registry"
+_registry: Dict[str, object] = {}
+_registry_read_at = float("-inf")
+
+
+def _registry_metadata(max_age: float) -> Dict[str, object]:
+    """Registry metadata, re-read from Chroma at most every `max_age` seconds."""
+    global _registry, _registry_read_at
+    now = time.monotonic()
+    if now - _registry_read_at >= max_age:
+        _registry = dict(get_collection(_REGISTRY_NAME).metadata or {})
+        _registry_read_at = now
+    return _registry
+
+
+def resolve_alias(name: str) -> str:
+    """Physical collection currently behind logical name `name`."""
+    if name == _REGISTRY_NAME:
+        return name
+    meta = _registry_metadata(app_settings.VECTOR_REGISTRY_TTL)
+    return str(meta.get(f"alias:{name}", name))
+
+
+def collection_generation(name: str) -> int:
+    """
+    Return the generation of collection `name` (0 if never bumped).
+
+    Cheap enough for the request path: the shared value is polled at most
+    once per `VECTOR_REGISTRY_TTL` seconds, local bumps are seen immediately.
+    """
+    return int(_registry_metadata(app_settings.VECTOR_REGISTRY_TTL).get(f"gen:{name}", 0))
+
+
+def bump_generation(name: str) -> int:
+    """Mark collection `name` as changed; returns the new generation."""
+    global _registry, _registry_read_at
+    registry = get_collection(_REGISTRY_NAME)
+    meta = dict(registry.metadata or {})  # `modify` replaces, so merge here
+    meta[f"gen:{name}"] = int(meta.get(f"gen:{name}", 0)) + 1
+    registry.modify(metadata=meta)
+    _registry, _registry_read_at = meta, time.monotonic()
+    return int(meta[f"gen:{name}"])
+
+
+def swap_alias(name: str, physical: str) -> str:
+    """
+    Point logical `name` at `physical` and bump its generation in one
+    registry write; returns the collection it pointed at before.
+    """
+    global _registry, _registry_read_at
+    registry = get_collection(_REGISTRY_NAME)
+    meta = dict(registry.metadata or {})
+    previous = str(meta.get(f"alias:{name}", name))
+    meta[f"alias:{name}"] = physical
+    meta[f"gen:{name}"] = int(meta.get(f"gen:{name}", 0)) + 1
+    registry.modify(metadata=meta)
+    _registry, _registry_read_at = meta, time.monotonic()
+    return previous
+
+
+# --------------------------------------------------------------------------- #
+# Async access (ASGI serving mode)
+# --------------------------------------------------------------------------- #
+class ThreadedCollection:
+    """
+    Awaitable facade over a sync collection: each call runs on a worker
+    thread, so the event loop never blocks on the embedded Chroma store.
+    Mirrors the `AsyncCollection` methods the request path uses.
+    """
+
+    def __init__(self, collection: "Collection") -> None:
+        self._collection = collection
+        self.name = collection.name
+        self._embedding_function = getattr(collection, "_embedding_function", None)
+
+    async def query(self, **kwargs: Any):
+        return await asyncio.to_thread(self._collection.query, **kwargs)
+
+    async def get(self, **kwargs: Any):
+        return await asyncio.to_thread(self._collection.get, **kwargs)
+
+    async def count(self) -> int:
+        return await asyncio.to_thread(self._collection.count)
+
+
+# httpx-backed clients are bound to the loop that created them.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+
+
+async def _async_client():
+    """Per-loop `AsyncHttpClient` when CHROMA_HOST is set, else None."""
+    host = os.getenv("CHROMA_HOST")
+    if not host:
+        return None
+    import chromadb
+
+    if not hasattr(chromadb, "AsyncHttpClient"):
+        return None
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = await chromadb.AsyncHttpClient(host=host, port=int(os.getenv("CHROMA_PORT", 8000)))
+        _async_clients[loop] = client
+    return client
+
+
+async def aget_collection(name: str = "products"):
+    """Async counterpart of `get_collection`; the result's methods are awaitable."""
+    client = await _async_client()
+    if client is None or _is_quantized(name):
+        return ThreadedCollection(await asyncio.to_thread(get_collection, name))
+    # The registry read behind `resolve_alias` is a sync call at most once per TTL.
+    physical = await asyncio.to_thread(resolve_alias, name)
+    return instrument_collection(await client.get_or_create_collection(physical))
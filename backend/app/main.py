@@ -1,14 +1,17 @@
 """
 Application factory and entry-point.
 
-Boots Flask, registers blueprints, creates DB tables.
+Boots Flask, registers blueprints, creates DB tables and (with
+STARTUP_WARMUP) starts the background warm-up of the lazy clients.
 """
 from flask import Flask, jsonify
 from flask_cors import CORS           # ← NEW
 
 from app.api.routes import api_bp
 from app.api.chat_routes import chat_bp
+from app.api import tracing
 from app.core.database import init_db
+from app.services import warmup
 
 
 def create_app() -> Flask:
@@ -20,16 +23,18 @@ def create_app() -> Flask:
         return jsonify(
             {
                 "message": "AI-Support Platform backend is running.",
-                "available_endpoints": ["/api/health", "/api/search?q=<query>", "/api/chat"],
+                "available_endpoints": ["/api/health", "/api/search?q=<query>", "/api/chat", "/api/metrics"],
             }
         )
 
     app.register_blueprint(api_bp, url_prefix="/api")
     app.register_blueprint(chat_bp, url_prefix="/api")
+    tracing.init_app(app)
 
     with app.app_context():
         init_db()
 
+    warmup.start()                     # STARTUP_WARMUP: preload lazy clients in the background
     return app
 
 
@@ -0,0 +1,26 @@
+"""
+Bookkeeping for incremental product indexing (`product_index_state` table).
+
+One row per product present in the vector collection: the fingerprint of the
+document/metadata last sent to Chroma and when that happened.  Kept apart
+from `products` so `create_all` can add it to existing databases.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class ProductIndexState(Base):  # type: ignore[call-arg]
+    __tablename__ = "product_index_state"
+
+    product_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    indexed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    def __repr__(self) -> str:  # pragma: no cover
+        return f"<ProductIndexState product_id={self.product_id} fingerprint={self.fingerprint[:8]}>"
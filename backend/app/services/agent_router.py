@@ -1,39 +1,105 @@
 """
 LangGraph state-machine that decides: product search, recommendations (fallback),
 or customer-support answer.
+
+`router.invoke(...)` runs the graph to completion; `cached_router.invoke(...)`
+does the same behind a `ResponseCache` (exact + semantic, dropped when the
+product index or support KB is rebuilt); `stream_events(query)` yields
+SSE-ready events as each node finishes (see `chat_routes`).
+
+`arouter`, `cached_router.ainvoke` and `astream_events` are the async
+twins used by the ASGI app (`app.asgi`): same graph shape, but the nodes
+await the LLM, embedding and Chroma calls instead of blocking a thread.
+
+With `ROUTER_SPECULATIVE` on, product search and support retrieval start
+in parallel with the LLM routing call, so only the slower of the two sits
+on the critical path.  Every node records its wall-clock time in
+`state["timings"]` (ms), which the streamed `done` event carries.
+
+`graph`, `router`, `arouter` and `cached_router` are built on first access
+(module `__getattr__`), so importing this module does not load langgraph.
 """
 from __future__ import annotations
+import asyncio
+import contextvars
+import inspect
 import os
-from typing import Dict
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterator, List, Tuple
 
-from langgraph.graph import END, StateGraph
-from app.core.llm import LLMInterface, OpenAIProvider, FakeLLM
-from app.core.database import get_db
-from app.services.indexer import search_products
+from app.config import settings
+from app.core import metrics
+from app.core.llm import EmbeddingModel, LLMInterface, OpenAIProvider, FakeLLM
+from app.core.response_cache import ResponseCache
+from app.services.indexer import asearch_product_payloads, search_product_payloads
+from app.services.intent_classifier import IntentClassifier, default_examples
 from app.services.recommender import top_n
+from app.services.search_filters import SearchFilters
 from app.services.support_rag import answer as support_answer
+from app.services.support_rag import asupport_answer
+
+if TYPE_CHECKING:
+    from langgraph.graph import StateGraph
 
 _llm: LLMInterface = OpenAIProvider() if os.getenv("OPENAI_API_KEY") else FakeLLM()
+_classifier = IntentClassifier(default_examples())
+_embedder = EmbeddingModel()
+_responses = ResponseCache.from_settings(
+    "chat", depends_on=("products", "support_kb"), embed=_embedder.embed
+)
+
+
+def classifier_stats() -> Dict:
+    """Fast-path vs LLM counters of the local intent classifier."""
+    return _classifier.stats()
+
+
+def response_cache_stats() -> Dict:
+    """Hit ratio / size of the chat response cache."""
+    return _responses.stats()
+
 
 # ───────────────────────── Node functions ─────────────────────────────────────
-def ask_llm(state: Dict) -> Dict:
-    """Classify the user request into search / fallback / support."""
-    user_query = state["query"]
-    system_prompt = (
-        "Classify the user request strictly as one word: "
-        "'search', 'fallback', or 'support'.\n"
-        "- 'search': user seeking products by keyword\n"
-        "- 'fallback': user wants suggestions / recommendations\n"
-        "- 'support': user asks about shipping, returns, warranty, etc."
-    )
-    messages = [
-        {"role": "system", "content": system_prompt},
+_ROUTE_PROMPT = (
+    "Classify the user request strictly as one word: "
+    "'search', 'fallback', or 'support'.\n"
+    "- 'search': user seeking products by keyword\n"
+    "- 'fallback': user wants suggestions / recommendations\n"
+    "- 'support': user asks about shipping, returns, warranty, etc."
+)
+
+
+def _route_messages(user_query: str) -> List[Dict]:
+    return [
+        {"role": "system", "content": _ROUTE_PROMPT},
         {"role": "user", "content": user_query},
     ]
-    decision = "".join(_llm.stream(messages)).strip().lower()
-    if decision not in {"search", "fallback", "support"}:
-        decision = "fallback"
-    state["tool"] = decision
+
+
+def _fast_route(state: Dict) -> bool:
+    """Set `state["tool"]` from the local classifier when it is confident."""
+    if settings.INTENT_FAST_PATH:
+        intent = _classifier.classify(state["query"])
+        if intent is not None:  # confident local decision – skip the LLM
+            state["tool"] = intent.label
+            return True
+    return False
+
+
+def _decision(reply: str) -> str:
+    decision = reply.strip().lower()
+    return decision if decision in {"search", "fallback", "support"} else "fallback"
+
+
+def ask_llm(state: Dict) -> Dict:
+    """Classify the user request into search / fallback / support."""
+    if not _fast_route(state):
+        if settings.ROUTER_SPECULATIVE:
+            _speculate(state)
+        state["tool"] = _decision("".join(_llm.stream(_route_messages(state["query"]))))
     return state
 
 
@@ -41,13 +107,16 @@ def decide_next(state: Dict) -> str:
     return state["tool"]
 
 
+def _search(query: str, filters: Dict | None) -> List[Dict]:
+    return search_product_payloads(query, filters=SearchFilters.from_mapping(filters or {}))
+
+
 def run_search(state: Dict) -> Dict:
-    db = next(get_db())
-    results = search_products(db, state["query"])
+    results = _claim(state, "search")
     state.update(
         {
             "answer": "Here are the products I found:",
-            "results": [p.as_dict() for p in results],
+            "results": results if results is not None else _search(state["query"], state.get("filters")),
         }
     )
     return state
@@ -57,6 +126,7 @@ def run_fallback(state):
     """Return a set of popular items when no specific tool triggers."""
     from app.services import recommender
 
+    _claim(state, "fallback")
     state["tool"] = "fallback"
     # always return exactly 5 items for the test expectation
     state["results"] = recommender.recommend(state["query"], k=5)
@@ -65,28 +135,320 @@ def run_fallback(state):
 
 
 def run_support(state: Dict) -> Dict:
-    state.update(support_answer(state["query"]))
+    answer = _claim(state, "support")
+    state.update(answer if answer is not None else support_answer(state["query"]))
+    return state
+
+
+# ───────────────────────── Speculative retrieval ──────────────────────────────
+# With ROUTER_SPECULATIVE on, `ask_llm` starts both retrievals before it
+# waits on the LLM.  The tool node that runs next claims its own branch;
+# the other one is cancelled if it has not started, else its result dropped.
+_SPECULATIVE = "speculative"
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _speculation_pool() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(settings.ROUTER_SPECULATIVE_WORKERS, thread_name_prefix="speculate")
+    return _pool
+
+
+def _speculate(state: Dict) -> None:
+    pool = _speculation_pool()
+    # each branch runs in a copy of the caller's context: spans reach its trace
+    state[_SPECULATIVE] = {
+        "search": pool.submit(contextvars.copy_context().run, _search, state["query"], state.get("filters")),
+        "support": pool.submit(contextvars.copy_context().run, support_answer, state["query"]),
+    }
+
+
+def _claim(state: Dict, tool: str):
+    """Result of the speculative `tool` branch (None if there is none)."""
+    branches = state.pop(_SPECULATIVE, None) or {}
+    for name, branch in branches.items():
+        if name != tool:
+            branch.cancel()
+    branch = branches.get(tool)
+    return None if branch is None else branch.result()
+
+
+def _aspeculate(state: Dict) -> None:
+    filters = SearchFilters.from_mapping(state.get("filters") or {})
+    state[_SPECULATIVE] = {
+        "search": asyncio.ensure_future(asearch_product_payloads(state["query"], filters=filters)),
+        "support": asyncio.ensure_future(asupport_answer(state["query"])),
+    }
+    for task in state[_SPECULATIVE].values():
+        task.add_done_callback(_discard)
+
+
+def _discard(task: "asyncio.Task") -> None:
+    if not task.cancelled():
+        task.exception()  # mark a losing branch's error as retrieved
+
+
+async def _aclaim(state: Dict, tool: str):
+    branches = state.pop(_SPECULATIVE, None) or {}
+    for name, branch in branches.items():
+        if name != tool:
+            branch.cancel()
+    branch = branches.get(tool)
+    return None if branch is None else await branch
+
+
+# ───────────────────────── Async nodes ────────────────────────────────────────
+async def aask_llm(state: Dict) -> Dict:
+    if not _fast_route(state):
+        if settings.ROUTER_SPECULATIVE:
+            _aspeculate(state)
+        reply = [chunk async for chunk in _llm.astream(_route_messages(state["query"]))]
+        state["tool"] = _decision("".join(reply))
+    return state
+
+
+async def arun_search(state: Dict) -> Dict:
+    results = await _aclaim(state, "search")
+    if results is None:
+        filters = SearchFilters.from_mapping(state.get("filters") or {})
+        results = await asearch_product_payloads(state["query"], filters=filters)
+    state.update({"answer": "Here are the products I found:", "results": results})
     return state
 
 
+async def arun_fallback(state: Dict) -> Dict:
+    await _aclaim(state, "fallback")
+    return run_fallback(state)  # static picks – no I/O to await
+
+
+async def arun_support(state: Dict) -> Dict:
+    answer = await _aclaim(state, "support")
+    state.update(answer if answer is not None else await asupport_answer(state["query"]))
+    return state
+
+
+# ───────────────────────── Node timings ───────────────────────────────────────
+def _timed(name: str, node):
+    """
+    Record the node's wall-clock milliseconds in `state["timings"]` and in
+    the `chat_node_seconds` histogram.
+    """
+
+    def record(state: Dict, t0: float) -> Dict:
+        seconds = time.perf_counter() - t0
+        state.setdefault("timings", {})[name] = round(seconds * 1000.0, 3)
+        metrics.record(metrics.NODE_SECONDS, f"node:{name}", seconds, node=name)
+        if name == "ask_llm" and metrics.enabled():
+            metrics.ROUTES_TOTAL.inc(tool=state["tool"])
+        return state
+
+    if inspect.iscoroutinefunction(node):
+
+        async def atimed(state: Dict) -> Dict:
+            t0 = time.perf_counter()
+            return record(await node(state), t0)
+
+        return atimed
+
+    def timed(state: Dict) -> Dict:
+        t0 = time.perf_counter()
+        return record(node(state), t0)
+
+    return timed
+
+
 # ───────────────────────── Build graph ────────────────────────────────────────
-graph = StateGraph(dict)
+def _build_graph(ask, search, fallback, support) -> StateGraph:
+    from langgraph.graph import END, StateGraph
 
-graph.add_node("ask_llm", ask_llm)
-graph.add_node("search", run_search)
-graph.add_node("fallback", run_fallback)
-graph.add_node("support", run_support)
+    graph = StateGraph(dict)
 
-graph.set_entry_point("ask_llm")
+    graph.add_node("ask_llm", _timed("ask_llm", ask))
+    graph.add_node("search", _timed("search", search))
+    graph.add_node("fallback", _timed("fallback", fallback))
+    graph.add_node("support", _timed("support", support))
 
-graph.add_conditional_edges(
-    "ask_llm",
-    decide_next,
-    {"search": "search", "fallback": "fallback", "support": "support"},
-)
+    graph.set_entry_point("ask_llm")
+
+    graph.add_conditional_edges(
+        "ask_llm",
+        decide_next,
+        {"search": "search", "fallback": "fallback", "support": "support"},
+    )
+
+    graph.add_edge("search", END)
+    graph.add_edge("fallback", END)
+    graph.add_edge("support", END)
+    return graph
+
+
+def _cacheable(state: Dict) -> Dict:
+    """The part of a final state worth caching / sending to clients."""
+    return {
+        "answer": state.get("answer", ""),
+        "results": state.get("results", []),
+        "tool": state.get("tool"),
+        "sources": state.get("sources", []),
+    }
+
+
+class CachedRouter:
+    """Drop-in for `router.invoke` that is served from the response cache."""
+
+    def __init__(self, graph, cache: ResponseCache, agraph=None) -> None:
+        self._graph = graph
+        self._agraph = agraph
+        self.cache = cache
+
+    def invoke(self, state: Dict) -> Dict:
+        if state.get("filters"):  # answers are cached per query text only
+            return self._graph.invoke(state)
+        query = state["query"]
+        cached = self.cache.get(query)
+        if cached is not None:
+            return {**state, **cached}
+        final = self._graph.invoke(state)
+        self.cache.put(query, _cacheable(final))
+        return final
+
+    async def ainvoke(self, state: Dict) -> Dict:
+        if state.get("filters"):
+            return await self._agraph.ainvoke(state)
+        query = state["query"]
+        await _prime_embedding(query)
+        cached = await asyncio.to_thread(self.cache.get, query)  # may re-read the generation registry
+        if cached is not None:
+            return {**state, **cached}
+        final = await self._agraph.ainvoke(state)
+        await asyncio.to_thread(self.cache.put, query, _cacheable(final))
+        return final
+
+
+async def _prime_embedding(query: str) -> None:
+    """
+    Fetch the query embedding asynchronously before a semantic cache
+    lookup, so the cache's own (sync) embed call is an in-memory hit.
+    """
+    semantic = settings.RESPONSE_CACHE_SIMILARITY <= 1.0
+    if settings.RESPONSE_CACHE_ENABLED and semantic and settings.EMBED_CACHE_ENABLED:
+        await _embedder.aembed(query)
+
+
+# ───────────────────────── Lazy module attributes ─────────────────────────────
+_LAZY: Dict[str, Callable[[], Any]] = {
+    "graph": lambda: _build_graph(ask_llm, run_search, run_fallback, run_support),
+    "router": lambda: _lazy("graph").compile(),
+    "arouter": lambda: _build_graph(aask_llm, arun_search, arun_fallback, arun_support).compile(),
+    "cached_router": lambda: CachedRouter(_lazy("router"), _responses, agraph=_lazy("arouter")),
+}
+_lazy_lock = threading.RLock()
+
+
+def _lazy(name: str) -> Any:
+    """Module attribute `name`, built by its `_LAZY` factory on first access."""
+    if name in globals():
+        return globals()[name]
+    factory = _LAZY.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _lazy_lock:
+        if name not in globals():
+            globals()[name] = factory()
+    return globals()[name]
+
+
+__getattr__ = _lazy
+
+
+def warm() -> None:
+    """Build the graphs and the LLM / embedding clients now (see `app.services.warmup`)."""
+    _lazy("cached_router")
+    _llm.warm()
+    _embedder.warm()
+
+
+# ───────────────────────── Streaming ──────────────────────────────────────────
+_TOKEN_RE = re.compile(r"\S+\s*")
+
+
+def _answer_tokens(answer: str) -> List[str]:
+    """Split an answer into word tokens that concatenate back to the text."""
+    return _TOKEN_RE.findall(answer)
+
+
+def _replay(cached: Dict) -> Iterator[Tuple[str, Dict]]:
+    yield "route", {"tool": cached["tool"]}
+    for item in cached["results"]:
+        yield "result", item
+    for tok in _answer_tokens(cached["answer"]):
+        yield "token", {"text": tok}
+    yield "done", cached
+
+
+def _node_events(node: str, final: Dict) -> Iterator[Tuple[str, Dict]]:
+    if node == "ask_llm":
+        yield "route", {"tool": final["tool"]}
+        return
+    for item in final.get("results", []):
+        yield "result", item
+    for tok in _answer_tokens(final.get("answer", "")):
+        yield "token", {"text": tok}
+
+
+def stream_events(query: str, filters: Dict | None = None) -> Iterator[Tuple[str, Dict]]:
+    """
+    Run the graph node by node and yield `(event, payload)` pairs:
+
+      route   {"tool": ...}                 as soon as `ask_llm` has decided
+      result  one product dict              per item the tool node returned
+      token   {"text": ...}                 answer chunks, in order
+      done    {"answer", "results", "tool", "sources", "timings"}   final state
+
+    A response-cache hit replays the same event sequence without running
+    the graph.  Structured `filters` (see `search_filters`) bypass the cache.
+    """
+    cached = None if filters else _responses.get(query)
+    if cached is not None:
+        yield from _replay(cached)
+        return
+
+    initial: Dict = {"query": query, **({"filters": filters} if filters else {})}
+    final: Dict = dict(initial)
+    for update in _lazy("router").stream(initial, stream_mode="updates"):
+        for node, node_state in update.items():
+            final.update(node_state or {})
+            yield from _node_events(node, final)
+
+    done = _cacheable(final)
+    if not filters:
+        _responses.put(query, done)
+    yield "done", {**done, "timings": final.get("timings", {})}
+
+
+async def astream_events(query: str, filters: Dict | None = None) -> AsyncIterator[Tuple[str, Dict]]:
+    """Async `stream_events` over `arouter` – same events, same caching."""
+    cached = None
+    if not filters:
+        await _prime_embedding(query)
+        cached = await asyncio.to_thread(_responses.get, query)
+    if cached is not None:
+        for event in _replay(cached):
+            yield event
+        return
 
-graph.add_edge("search", END)
-graph.add_edge("fallback", END)
-graph.add_edge("support", END)
+    initial: Dict = {"query": query, **({"filters": filters} if filters else {})}
+    final: Dict = dict(initial)
+    async for update in _lazy("arouter").astream(initial, stream_mode="updates"):
+        for node, node_state in update.items():
+            final.update(node_state or {})
+            for event in _node_events(node, final):
+                yield event
 
-router = graph.compile()
+    done = _cacheable(final)
+    if not filters:
+        await asyncio.to_thread(_responses.put, query, done)
+    yield "done", {**done, "timings": final.get("timings", {})}
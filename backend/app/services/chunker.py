@@ -0,0 +1,116 @@
+"""
+Heading-aware Markdown chunker for support articles.
+
+An article is cut into sections at heading lines (`#` … `######`); each
+section's paragraphs are packed into passages of at most `max_chars`.
+Consecutive passages of the same section share ~`overlap` characters so a
+sentence cut at a boundary is still retrievable.  Every passage starts with
+its section heading, which keeps short passages self-describing for the
+embedder.  A heading with no body of its own ("# Return Policy" directly
+followed by "## Eligibility") is folded into the next section's heading
+lines instead of becoming a passage that holds nothing but the heading.
+Paragraphs longer than `max_chars` are split on word boundaries.
+"""
+from __future__ import annotations
+
+import re
+from typing import List, NamedTuple, Optional
+
+__all__ = ["Passage", "split_markdown", "strip_headings"]
+
+_HEADING_RE = re.compile(r"^#{1,6}\s+(.*)$")
+
+
+class Passage(NamedTuple):
+    text: str
+    heading: Optional[str]
+    index: int
+
+
+def strip_headings(text: str) -> str:
+    """Drop heading lines and fold the rest onto one line."""
+    body = [ln for ln in text.splitlines() if not _HEADING_RE.match(ln)]
+    return " ".join(" ".join(body).split())
+
+
+def _sections(markdown: str) -> List[tuple]:
+    """[(heading line or None, [paragraph, ...]), ...] in document order."""
+    sections: List[tuple] = []
+    heading: Optional[str] = None
+    lines: List[str] = []
+
+    def close() -> None:
+        paras = [p.strip() for p in "\n".join(lines).split("\n\n") if p.strip()]
+        if paras or heading:
+            sections.append((heading, paras))
+
+    for line in markdown.splitlines():
+        if _HEADING_RE.match(line):
+            close()
+            heading, lines = line.strip(), []
+        else:
+            lines.append(line)
+    close()
+    return sections
+
+
+def _split_long(paragraph: str, limit: int, overlap: int) -> List[str]:
+    """Word-boundary windows of at most `limit` chars, sharing ~`overlap`."""
+    pieces: List[str] = []
+    current: List[str] = []
+    for word in paragraph.split():
+        if current and len(" ".join(current)) + 1 + len(word) > limit:
+            pieces.append(" ".join(current))
+            carry: List[str] = []
+            for w in reversed(current):  # trailing words that fit the overlap
+                if len(" ".join([w, *carry])) > min(overlap, limit // 2):
+                    break
+                carry.insert(0, w)
+            current = carry
+        current.append(word)
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+
+def _tail(text: str, overlap: int) -> str:
+    """Last ~`overlap` characters of `text`, starting on a word boundary."""
+    if overlap <= 0 or len(text) <= overlap:
+        return text if overlap > 0 else ""
+    cut = text[-overlap:]
+    space = cut.find(" ")
+    return cut[space + 1 :] if space != -1 else cut
+
+
+def split_markdown(markdown: str, max_chars: int = 800, overlap: int = 120) -> List[Passage]:
+    """Split `markdown` into size-bounded, overlapping passages."""
+    passages: List[Passage] = []
+    sections = _sections(markdown)
+    parents = ""  # heading lines of body-less sections, carried forward
+    for pos, (heading, paras) in enumerate(sections):
+        title = _HEADING_RE.match(heading).group(1).strip() if heading else None
+        if not paras and heading and pos + 1 < len(sections):
+            parents += f"{heading}\n"
+            continue
+        prefix = parents + (f"{heading}\n" if heading else "")
+        parents = ""
+        budget = max(1, max_chars - len(prefix))
+
+        units: List[str] = []
+        for para in paras:
+            units.extend(_split_long(para, budget, overlap) if len(para) > budget else [para])
+
+        if not units:  # trailing heading with no body – keep it, it may still match
+            passages.append(Passage(prefix.rstrip("\n"), title, len(passages)))
+            continue
+
+        body = ""
+        for unit in units:
+            if body and len(body) + 2 + len(unit) > budget:
+                passages.append(Passage(prefix + body, title, len(passages)))
+                carry = _tail(body, overlap)
+                body = f"{carry}\n\n{unit}" if carry and len(carry) + 2 + len(unit) <= budget else unit
+            else:
+                body = f"{body}\n\n{unit}" if body else unit
+        passages.append(Passage(prefix + body, title, len(passages)))
+    return passages
@@ -12,6 +12,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.config import settings
+from app.core.bulk_upsert import bulk_upsert
 from app.models.product import Product
 
 __all__ = ["fetch_products", "save_products"]          # ← EXPORTS
@@ -77,29 +78,50 @@ def fetch_products() -> List[dict[str, Any]]:
 
 
 
-def save_products(session: Session, items: Iterable[dict[str, Any]]) -> int:
+def _product_row(item: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "id": item["id"],
+        "title": item["title"],
+        "description": item.get("description"),
+        "category": item.get("category"),
+        "price": item.get("price", 0),
+        "image": item.get("image"),
+    }
+
+
+def save_products(
+    session: Session,
+    items: Iterable[dict[str, Any]],
+    batch_size: int | None = None,
+) -> int:
     """
     Persist products; upsert on primary-key conflict.
     Returns number of items committed.
+
+    `items` may be any iterable (e.g. a generator over a huge catalogue); rows
+    are written in chunks of `batch_size` (default `DB_UPSERT_BATCH`) with one
+    native upsert statement each, see `app.core.bulk_upsert`.
     """
-    added = 0
-    for item in items:
-        product = Product(
-            id=item["id"],
-            title=item["title"],
-            description=item.get("description"),
-            category=item.get("category"),
-            price=item.get("price", 0),
-            image=item.get("image"),
-        )
-        session.merge(product)
-        added += 1
+
+    def _log_batch(index: int, rows: int, seconds: float) -> None:
+        log.debug("products batch %d: %d rows in %.1f ms", index, rows, seconds * 1000)
+
     try:
+        report = bulk_upsert(
+            session,
+            Product,
+            (_product_row(item) for item in items),
+            batch_size=batch_size or settings.DB_UPSERT_BATCH,
+            on_batch=_log_batch,
+        )
         session.commit()
     except IntegrityError:
         session.rollback()
         raise
-    return added
+    log.info(
+        "Upserted %d products in %d batches (%.2fs).", report.rows, report.batches, report.seconds
+    )
+    return report.rows
 
 
 # CLI hook remains unchanged
@@ -1,37 +1,241 @@
 """
 Indexing & retrieval utilities for Product documents.
+
+Indexing is incremental: every indexed product has a `ProductIndexState` row
+holding the fingerprint of what was sent to Chroma, so a run only upserts
+new or changed products and deletes the ones gone from the DB.  Products
+are streamed with `yield_per` rather than loaded all at once.
+
+A BM25 index over title, category and description (`lexical_index`) is kept
+in step with the collection and fused with the vector ranking at query time.
+
+`rebuild_product_index` re-embeds everything into a fresh shadow collection
+and then swaps the `products` alias over to it, so searches keep hitting the
+old collection until the new one is complete.
+
+Each vector carries the full product payload in its metadata, so
+`search_product_payloads` answers from a single Chroma query; the SQL
+round-trip is only needed for rows indexed before payloads were stored.
+Category / price constraints (explicit or parsed from the query text, see
+`search_filters`) are pushed down into the query's `where` clause.
+`asearch_product_payloads` is the same search for the async app.
+
+`search_product_payloads_batch` and `search_products_batch` serve many
+queries at once: queries are embedded together, sent to Chroma as one
+multi-query request and hydrated with one SQL statement for the union of
+their hits (see `POST /api/search/batch`).
+
+Without OPENAI_API_KEY, and with LOCAL_EMBEDDINGS=hashing, products and queries
+are embedded by the local hashed n-gram TF-IDF provider (`core.embeddings`)
+instead of Chroma's default model, which needs a model download.
+Collections created with an explicit embedding function keep using it.
+Switching embedding backends needs a `rebuild_product_index`.
 """
 from __future__ import annotations
 
-from typing import List
+import asyncio
+import hashlib
+import json
+import uuid
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Set, Tuple
 
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
-from app.core.vector_store import get_collection
+from app.config import settings
+from app.core.bulk_upsert import bulk_upsert
+from app.core.database import SessionLocal, session_scope
+from app.core.embeddings import EmbeddingProvider, local_provider
+from app.core.lexical_index import BM25Index, index_path, lexical_index, rrf
+from app.core.metrics import STAGE_SECONDS, timed
+from app.core.vector_store import (
+    aget_collection,
+    bump_generation,
+    collection_generation,
+    collection_names,
+    drop_collection,
+    get_collection,
+    has_own_embedding_function,
+    resolve_alias,
+    swap_alias,
+)
+from app.models.index_state import ProductIndexState
 from app.models.product import Product
 from app.services.recommender import top_n  # fallback if no matches
+from app.services.search_filters import SearchFilters, extract_filters
+
+_COLLECTION = "products"
+# Marks metadata that holds the full `Product.as_dict()` payload.
+_PAYLOAD_VERSION = 1
+
+
+def _local_embedder(col) -> EmbeddingProvider | None:
+    """Provider that embeds products for `col` here, or None to let Chroma do it."""
+    if settings.OPENAI_API_KEY or settings.LOCAL_EMBEDDINGS != "hashing" or has_own_embedding_function(col):
+        return None
+    return local_provider()
+
+
+def _query_input(col, text: str) -> Dict[str, Any]:
+    return _queries_input(col, [text])
+
+
+def _queries_input(col, texts: List[str]) -> Dict[str, Any]:
+    """`query` kwargs for `texts`, embedded in one call when we embed ourselves."""
+    embedder = _local_embedder(col)
+    if embedder is None:
+        return {"query_texts": texts}
+    return {"query_embeddings": embedder.embed(texts)}
 
 
 # --------------------------------------------------------------------------- #
 # Index builder
 # --------------------------------------------------------------------------- #
+def _entry(p: Product) -> Tuple[str, Dict[str, Any]]:
+    """Document text and metadata stored in Chroma for `p`."""
+    payload = p.as_dict()
+    del payload["id"]  # the vector id already is the product id
+    # Chroma rejects None metadata values – absent keys are read back as None
+    metadata = {k: v for k, v in payload.items() if v is not None}
+    metadata["payload"] = _PAYLOAD_VERSION
+    if p.category:
+        metadata["category_key"] = p.category.lower()  # see search_filters
+    return p.description or p.title, metadata
+
+
+def _payload(pid: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Inverse of `_entry`: the `Product.as_dict()` shape."""
+    return {
+        "id": int(pid),
+        "title": metadata["title"],
+        "description": metadata.get("description"),
+        "category": metadata.get("category"),
+        "price": float(metadata["price"]),
+        "image": metadata.get("image"),
+    }
+
+
+def _lexical_text(p: Product) -> str:
+    return " ".join(filter(None, (p.title, p.category, p.description)))
+
+
+def _fingerprint(document: str, metadata: Dict[str, Any]) -> str:
+    payload = json.dumps([document, metadata], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _stream_products(session: Session) -> Iterator[Product]:
+    chunk = settings.PRODUCT_INDEX_CHUNK
+    stmt = select(Product).execution_options(yield_per=chunk)
+    return session.execute(stmt).scalars()
+
+
+def _index(session: Session, col, lexical: BM25Index, known: Dict[int, str]) -> Tuple[int, Set[int]]:
+    """
+    Upsert products whose fingerprint differs from `known` into `col` and
+    `lexical` and record the new fingerprints.  Returns (number upserted,
+    ids seen).
+    """
+    seen: Set[int] = set()
+    written = 0
+    ids: List[str] = []
+    docs: List[str] = []
+    metas: List[Dict[str, Any]] = []
+    states: List[Dict[str, Any]] = []
+    embedder = _local_embedder(col)
+
+    def flush() -> None:
+        nonlocal written
+        if not ids:
+            return
+        if embedder is None:
+            col.upsert(ids=ids, documents=docs, metadatas=metas)
+        else:  # `encode` skips the query embedding cache
+            col.upsert(ids=ids, documents=docs, metadatas=metas, embeddings=embedder.encode(docs))
+        bulk_upsert(session, ProductIndexState, states, key="product_id")
+        written += len(ids)
+        for buf in (ids, docs, metas, states):
+            buf.clear()
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for p in _stream_products(session):
+        seen.add(p.id)
+        document, metadata = _entry(p)
+        fp = _fingerprint(document, metadata)
+        if known.get(p.id) == fp:
+            if str(p.id) not in lexical:  # lexical index created after the vectors
+                lexical.add(str(p.id), _lexical_text(p))
+            continue
+        lexical.add(str(p.id), _lexical_text(p))
+        ids.append(str(p.id))
+        docs.append(document)
+        metas.append(metadata)
+        states.append({"product_id": p.id, "fingerprint": fp, "indexed_at": now})
+        if len(ids) >= settings.PRODUCT_INDEX_CHUNK:
+            flush()
+    flush()
+    return written, seen
+
+
 def build_product_index(session: Session) -> int:
     """
-    Upsert *all* products into Chroma collection.
+    Bring the Chroma collection in line with the `products` table.
+
+    Returns number of items (re-)indexed; unchanged products are skipped.
+    """
+    col = get_collection(_COLLECTION)
+    known: Dict[int, str] = dict(
+        session.execute(select(ProductIndexState.product_id, ProductIndexState.fingerprint)).all()
+    )
+    if known and col.count() == 0:
+        known = {}  # collection was wiped – state is stale
+    lexical = BM25Index.load(index_path(_COLLECTION)) or BM25Index()
+    lexical_size = len(lexical)
+
+    written, seen = _index(session, col, lexical, known)
+    removed = [pid for pid in known if pid not in seen]
+    if removed:
+        col.delete(ids=[str(pid) for pid in removed])
+        session.execute(delete(ProductIndexState).where(ProductIndexState.product_id.in_(removed)))
+        for pid in removed:
+            lexical.remove(str(pid))
+    session.commit()
+
+    if written or removed or len(lexical) != lexical_size:
+        lexical.save(index_path(_COLLECTION))
+        bump_generation(_COLLECTION)  # invalidates cached chat answers
+    return written
+
+
+def rebuild_product_index(session: Session) -> int:
+    """
+    Re-embed every product into a shadow collection, then swap it in.
 
+    The collection being replaced is kept until the next rebuild so other
+    processes still polling the old alias can finish their queries.
     Returns number of items indexed.
     """
-    products: List[Product] = session.query(Product).all()  # type: ignore[attr-defined]
-    if not products:
-        return 0
+    current = resolve_alias(_COLLECTION)
+    for name in collection_names():  # leftovers of earlier rebuilds
+        if (name == _COLLECTION or name.startswith(f"{_COLLECTION}-")) and name != current:
+            drop_collection(name)
 
-    col = get_collection()
-    col.upsert(
-        ids=[str(p.id) for p in products],
-        documents=[p.description or p.title for p in products],
-        metadatas=[{"title": p.title, "price": float(p.price)} for p in products],
-    )
-    return len(products)
+    shadow = f"{_COLLECTION}-{uuid.uuid4().hex[:12]}"
+    lexical = BM25Index()
+    try:
+        session.execute(delete(ProductIndexState))
+        written, _ = _index(session, get_collection(shadow), lexical, {})
+    except Exception:
+        session.rollback()
+        drop_collection(shadow)
+        raise
+    lexical.save(index_path(_COLLECTION))
+    swap_alias(_COLLECTION, shadow)  # also bumps the generation
+    session.commit()
+    return written
 
 
 # --------------------------------------------------------------------------- #
@@ -41,8 +245,8 @@ def search_products(session: Session, query: str, k: int = 5) -> List[Product]:
     """
     Semantic search in vector DB; fallback to top-N if no results.
     """
-    col = get_collection()
-    res = col.query(query_texts=[query], n_results=k)
+    col = get_collection(_COLLECTION)
+    res = col.query(**_query_input(col, query), n_results=k)
     ids = [int(i) for i in res["ids"][0]] if res["ids"] and res["ids"][0] else []
 
     if not ids:
@@ -57,3 +261,225 @@ def search_products(session: Session, query: str, k: int = 5) -> List[Product]:
     # Preserve vector ranking order
     items.sort(key=lambda p: ordering[p.id])
     return items
+
+
+_categories: Tuple[int, Tuple[str, ...]] = (-1, ())
+
+
+def known_categories() -> Tuple[str, ...]:
+    """Distinct product categories, re-read when the product index changes."""
+    global _categories
+    gen = collection_generation(_COLLECTION)
+    if _categories[0] != gen:
+        try:
+            with session_scope(SessionLocal) as db:
+                stmt = select(Product.category).distinct().where(Product.category.is_not(None))
+                _categories = (gen, tuple(sorted(c for (c,) in db.execute(stmt) if c)))
+        except SQLAlchemyError:  # no catalogue yet – search still works unfiltered
+            return ()
+    return _categories[1]
+
+
+def search_product_payloads(
+    query: str, k: int = 5, filters: SearchFilters | None = None
+) -> List[Dict[str, Any]]:
+    """
+    Hybrid (vector + BM25) search returning ready-to-serialize product dicts.
+
+    Price / category constraints found in `query` are applied on top of
+    the explicit `filters` (explicit values win) – pushed into the vector
+    query and applied to the lexical hits.  Both rankings are fused with
+    reciprocal rank fusion.  Payloads come straight from the vector
+    metadata; only entries indexed before payloads were stored are
+    hydrated from SQL.
+    """
+    text, filters, n = _plan(query, k, filters, known_categories())
+    col = get_collection(_COLLECTION)
+    res = col.query(**_query_input(col, text or query), n_results=n, where=filters.where(), include=["metadatas"])
+    vector_ids, metas = _vector_hits(res)
+
+    lexical_ids = [pid for pid, _ in lexical_index(_COLLECTION).search(query, n)]
+    extra = [pid for pid in lexical_ids if pid not in metas]
+    if extra:
+        got = col.get(ids=extra, include=["metadatas"])
+        metas.update(zip(got["ids"], got["metadatas"]))
+
+    ids, payloads = _fuse(query, k, filters, vector_ids, lexical_ids, metas)
+    if ids is None:
+        return payloads
+    return _hydrate_legacy(ids, payloads)
+
+
+async def asearch_product_payloads(
+    query: str, k: int = 5, filters: SearchFilters | None = None
+) -> List[Dict[str, Any]]:
+    """
+    Async `search_product_payloads` for the ASGI app (same results).  The
+    generation registry, category list and lexical index are read in one
+    worker-thread hop: with CHROMA_HOST the registry is an HTTP call.
+    """
+    categories, lexical = await asyncio.to_thread(_search_context)
+    text, filters, n = _plan(query, k, filters, categories)
+    col = await aget_collection(_COLLECTION)
+    res = await col.query(
+        **_query_input(col, text or query), n_results=n, where=filters.where(), include=["metadatas"]
+    )
+    vector_ids, metas = _vector_hits(res)
+
+    lexical_ids = [pid for pid, _ in lexical.search(query, n)]
+    extra = [pid for pid in lexical_ids if pid not in metas]
+    if extra:
+        got = await col.get(ids=extra, include=["metadatas"])
+        metas.update(zip(got["ids"], got["metadatas"]))
+
+    ids, payloads = _fuse(query, k, filters, vector_ids, lexical_ids, metas)
+    if ids is None:
+        return payloads
+    if any(p is None for p in payloads):
+        return await asyncio.to_thread(_hydrate_legacy, ids, payloads)
+    return payloads
+
+
+# ---- steps shared by the sync and async search --------------------------- #
+def _search_context():
+    return known_categories(), lexical_index(_COLLECTION)
+
+
+def _plan(query: str, k: int, filters: SearchFilters | None, categories: Tuple[str, ...]):
+    text, parsed = extract_filters(query, categories)
+    filters = (filters or SearchFilters()).merged(parsed)
+    return text, filters, max(k * 2, settings.HYBRID_CANDIDATES)
+
+
+def _vector_hits(res: Dict[str, Any], i: int = 0) -> Tuple[List[str], Dict[str, Dict[str, Any]]]:
+    """Ids and metadatas of query `i` of a (multi-query) Chroma result."""
+    vector_ids: List[str] = res["ids"][i] if res["ids"] else []
+    metas: Dict[str, Dict[str, Any]] = dict(zip(vector_ids, res["metadatas"][i])) if vector_ids else {}
+    return vector_ids, metas
+
+
+def _fuse(query, k, filters, vector_ids, lexical_ids, metas):
+    """
+    `(ids, payloads)` of the fused top-`k`; payloads are None for legacy
+    entries.  `ids` is None when nothing matched and `payloads` already
+    holds the recommender fallback.
+    """
+    lexical_ids = [pid for pid in lexical_ids if pid in metas and filters.matches(metas[pid] or {})]
+    fused = rrf(
+        [lexical_ids, vector_ids],  # lexical first: exact term matches win ties
+        [settings.HYBRID_LEXICAL_WEIGHT, settings.HYBRID_VECTOR_WEIGHT],
+        k=settings.HYBRID_RRF_K,
+    )
+    ids = [pid for pid, _ in fused[:k]]
+    if not ids:
+        return None, [p for p in top_n(query, n=k) if filters.matches(p)]
+    payloads: List[Dict[str, Any] | None] = [
+        _payload(pid, metas[pid]) if metas[pid] and metas[pid].get("payload") == _PAYLOAD_VERSION else None
+        for pid in ids
+    ]
+    return ids, payloads
+
+
+def _hydrate_legacy(ids: List[str], payloads: List[Dict[str, Any] | None]) -> List[Dict[str, Any]]:
+    return _hydrate_legacy_many([(ids, payloads)])[0]
+
+
+@timed(STAGE_SECONDS, "hydrate", stage="hydrate")
+def _hydrate_legacy_many(
+    results: List[Tuple[List[str], List[Dict[str, Any] | None]]]
+) -> List[List[Dict[str, Any]]]:
+    """Fill legacy (None) payloads of several results with one SQL query."""
+    missing = {int(pid) for ids, payloads in results for pid, p in zip(ids, payloads) if p is None}
+    rows: Dict[int, Dict[str, Any]] = {}
+    if missing:
+        with session_scope(SessionLocal) as db:
+            rows = {p.id: p.as_dict() for p in db.query(Product).filter(Product.id.in_(missing))}
+    hydrated = []
+    for ids, payloads in results:
+        filled = [p if p is not None else rows.get(int(pid)) for pid, p in zip(ids, payloads)]
+        hydrated.append([p for p in filled if p is not None])
+    return hydrated
+
+
+# --------------------------------------------------------------------------- #
+# Batch search
+# --------------------------------------------------------------------------- #
+def search_products_batch(session: Session, queries: Sequence[str], k: int = 5) -> List[List[Product]]:
+    """
+    `search_products` for many queries: one multi-query Chroma call and one
+    SQL statement for the union of the hits.  Queries without vector hits
+    get an empty list.
+    """
+    queries = list(queries)
+    if not queries:
+        return []
+    col = get_collection(_COLLECTION)
+    res = col.query(**_queries_input(col, queries), n_results=k, include=[])
+    hits = [[int(pid) for pid in ids] for ids in (res["ids"] or [[] for _ in queries])]
+    union = {pid for ids in hits for pid in ids}
+    rows = {p.id: p for p in session.query(Product).filter(Product.id.in_(union))} if union else {}
+    return [[rows[pid] for pid in ids if pid in rows] for ids in hits]
+
+
+def search_product_payloads_batch(
+    queries: Iterable[str], k: int = 5, filters: SearchFilters | None = None
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    `search_product_payloads` for many queries, yielded in order.
+
+    Queries are handled `SEARCH_BATCH_CHUNK` at a time, so memory stays flat
+    however many are streamed through.  Per chunk the queries are embedded
+    together and sent to Chroma as one multi-query request per distinct
+    `where` clause (filters parsed from the query text can differ), extra
+    lexical hits are fetched with one `get` and legacy entries are
+    hydrated with one SQL statement.  Blank queries yield `[]`.
+    """
+    categories = known_categories()
+    col = get_collection(_COLLECTION)
+    lexical = lexical_index(_COLLECTION)
+    queries = iter(queries)
+    while True:
+        chunk = list(islice(queries, max(settings.SEARCH_BATCH_CHUNK, 1)))
+        if not chunk:
+            return
+        yield from _search_chunk(col, lexical, chunk, k, filters, categories)
+
+
+def _search_chunk(col, lexical, chunk: List[str], k, filters, categories) -> List[List[Dict[str, Any]]]:
+    live = [i for i, q in enumerate(chunk) if q.strip()]
+    plans = {i: _plan(chunk[i], k, filters, categories) for i in live}
+
+    groups: Dict[Tuple[str, int], List[int]] = {}
+    for i in live:
+        _, parsed, n = plans[i]
+        groups.setdefault((json.dumps(parsed.where(), sort_keys=True), n), []).append(i)
+    hits: Dict[int, Tuple[List[str], Dict[str, Dict[str, Any]]]] = {}
+    for (_, n), members in groups.items():
+        texts = [plans[i][0] or chunk[i] for i in members]
+        where = plans[members[0]][1].where()
+        res = col.query(**_queries_input(col, texts), n_results=n, where=where, include=["metadatas"])
+        for j, i in enumerate(members):
+            hits[i] = _vector_hits(res, j)
+
+    lexical_ids = {i: [pid for pid, _ in lexical.search(chunk[i], plans[i][2])] for i in live}
+    extra = sorted({pid for i in live for pid in lexical_ids[i] if pid not in hits[i][1]})
+    if extra:
+        got = col.get(ids=extra, include=["metadatas"])
+        found = dict(zip(got["ids"], got["metadatas"]))
+        for i in live:
+            hits[i][1].update((pid, found[pid]) for pid in lexical_ids[i] if pid in found)
+
+    out: List[List[Dict[str, Any]]] = [[] for _ in chunk]
+    pending: List[int] = []
+    fused = []
+    for i in live:
+        ids, payloads = _fuse(chunk[i], k, plans[i][1], hits[i][0], lexical_ids[i], hits[i][1])
+        if ids is None:
+            out[i] = payloads
+        else:
+            pending.append(i)
+            fused.append((ids, payloads))
+    if fused:
+        for i, payloads in zip(pending, _hydrate_legacy_many(fused)):
+            out[i] = payloads
+    return out
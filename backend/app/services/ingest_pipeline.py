@@ -0,0 +1,177 @@
+"""
+Streaming, batched embedding pipeline for knowledge-base ingestion.
+
+    docs (lazy) ─▶ token-budgeted batches ─▶ N embedding workers ─▶ chunked writes
+
+* Documents are pulled from an iterator, so the corpus never has to fit in
+  memory at once.
+* Batches are capped by an estimated token budget *and* a document count,
+  matching what batch embedding endpoints accept.
+* Up to `workers` batches are embedded concurrently (bounded look-ahead);
+  the calling thread writes finished batches in fixed-size chunks while the
+  next ones are still being embedded.
+* Embedding calls go through a client-side rate limiter and are retried
+  with exponential back-off (rate-limit / transient errors).
+* Each chunk is written as soon as it is ready, so a crashed run keeps
+  everything written so far – the caller skips those ids next time.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Sequence
+
+log = logging.getLogger(__name__)
+
+__all__ = ["Doc", "RateLimiter", "embed_with_backoff", "estimate_tokens", "run_pipeline", "token_batches"]
+
+BatchEmbedder = Callable[[List[str]], Sequence[Sequence[float]]]
+Writer = Callable[[List[str], List[str], List[Dict[str, Any]], List[Any]], None]
+
+
+class Doc(NamedTuple):
+    id: str
+    text: str
+    metadata: Dict[str, Any]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English)."""
+    return max(1, len(text) // 4)
+
+
+def token_batches(docs: Iterable[Doc], max_tokens: int, max_docs: int) -> Iterator[List[Doc]]:
+    """Group `docs` into batches under `max_tokens` and `max_docs`."""
+    batch: List[Doc] = []
+    tokens = 0
+    for doc in docs:
+        cost = estimate_tokens(doc.text)
+        if batch and (tokens + cost > max_tokens or len(batch) >= max_docs):
+            yield batch
+            batch, tokens = [], 0
+        batch.append(doc)
+        tokens += cost
+    if batch:
+        yield batch
+
+
+class RateLimiter:
+    """Spaces calls at least `1 / max_per_sec` apart across threads."""
+
+    def __init__(self, max_per_sec: float) -> None:
+        self._interval = 1.0 / max_per_sec if max_per_sec > 0 else 0.0
+        self._next_at = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self._interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_at - now
+            self._next_at = max(now, self._next_at) + self._interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+def embed_with_backoff(
+    embed: BatchEmbedder,
+    texts: List[str],
+    retries: int = 5,
+    base_delay: float = 0.5,
+    limiter: RateLimiter | None = None,
+) -> List[Any]:
+    """Call `embed(texts)`, retrying with exponential back-off + jitter."""
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            limiter.wait()
+        try:
+            return list(embed(texts))
+        except Exception as err:  # provider errors vary (429, timeouts, ...)
+            if attempt == retries:
+                raise
+            delay = base_delay * (2**attempt) + random.uniform(0, base_delay)
+            log.warning("Embedding batch failed (%s); retry %d in %.1fs", err, attempt + 1, delay)
+            time.sleep(delay)
+    raise AssertionError("unreachable")  # pragma: no cover
+
+
+def run_pipeline(
+    docs: Iterable[Doc],
+    embed: BatchEmbedder,
+    write: Writer,
+    *,
+    workers: int = 4,
+    batch_tokens: int = 8000,
+    batch_docs: int = 64,
+    write_chunk: int = 256,
+    retries: int = 5,
+    backoff: float = 0.5,
+    max_rps: float = 0.0,
+) -> Dict[str, float]:
+    """
+    Embed `docs` concurrently and hand them to `write` in chunks.
+
+    Returns a report with document / batch counts, elapsed seconds and
+    documents per second.
+    """
+    limiter = RateLimiter(max_rps)
+    started = time.perf_counter()
+    written = 0
+    n_batches = 0
+
+    ids: List[str] = []
+    texts: List[str] = []
+    metas: List[Dict[str, Any]] = []
+    vecs: List[Any] = []
+
+    def flush(force: bool = False) -> None:
+        nonlocal written, ids, texts, metas, vecs
+        while ids and (force or len(ids) >= write_chunk):
+            n = min(write_chunk, len(ids))
+            write(ids[:n], texts[:n], metas[:n], vecs[:n])
+            written += n
+            ids, texts, metas, vecs = ids[n:], texts[n:], metas[n:], vecs[n:]
+
+    def collect(batch: List[Doc], fut: "Future[List[Any]]") -> None:
+        embedded = fut.result()
+        ids.extend(d.id for d in batch)
+        texts.extend(d.text for d in batch)
+        metas.extend(d.metadata for d in batch)
+        vecs.extend(embedded)
+        flush()
+
+    in_flight: "deque[tuple[List[Doc], Future[List[Any]]]]" = deque()
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="embed") as pool:
+        try:
+            for batch in token_batches(docs, batch_tokens, batch_docs):
+                n_batches += 1
+                fut = pool.submit(
+                    embed_with_backoff, embed, [d.text for d in batch], retries, backoff, limiter
+                )
+                in_flight.append((batch, fut))
+                if len(in_flight) >= max(1, workers):
+                    collect(*in_flight.popleft())
+            while in_flight:
+                collect(*in_flight.popleft())
+            flush(force=True)
+        except BaseException:
+            for _, fut in in_flight:
+                fut.cancel()
+            try:  # keep what is already embedded so a re-run resumes later
+                flush(force=True)
+            except Exception:  # noqa: BLE001 – the original error matters more
+                log.exception("Could not flush embedded documents after failure")
+            raise
+
+    elapsed = time.perf_counter() - started
+    return {
+        "documents": written,
+        "batches": n_batches,
+        "seconds": elapsed,
+        "docs_per_sec": written / elapsed if elapsed > 0 else 0.0,
+    }
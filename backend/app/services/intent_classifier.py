@@ -0,0 +1,287 @@
+"""
+Local fast-path intent classifier for the agent router.
+
+Decides `search` / `fallback` / `support` without an LLM round-trip:
+
+  1. rules for unambiguous phrases ("return policy", "track my order",
+     "recommendations", "under $50") – if exactly one label's rules fire,
+     done;
+  2. a multinomial logistic-regression model over hashed word uni/bi-grams
+     and character tri-grams, trained in-process (a few ms) from the seed
+     examples below plus any JSONL file of `{"query": ..., "label": ...}`
+     rows pointed to by `INTENT_TRAINING_PATH`.  Broad keywords ("track",
+     "payment", "popular", "ideas") only nudge its scores: "track pants"
+     or "popular running shoes" are product searches.  Trained with L2
+     weight decay; its softmax temperature is fitted on out-of-fold
+     predictions so confidences are not saturated.
+
+`classify()` returns `None` – the caller then asks the LLM – when no single
+rule fires and either the model tier is off (`INTENT_MODEL_FAST_PATH`, the
+default: a few dozen seed rows do not generalise well enough to overrule
+the LLM) or the model's confidence is below `INTENT_CONFIDENCE_THRESHOLD`.
+"""
+from __future__ import annotations
+
+import json
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+__all__ = ["Intent", "IntentClassifier", "LABELS", "default_examples", "load_examples"]
+
+LABELS: Tuple[str, ...] = ("search", "fallback", "support")
+
+_RULES: Dict[str, re.Pattern] = {
+    "support": re.compile(
+        r"\b(refunds?|refunded|return polic(y|ies)|(shipping|warranty|exchange) policy|"
+        r"(track|where is|cancel|status of) (my |the |an? )?(order|package|parcel|delivery|shipment)|tracking number|"
+        r"my order|order status|return (an|my|this) (item|order|product))\b"
+    ),
+    "fallback": re.compile(r"\b(recommendations?|what do you recommend|what should i (buy|get)|surprise me)\b"),
+    "search": re.compile(r"\b(under|below|cheaper than|less than)\s+\$\s?\d+"),
+}
+
+# Keywords that lean towards a label but also appear in product names
+# ("track pants", "payment card holder"); added to the model's logits.
+_HINTS: Dict[str, re.Pattern] = {
+    "support": re.compile(
+        r"\b(returns?|returning|shipping|shipped|deliver\w*|warrant\w*|cancel\w*|"
+        r"exchange\w*|polic(y|ies)|invoice|payment|damaged|broken)\b"
+    ),
+    "fallback": re.compile(
+        r"\b(recommend\w*|suggest\w*|ideas?|inspir\w*|popular|best[- ]?sell\w*|trending)\b"
+    ),
+}
+_HINT_WEIGHT = 1.0
+
+_L2 = 0.01  # weight decay per epoch (× learning rate)
+_FOLDS = 5  # cross-validation folds for the temperature fit
+_TEMPERATURES = tuple(float(t) for t in np.geomspace(0.5, 20.0, 40))
+
+_SEED_EXAMPLES: List[Tuple[str, str]] = [
+    # search – looking for products by keyword
+    ("shirt", "search"),
+    ("blue jeans", "search"),
+    ("running shoes size 42", "search"),
+    ("leather wallet", "search"),
+    ("show me ceramic mugs", "search"),
+    ("do you have wireless mice", "search"),
+    ("find a cotton t-shirt", "search"),
+    ("looking for a desk lamp", "search"),
+    ("red dress", "search"),
+    ("men's backpack", "search"),
+    ("gold bracelet for women", "search"),
+    ("laptop sleeve 15 inch", "search"),
+    ("cheap headphones", "search"),
+    ("waterproof jacket", "search"),
+    ("sneakers", "search"),
+    ("best selling coffee maker", "search"),
+    ("popular hiking backpacks", "search"),
+    ("top rated bluetooth speaker", "search"),
+    ("athletic track jacket", "search"),
+    ("running track shorts", "search"),
+    ("leather card holder", "search"),
+    ("silver heart pendant", "search"),
+    # fallback – wants suggestions / recommendations
+    ("give me some recommendations", "fallback"),
+    ("what do you recommend", "fallback"),
+    ("suggest something nice", "fallback"),
+    ("any gift ideas for my dad", "fallback"),
+    ("what is popular right now", "fallback"),
+    ("show me your best sellers", "fallback"),
+    ("surprise me", "fallback"),
+    ("i don't know what to buy", "fallback"),
+    ("what's trending", "fallback"),
+    ("help me pick a present", "fallback"),
+    ("anything you would suggest", "fallback"),
+    ("top picks for me", "fallback"),
+    # support – shipping, returns, warranty, orders
+    ("what is the return policy", "support"),
+    ("how long does shipping take", "support"),
+    ("how do i return an item", "support"),
+    ("where is my order", "support"),
+    ("can i get a refund", "support"),
+    ("my package arrived damaged", "support"),
+    ("how do i cancel my order", "support"),
+    ("do you ship internationally", "support"),
+    ("what does the warranty cover", "support"),
+    ("how can i track my parcel", "support"),
+    ("i was charged twice", "support"),
+    ("how do i change my delivery address", "support"),
+    ("contact customer service", "support"),
+    ("how long do refunds take", "support"),
+]
+
+_WORD_RE = re.compile(r"[a-z0-9$']+")
+
+
+class Intent(NamedTuple):
+    label: str
+    confidence: float
+    source: str  # "rule" | "model"
+
+
+def load_examples(path: str | Path) -> List[Tuple[str, str]]:
+    """Read `{"query"|"text": ..., "label"|"tool": ...}` JSON lines."""
+    out: List[Tuple[str, str]] = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            text = row.get("query") or row.get("text")
+            label = row.get("label") or row.get("tool")
+            if text and label in LABELS:
+                out.append((text, label))
+    return out
+
+
+class IntentClassifier:
+    """Rules first, then a hashed n-gram linear model; thread-safe."""
+
+    def __init__(
+        self,
+        examples: Optional[Iterable[Tuple[str, str]]] = None,
+        threshold: Optional[float] = None,
+        n_features: int = 1 << 14,
+        epochs: int = 40,
+        use_model: Optional[bool] = None,
+    ) -> None:
+        self.threshold = settings.INTENT_CONFIDENCE_THRESHOLD if threshold is None else threshold
+        self.use_model = settings.INTENT_MODEL_FAST_PATH if use_model is None else use_model
+        self._examples = list(_SEED_EXAMPLES if examples is None else examples)
+        self._dim = n_features
+        self._epochs = epochs
+        self._weights: Optional[np.ndarray] = None  # (labels, n_features)
+        self._bias = np.zeros(len(LABELS), dtype=np.float32)
+        self._temperature = 1.0
+        self._train_lock = threading.Lock()
+        self._counts = {"rule": 0, "model": 0, "llm": 0}
+
+    # ------------------------------------------------------------------#
+    # Features & model
+    # ------------------------------------------------------------------#
+    def _features(self, text: str) -> np.ndarray:
+        words = _WORD_RE.findall(text.lower())
+        grams = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for w in words:
+            padded = f"#{w}#"
+            grams.extend(padded[i : i + 3] for i in range(len(padded) - 2))
+        return np.unique(
+            np.fromiter((zlib.crc32(g.encode()) % self._dim for g in grams), dtype=np.int64)
+        )
+
+    def _ensure_trained(self) -> np.ndarray:
+        if self._weights is not None:
+            return self._weights
+        with self._train_lock:
+            if self._weights is None:
+                feats = [self._features(t) for t, _ in self._examples]
+                targets = [LABELS.index(label) for _, label in self._examples]
+                self._temperature = self._calibrate(feats, targets)
+                weights, self._bias = self._train(feats, targets)
+                self._weights = weights
+        return self._weights
+
+    def _train(self, feats: List[np.ndarray], targets: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """SGD on the L2-regularised softmax cross-entropy; deterministic order."""
+        weights = np.zeros((len(LABELS), self._dim), dtype=np.float32)
+        bias = np.zeros(len(LABELS), dtype=np.float32)
+        rng = np.random.default_rng(0)
+        lr = 0.5
+        for _ in range(self._epochs):
+            weights *= 1.0 - lr * _L2  # weight decay once per epoch (dense, cheap at this size)
+            for i in rng.permutation(len(feats)):
+                idx = feats[i]
+                probs = _softmax(weights[:, idx].sum(axis=1) + bias)
+                probs[targets[i]] -= 1.0
+                weights[:, idx] -= lr * probs[:, None]
+                bias -= lr * probs
+        return weights, bias
+
+    def _calibrate(self, feats: List[np.ndarray], targets: List[int]) -> float:
+        """
+        Softmax temperature that minimises the log-loss of out-of-fold
+        predictions, so confidences reflect accuracy on unseen queries.
+        """
+        folds = min(_FOLDS, len(feats))
+        if folds < 2 or len(set(targets)) < 2:
+            return 1.0
+        logits, truth = [], []
+        for fold in range(folds):
+            train = [i for i in range(len(feats)) if i % folds != fold]
+            weights, bias = self._train([feats[i] for i in train], [targets[i] for i in train])
+            for i in range(fold, len(feats), folds):
+                logits.append(weights[:, feats[i]].sum(axis=1) + bias)
+                truth.append(targets[i])
+        z, y = np.array(logits), np.array(truth)
+
+        def loss(t: float) -> float:
+            scaled = z / t
+            scaled -= scaled.max(axis=1, keepdims=True)
+            log_probs = scaled - np.log(np.exp(scaled).sum(axis=1, keepdims=True))
+            return float(-log_probs[np.arange(len(y)), y].mean())
+
+        return min(_TEMPERATURES, key=loss)
+
+    def _logits(self, text: str) -> np.ndarray:
+        weights = self._ensure_trained()
+        lowered = text.lower()
+        hints = np.array([_HINT_WEIGHT * bool(rx.search(lowered)) if (rx := _HINTS.get(label)) else 0.0
+                          for label in LABELS], dtype=np.float32)
+        return weights[:, self._features(text)].sum(axis=1) + self._bias + hints
+
+    def predict_proba(self, text: str) -> np.ndarray:
+        """Calibrated model probabilities for `LABELS` (rules not applied, hints are)."""
+        return _softmax(self._logits(text) / self._temperature)
+
+    # ------------------------------------------------------------------#
+    # Public API
+    # ------------------------------------------------------------------#
+    def classify(self, text: str) -> Optional[Intent]:
+        """Return a confident `Intent`, or `None` to defer to the LLM."""
+        lowered = text.lower()
+        fired = [label for label, rx in _RULES.items() if rx.search(lowered)]
+        if len(fired) == 1:
+            self._counts["rule"] += 1
+            return Intent(fired[0], 1.0, "rule")
+
+        if self.use_model:
+            probs = self.predict_proba(text)
+            best = int(np.argmax(probs))
+            if probs[best] >= self.threshold:
+                self._counts["model"] += 1
+                return Intent(LABELS[best], float(probs[best]), "model")
+
+        self._counts["llm"] += 1
+        return None
+
+    def stats(self) -> Dict[str, float]:
+        total = sum(self._counts.values())
+        fast = self._counts["rule"] + self._counts["model"]
+        return {
+            "fast_path_rule": self._counts["rule"],
+            "fast_path_model": self._counts["model"],
+            "llm_fallback": self._counts["llm"],
+            "fast_path_ratio": fast / total if total else 0.0,
+            "threshold": self.threshold,
+        }
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    e = np.exp(z - z.max())
+    return e / e.sum()
+
+
+def default_examples() -> List[Tuple[str, str]]:
+    """Seed examples plus `INTENT_TRAINING_PATH` rows, if configured."""
+    examples = list(_SEED_EXAMPLES)
+    if settings.INTENT_TRAINING_PATH:
+        examples.extend(load_examples(settings.INTENT_TRAINING_PATH))
+    return examples
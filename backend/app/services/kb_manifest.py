@@ -0,0 +1,112 @@
+"""
+On-disk manifest of what has been ingested into the support KB.
+
+One JSON file maps each article (path relative to the KB root) to its
+content hash, mtime, size, article id and the vector ids written for it,
+plus the embedding model used.  `diff()` compares the manifest with the
+files on disk:
+
+  • mtime + size unchanged           → unchanged, file is not even read
+  • touched but same SHA-256         → unchanged (stat refreshed)
+  • different hash / new / new model → needs (re-)embedding
+  • in manifest but gone from disk   → removed
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pathlib
+from typing import Any, Dict, Iterable, List, NamedTuple
+
+__all__ = ["Manifest", "ManifestDiff", "file_sha256"]
+
+_VERSION = 1
+
+
+def file_sha256(path: pathlib.Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ManifestDiff(NamedTuple):
+    added: List[str]
+    changed: List[str]
+    removed: List[str]
+    unchanged: int
+    # rel path → {"sha256", "mtime", "size"} for every added/changed file
+    stats: Dict[str, Dict[str, Any]]
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def summary(self) -> str:
+        lines = [f"+ {p}" for p in self.added]
+        lines += [f"~ {p}" for p in self.changed]
+        lines += [f"- {p}" for p in self.removed]
+        lines.append(
+            f"{len(self.added)} added, {len(self.changed)} changed, "
+            f"{len(self.removed)} removed, {self.unchanged} unchanged"
+        )
+        return "\n".join(lines)
+
+
+class Manifest:
+    """JSON-backed record of ingested files (written atomically)."""
+
+    def __init__(self, path: pathlib.Path, model: str = "", files: Dict[str, Dict[str, Any]] | None = None):
+        self.path = path
+        self.model = model
+        self.files: Dict[str, Dict[str, Any]] = files or {}
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "Manifest":
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return cls(path)
+        if data.get("version") != _VERSION:
+            return cls(path)
+        return cls(path, data.get("model", ""), data.get("files", {}))
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(
+            json.dumps({"version": _VERSION, "model": self.model, "files": self.files}, indent=1),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+
+    def diff(self, root: pathlib.Path, files: Iterable[pathlib.Path], model: str) -> ManifestDiff:
+        """Compare the manifest with `files` (all under `root`)."""
+        same_model = model == self.model
+        added: List[str] = []
+        changed: List[str] = []
+        stats: Dict[str, Dict[str, Any]] = {}
+        unchanged = 0
+        seen = set()
+
+        for path in files:
+            rel = path.relative_to(root).as_posix()
+            seen.add(rel)
+            st = path.stat()
+            rec = self.files.get(rel)
+            if rec and same_model and rec["mtime"] == st.st_mtime and rec["size"] == st.st_size:
+                unchanged += 1
+                continue
+
+            sha = file_sha256(path)
+            if rec and same_model and rec["sha256"] == sha:
+                rec.update(mtime=st.st_mtime, size=st.st_size)  # touched only
+                unchanged += 1
+                continue
+
+            stats[rel] = {"sha256": sha, "mtime": st.st_mtime, "size": st.st_size}
+            (changed if rec else added).append(rel)
+
+        removed = sorted(set(self.files) - seen)
+        return ManifestDiff(added, changed, removed, unchanged, stats)
@@ -0,0 +1,168 @@
+"""
+Structured product-search filters (category, price range).
+
+`SearchFilters` turns into a Chroma `where` clause over the `category_key`
+(lower-cased category) and `price` metadata written by the indexer, so the
+vector store only ranks candidates that can actually be returned.  Filters
+come from request parameters (`from_mapping`) or are pulled out of free
+text by `extract_filters`:
+
+    "running shoes under $50"        → max_price 50
+    "mugs between 5 and 15 dollars"  → min_price 5, max_price 15
+    "electronics over $100"          → category "electronics", min_price 100
+
+Only amounts with a currency marker ("$", "dollars", "usd", "bucks") are
+prices: "laptop under 2kg", "tv from 2020" or "toys for kids under 10" are
+left alone, and numbers followed by a unit ("256GB", "27 inch") never
+count even with a marker nearby.  Price phrases are removed from the text
+that gets embedded; category words are kept since they still carry
+meaning for the ranking.
+"""
+from __future__ import annotations
+
+import math
+import re
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+__all__ = ["SearchFilters", "extract_filters"]
+
+_UNIT = (
+    r'(?:"|(?:kgs?|grams?|lbs?|pounds?|oz|gb|tb|mb|mah|mp|hz|watts?|inch(?:es)?|cm|mm|ft|feet|ml'
+    r"|pcs|pieces?|packs?|years?|yrs?|months?|k)\b)"
+)
+# (prefix marker, amount, suffix marker): an amount is a price when either marker is set
+_NUM = rf"(\$\s*)?(\d+(?:\.\d+)?)(?![\d.])(?!\s*{_UNIT})\s*(\$|(?:dollars?|usd|bucks)\b)?"
+_BETWEEN_RE = re.compile(rf"\b(?:between|from)\s+{_NUM}\s*(?:and|to|-)\s*{_NUM}", re.I)
+_RANGE_RE = re.compile(rf"(\$\s*)(\d+(?:\.\d+)?)(?![\d.])()\s*(?:-|to)\s*{_NUM}", re.I)
+_MAX_RE = re.compile(
+    rf"(?:\b(?:under|below|less than|cheaper than|up to|at most|no more than|max(?:imum)?)|<)\s*{_NUM}", re.I
+)
+_MIN_RE = re.compile(rf"(?:\b(?:over|above|more than|at least|min(?:imum)?|from)|>)\s*{_NUM}", re.I)
+_WORD_RE = re.compile(r"[a-z0-9']+")
+
+
+class SearchFilters(NamedTuple):
+    category: Optional[str] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+
+    def __bool__(self) -> bool:
+        return any(v is not None for v in self)
+
+    @classmethod
+    def from_mapping(cls, data: Mapping[str, Any]) -> "SearchFilters":
+        """Build from request args / JSON; raises `ValueError` on bad values."""
+        if not isinstance(data, Mapping):
+            raise ValueError("filters must be an object")
+
+        def price(key: str) -> Optional[float]:
+            raw = data.get(key)
+            if raw is None or raw == "":
+                return None
+            if isinstance(raw, bool) or not isinstance(raw, (int, float, str)):
+                raise ValueError(f"{key} must be a number")
+            value = float(raw)
+            if not math.isfinite(value) or value < 0:
+                raise ValueError(f"{key} must be a finite number >= 0")
+            return value
+
+        raw_category = data.get("category")
+        if raw_category is not None and not isinstance(raw_category, str):
+            raise ValueError("category must be a string")
+        category = (raw_category or "").strip().lower() or None
+        return cls(category, price("min_price"), price("max_price"))
+
+    def merged(self, fallback: "SearchFilters") -> "SearchFilters":
+        """Fields of `self`, with unset ones taken from `fallback`."""
+        return SearchFilters(*(a if a is not None else b for a, b in zip(self, fallback)))
+
+    def where(self) -> Optional[Dict[str, Any]]:
+        """Chroma `where` clause (None when nothing is filtered)."""
+        clauses = []
+        if self.category is not None:
+            clauses.append({"category_key": {"$eq": self.category}})
+        if self.min_price is not None:
+            clauses.append({"price": {"$gte": self.min_price}})
+        if self.max_price is not None:
+            clauses.append({"price": {"$lte": self.max_price}})
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def matches(self, product: Mapping[str, Any]) -> bool:
+        """Same predicate as `where()`, for product dicts."""
+        if self.category is not None and (product.get("category") or "").lower() != self.category:
+            return False
+        price = float(product.get("price") or 0)
+        if self.min_price is not None and price < self.min_price:
+            return False
+        if self.max_price is not None and price > self.max_price:
+            return False
+        return True
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {k: v for k, v in self._asdict().items() if v is not None}
+
+
+def _stem(word: str) -> str:
+    return word[:-1] if len(word) > 3 and word.endswith("s") else word
+
+
+def _find_category(text: str, categories: Iterable[str]) -> Optional[str]:
+    words = [_stem(w) for w in _WORD_RE.findall(text.lower())]
+    best: Optional[str] = None
+    for category in categories:
+        target = [_stem(w) for w in _WORD_RE.findall(category.lower())]
+        n = len(target)
+        if n and any(words[i : i + n] == target for i in range(len(words) - n + 1)):
+            if best is None or len(category) > len(best):  # most specific wins
+                best = category
+    return best
+
+
+def _prices(m: re.Match) -> Optional[List[float]]:
+    """Amounts of `m`, or None when none of them carries a currency marker."""
+    groups = m.groups()
+    triples = [groups[i : i + 3] for i in range(0, len(groups), 3)]
+    if not any(pre or post for pre, _, post in triples):
+        return None
+    return [float(amount) for _, amount, _ in triples]
+
+
+def _search(regex: re.Pattern, text: str) -> Tuple[Optional[re.Match], List[float]]:
+    """First match of `regex` in `text` that is a price."""
+    for m in regex.finditer(text):
+        prices = _prices(m)
+        if prices is not None:
+            return m, prices
+    return None, []
+
+
+def extract_filters(query: str, categories: Iterable[str] = ()) -> Tuple[str, SearchFilters]:
+    """
+    Pull price bounds and a known category out of `query`.
+
+    Returns the query with the price phrases removed and the filters found.
+    """
+    lo: Optional[float] = None
+    hi: Optional[float] = None
+    text = query
+
+    for regex in (_BETWEEN_RE, _RANGE_RE):
+        m, prices = _search(regex, text)
+        if m:
+            lo, hi = sorted(prices)
+            text = text[: m.start()] + text[m.end() :]
+            break
+    else:
+        m, prices = _search(_MAX_RE, text)
+        if m:
+            hi = prices[0]
+            text = text[: m.start()] + text[m.end() :]
+        m, prices = _search(_MIN_RE, text)
+        if m:
+            lo = prices[0]
+            text = text[: m.start()] + text[m.end() :]
+
+    category = _find_category(text, categories)
+    return " ".join(text.split()), SearchFilters(category and category.lower(), lo, hi)
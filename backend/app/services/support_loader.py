@@ -1,17 +1,60 @@
-"""Load Markdown docs into the support knowledge-base Chroma collection."""
+"""
+Load Markdown docs into the support knowledge-base Chroma collection.
+
+Ingestion is incremental.  A manifest (`kb_manifest.Manifest`) records the
+SHA-256, mtime and size of every article together with the vector ids
+written for it, so a run only
+
+  • embeds files that are new or whose content hash changed,
+  • deletes the old vectors of changed files and of files removed from disk,
+  • leaves unchanged files alone – they are neither read nor sent to Chroma.
+
+The BM25 index of the collection (`lexical_index`) and its IVF vector
+index (`ann_index`) are maintained alongside: stale ids are dropped from
+them and every written passage is added.
+
+Changing the embedding model or the chunking settings invalidates every
+entry.  The manifest is updated as each article's vectors land and saved
+every few seconds (and when the run ends, crash or not), so a run that
+crashed half-way resumes where it stopped.
+
+Articles are streamed through `ingest_pipeline.run_pipeline`: read lazily,
+embedded in token-budgeted batches by a bounded worker pool and written to
+Chroma chunk by chunk.  With `SUPPORT_CHUNKING` on, each article is split by
+`chunker.split_markdown` into heading-aware passages stored as
+`<article id>#<n>`, each carrying the article's metadata plus `parent_id`,
+`source`, `heading` and `chunk`.
+
+    python -m app.services.support_loader             # sync once
+    python -m app.services.support_loader --dry-run   # print the diff only
+    python -m app.services.support_loader --watch     # poll and re-sync
+"""
 from __future__ import annotations
 
+import argparse
 import hashlib
+import logging
+import os
 import pathlib
-from typing import List, Dict
+import time
+from typing import Any, Dict, Iterator, List, Tuple
 
 import frontmatter
+from app.config import settings
+from app.core.ann_index import IVFIndex, ann_path
+from app.core.lexical_index import BM25Index, index_path
 from app.core.llm import EmbeddingModel
-from app.core.vector_store import get_collection
+from app.core.vector_store import bump_generation, get_collection, local_data_dir
+from app.services.chunker import split_markdown
+from app.services.ingest_pipeline import Doc, run_pipeline
+from app.services.kb_manifest import Manifest, ManifestDiff
 
 # --------------------------------------------------------------------------- #
 _KB_PATH = pathlib.Path(__file__).parents[2] / "data" / "support_kb"
 _EMBEDDER = EmbeddingModel()                     # deterministic stub
+_MANIFEST_SAVE_SECONDS = 5.0                     # checkpoint interval while writing
+
+log = logging.getLogger(__name__)
 
 
 def _first_h1(markdown: str) -> str | None:
@@ -22,49 +65,219 @@ def _first_h1(markdown: str) -> str | None:
     return None
 
 
-def _markdown_files() -> List[pathlib.Path]:
-    return sorted(_KB_PATH.rglob("*.md"))
+def _markdown_files() -> Iterator[pathlib.Path]:
+    """Walk `_KB_PATH` lazily (sorted per directory, so order is stable)."""
+    for root, dirs, files in os.walk(_KB_PATH):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(".md"):
+                yield pathlib.Path(root) / name
+
+
+def _manifest_path() -> pathlib.Path:
+    if settings.SUPPORT_MANIFEST_PATH:
+        return pathlib.Path(settings.SUPPORT_MANIFEST_PATH)
+    return local_data_dir() / "support_kb.manifest.json"
+
+
+def _index_signature() -> str:
+    """Everything that changes the stored vectors besides file content."""
+    if settings.SUPPORT_CHUNKING:
+        # "v2": body-less headings fold into the next passage (re-chunks old stores)
+        chunks = f"chunks:v2:{settings.SUPPORT_CHUNK_CHARS}/{settings.SUPPORT_CHUNK_OVERLAP}"
+    else:
+        chunks = "whole"
+    return f"{_EMBEDDER.model_name}|{chunks}"
+
+
+def _doc_id(md_file: pathlib.Path) -> str:
+    return hashlib.sha256(md_file.as_posix().encode()).hexdigest()[:16]
+
+
+def _passages(doc_id: str, md_file: pathlib.Path, body: str, meta: Dict[str, Any]) -> Iterator[Doc]:
+    """One `Doc` per chunk of the article, tagged with its parent."""
+    source = md_file.relative_to(_KB_PATH).as_posix()
+    for p in split_markdown(body, settings.SUPPORT_CHUNK_CHARS, settings.SUPPORT_CHUNK_OVERLAP):
+        yield Doc(
+            f"{doc_id}#{p.index}",
+            p.text,
+            {**meta, "parent_id": doc_id, "source": source, "heading": p.heading or "", "chunk": p.index},
+        )
+
+
+def _article_docs(md_file: pathlib.Path) -> List[Doc]:
+    doc_id = _doc_id(md_file)
+    content = md_file.read_text(encoding="utf-8")
+    fm = frontmatter.loads(content)
+    body = fm.content.strip()
+    meta = fm.metadata or {}
+
+    if "title" not in meta:
+        if (title := _first_h1(body)):
+            meta["title"] = title
 
+    if settings.SUPPORT_CHUNKING:
+        return list(_passages(doc_id, md_file, body, meta))
+    return [Doc(doc_id, body, meta)]
+
+
+# --------------------------------------------------------------------------- #
+# Sync
+# --------------------------------------------------------------------------- #
+def plan() -> Tuple[Manifest, ManifestDiff]:
+    """Load the manifest and diff it against the files on disk."""
+    manifest = Manifest.load(_manifest_path())
+    if manifest.files and get_collection("support_kb").count() == 0:
+        manifest.files.clear()  # store was wiped – the manifest is stale
+    return manifest, manifest.diff(_KB_PATH, _markdown_files(), _index_signature())
+
+
+def main(dry_run: bool = False) -> Dict[str, Any]:
+    """Bring the `support_kb` collection in line with the Markdown files."""
+    manifest, diff = plan()
+    counts = {
+        "added": len(diff.added),
+        "changed": len(diff.changed),
+        "removed": len(diff.removed),
+        "unchanged": diff.unchanged,
+    }
+    if dry_run or not diff:
+        print(diff.summary())
+        if not diff:
+            manifest.save()  # keep refreshed mtimes of touched-only files
+        return {**counts, "documents": 0, "batches": 0, "seconds": 0.0, "docs_per_sec": 0.0}
 
-def main() -> None:
-    """Idempotently ingest support articles into the `support_kb` collection."""
     collection = get_collection("support_kb")
+    signature = _index_signature()
+    adopting = not manifest.files  # store may predate the manifest
+
+    # forget changed / removed records before their vectors go, so a crash
+    # from here on leaves them to be re-embedded rather than looking unchanged
+    stale: List[str] = []
+    for rel in diff.changed + diff.removed:
+        stale.extend(manifest.files.pop(rel)["ids"])
+    manifest.model = signature
+    manifest.save()
+    if stale:
+        collection.delete(ids=stale)
+    if adopting and diff.added:
+        # rows written before the manifest existed: whole articles or passages
+        legacy = [_doc_id(_KB_PATH / rel) for rel in diff.added]
+        collection.delete(ids=legacy)
+        collection.delete(where={"parent_id": {"$in": legacy}})
+
+    lexical = BM25Index.load(index_path("support_kb"))
+    if lexical is None:  # first run with lexical search – index what is stored
+        stored = collection.get(include=["documents"])
+        lexical = BM25Index.build(zip(stored["ids"], stored["documents"] or ()))
+    for doc_id in stale:
+        lexical.remove(doc_id)
 
-    # ------------------------------------------------------------------ FIX -- #
-    # Chroma always returns 'ids', so don't pass an include list containing
-    # 'ids' (that value is no longer accepted).
-    existing_ids: set[str] = set(collection.get()["ids"])
-    # ------------------------------------------------------------------------- #
-
-    new_docs: List[str] = []
-    new_ids:  List[str] = []
-    new_meta: List[Dict] = []
-
-    for md_file in _markdown_files():
-        content = md_file.read_text(encoding="utf-8")
-        fm = frontmatter.loads(content)
-        body = fm.content.strip()
-        meta = fm.metadata or {}
-
-        if "title" not in meta:
-            if (title := _first_h1(body)):
-                meta["title"] = title
-
-        doc_id = hashlib.sha256(md_file.as_posix().encode()).hexdigest()[:16]
-        if doc_id in existing_ids:
-            continue  # already stored
-
-        new_docs.append(body)
-        new_ids.append(doc_id)
-        new_meta.append(meta)
-
-    if new_docs:
-        embeddings = [_EMBEDDER.embed(t) for t in new_docs]  # type: ignore[arg-type]
-        collection.add(
-            ids=new_ids,
-            documents=new_docs,
-            metadatas=new_meta,
-            embeddings=embeddings,
+    ann = IVFIndex.load(ann_path("support_kb"))
+    if ann is not None:
+        ann.remove(stale)
+    if ann is None or ann.metric != settings.SUPPORT_RAG_METRIC or len(ann) != collection.count():
+        # missing, or out of sync with the store (e.g. wiped) – index what is stored
+        stored = collection.get(include=["embeddings"])
+        embeddings = stored["embeddings"] if stored["embeddings"] is not None else []
+        ann = IVFIndex.build(
+            stored["ids"], embeddings, metric=settings.SUPPORT_RAG_METRIC, nlist=settings.SUPPORT_ANN_NLIST
         )
 
-    print("✅  Support knowledge-base ingested.")
+    pending: Dict[str, int] = {}  # article id → vectors still to be written
+    last_save = time.monotonic()
+    records: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+
+    def docs() -> Iterator[Doc]:
+        for rel in diff.added + diff.changed:
+            article = _article_docs(_KB_PATH / rel)
+            doc_id = _doc_id(_KB_PATH / rel)
+            record = {**diff.stats[rel], "doc_id": doc_id, "ids": [d.id for d in article]}
+            if not article:  # empty file – nothing to embed
+                manifest.files[rel] = record
+                continue
+            pending[doc_id] = len(article)
+            records[doc_id] = (rel, record)
+            yield from article
+
+    def write(ids: List[str], texts: List[str], metas: List[Dict], embeddings: List) -> None:
+        nonlocal last_save
+        collection.upsert(ids=ids, documents=texts, metadatas=metas, embeddings=embeddings)
+        lexical.update(zip(ids, texts))
+        ann.add(ids, embeddings)
+        for i in ids:
+            parent = i.split("#", 1)[0]
+            pending[parent] -= 1
+            if not pending[parent]:
+                rel, record = records.pop(parent)
+                manifest.files[rel] = record
+        if time.monotonic() - last_save >= _MANIFEST_SAVE_SECONDS:  # rewriting it per chunk is O(n²)
+            manifest.save()
+            last_save = time.monotonic()
+
+    try:
+        report = run_pipeline(
+            docs(),
+            _EMBEDDER.embed_batch,
+            write,
+            workers=settings.INGEST_WORKERS,
+            batch_tokens=settings.INGEST_BATCH_TOKENS,
+            batch_docs=settings.INGEST_BATCH_DOCS,
+            write_chunk=settings.INGEST_WRITE_CHUNK,
+            retries=settings.INGEST_MAX_RETRIES,
+            max_rps=settings.INGEST_MAX_RPS,
+        )
+    finally:
+        manifest.save()
+        lexical.save(index_path("support_kb"))
+        ann.save(ann_path("support_kb"))
+        bump_generation("support_kb")  # readers swap to a fresh snapshot
+
+    print(
+        f"✅  Support knowledge-base synced: {counts['added']} added, {counts['changed']} changed, "
+        f"{counts['removed']} removed, {counts['unchanged']} unchanged – {report['documents']} docs "
+        f"embedded in {report['seconds']:.2f}s ({report['docs_per_sec']:.1f} docs/s)."
+    )
+    return {**counts, **report}
+
+
+def _tree_state() -> Tuple[Tuple[str, int, int], ...]:
+    """Cheap fingerprint of the KB tree: (path, mtime_ns, size) per file."""
+    out = []
+    for path in _markdown_files():
+        st = path.stat()
+        out.append((path.as_posix(), st.st_mtime_ns, st.st_size))
+    return tuple(out)
+
+
+def watch(interval: float | None = None) -> None:
+    """
+    Poll the KB directory and re-sync whenever a file changes (Ctrl-C stops).
+    A failed pass is logged and retried on the next poll.
+    """
+    interval = settings.SUPPORT_WATCH_INTERVAL if interval is None else interval
+    state = None
+    while True:
+        try:
+            current = _tree_state()
+            if current != state:
+                main()
+                state = current
+        except Exception:
+            log.exception("support KB sync failed; retrying in %.1fs", interval)
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Sync Markdown articles into the support_kb collection.")
+    ap.add_argument("--dry-run", action="store_true", help="print what would change and exit")
+    ap.add_argument("--watch", action="store_true", help="keep polling the KB directory")
+    ap.add_argument("--interval", type=float, default=None, help="poll interval in seconds")
+    args = ap.parse_args()
+    if args.watch:
+        try:
+            watch(args.interval)
+        except KeyboardInterrupt:
+            pass
+    else:
+        main(dry_run=args.dry_run)
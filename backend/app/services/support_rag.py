@@ -3,67 +3,162 @@ Simple RAG helper for support articles.
 
 Hybrid retrieval:
     • deterministic pseudo-embeddings  (keeps project offline-friendly)
-    • lexical keyword fallback         (guarantees obvious hits)
+      scored in one batch by `app.core.retrieval.VectorIndex`
+    • BM25 over the KB's inverted index (`app.core.lexical_index`), fused
+      with the vector ranking by reciprocal rank fusion
+    • the KB is held as a versioned in-memory snapshot, reloaded only after
+      `support_loader` bumps the collection generation; large KBs are
+      searched through its IVF index (`app.core.ann_index`)
+
+The KB holds either whole articles or heading-aware passages (see
+`support_loader`); for passages the answer is the matched passage itself.
 
 Public API
 ----------
 support_answer(query)  -> dict        (preferred name)
+asupport_answer(query) -> dict        (async variant for the ASGI app)
+support_answer_batch(queries) -> list (many queries, one embedding call)
 answer(query)          -> dict        (back-compat alias)
+snapshot_stats()       -> dict        (KB snapshot cache hits / reloads / size)
+answer_cache_stats()   -> dict        (support_answer response-cache hit ratio)
+preload()              -> None        (load the KB snapshot ahead of the first query)
+
+`support_answer` is memoised by a `ResponseCache` that is dropped whenever
+the support KB generation changes.  `support_answer_batch` (bulk jobs)
+bypasses that cache: it reads the snapshot once, embeds every query in one
+call and scores them with one matrix product.
 """
 
 from __future__ import annotations
 
-import math
-from typing import Any, Dict, List
+import asyncio
+from typing import Any, Dict, List, Sequence
 
+from app.config import settings
+from app.core.lexical_index import rrf
 from app.core.llm import EmbeddingModel
-from app.core.vector_store import get_collection
+from app.core.response_cache import ResponseCache
+from app.core.snapshot import Snapshot, SnapshotCache
+from app.services.chunker import strip_headings
 
 # --------------------------------------------------------------------------- #
-__all__ = ["support_answer", "answer"]  # <- both symbols are now public
+__all__ = [
+    "support_answer",
+    "asupport_answer",
+    "support_answer_batch",
+    "answer",
+    "snapshot_stats",
+    "answer_cache_stats",
+    "preload",
+]
 
 _EMBEDDER = EmbeddingModel()
 _COLLECTION_NAME = "support_kb"
+_SNAPSHOTS = SnapshotCache(_COLLECTION_NAME, metric=settings.SUPPORT_RAG_METRIC, lexical=True, ann=True)
+_ANSWERS = ResponseCache.from_settings(
+    "support_answer", depends_on=(_COLLECTION_NAME,), embed=_EMBEDDER.embed
+)
+
+
+def snapshot_stats() -> Dict[str, Any]:
+    """Hit / reload counters and size of the in-memory KB snapshot."""
+    return _SNAPSHOTS.stats()
 
 
-def _euclidean(a: List[float], b: List[float]) -> float:
-    return math.sqrt(sum((x - y) ** 2 for x, y in zip(a, b)))
+def answer_cache_stats() -> Dict[str, Any]:
+    """Hit ratio / size of the `support_answer` response cache."""
+    return _ANSWERS.stats()
 
 
-def _fetch_all() -> Dict[str, Any]:
-    col = get_collection(_COLLECTION_NAME)
-    return col.get(include=["documents", "embeddings", "metadatas"])
+def preload() -> None:
+    """Load the KB snapshot and embedding client now (startup warm-up)."""
+    _EMBEDDER.warm()
+    _SNAPSHOTS.get()
 
 
 def _retrieve(query: str, k: int = 3) -> List[Dict[str, Any]]:
-    store = _fetch_all()
-    if not store["documents"]:
+    return _retrieve_from(_SNAPSHOTS.get(), query, k)
+
+
+def _retrieve_from(snap: Snapshot, query: str, k: int = 3) -> List[Dict[str, Any]]:
+    if not len(snap):
         return []
+    return _fuse(snap, query, snap.search(_EMBEDDER.embed(query), _candidates(k)), k)
+
+
+def _retrieve_batch(queries: Sequence[str], k: int = 3) -> List[List[Dict[str, Any]]]:
+    snap = _SNAPSHOTS.get()
+    if not len(snap) or not queries:
+        return [[] for _ in queries]
+    tops = snap.search_many(_EMBEDDER.embed_batch(list(queries)), _candidates(k))
+    return [_fuse(snap, query, top, k) for query, top in zip(queries, tops)]
+
+
+def _candidates(k: int) -> int:
+    return max(k * 2, settings.HYBRID_CANDIDATES)
+
+
+def _fuse(snap: Snapshot, query: str, top, k: int) -> List[Dict[str, Any]]:
+    """Fuse the vector ranking `top` (snapshot positions) with BM25 for `query`."""
+    n = _candidates(k)
+    rankings, weights = [], []
+    if snap.lexical is not None:  # listed first: exact term matches win ties
+        rankings.append([snap.positions[doc_id] for doc_id, _ in snap.lexical.search(query, n)])
+        weights.append(settings.HYBRID_LEXICAL_WEIGHT)
+    rankings.append([int(i) for i in top])
+    weights.append(settings.HYBRID_VECTOR_WEIGHT)
 
-    q_emb = _EMBEDDER.embed(query)
-    scored = [
+    fused = rrf(rankings, weights, k=settings.HYBRID_RRF_K)[:k]
+    return [
         {
-            "document": d,
-            "metadata": m,
-            "score": _euclidean(q_emb, e),
+            "document": snap.documents[i],
+            "metadata": snap.metadatas[i],
+            "score": score,
         }
-        for d, e, m in zip(
-            store["documents"], store["embeddings"], store["metadatas"]
-        )
+        for i, score in fused
     ]
-    scored.sort(key=lambda x: x["score"])
-    candidates = scored[: k * 2]
 
-    q_tokens = {tok.lower() for tok in query.split()}
-    best: List[Dict[str, Any]] = [
-        item for item in candidates if any(t in item["document"].lower() for t in q_tokens)
-    ][:k]
 
-    return best or scored[:k]
+def _answer_text(doc: Dict[str, Any]) -> str:
+    """The matched passage itself, or the first paragraph of a whole article."""
+    text = doc["document"].strip()
+    if "parent_id" in (doc["metadata"] or {}):
+        return strip_headings(text)
+    return next((body for body in map(strip_headings, text.split("\n\n")) if body), "")
 
 
+def _article_text(parent_id: str) -> str:
+    """First non-empty passage of article `parent_id` in the current snapshot."""
+    snap = _SNAPSHOTS.get()
+    chunks = sorted(
+        (meta.get("chunk", 0), doc)
+        for doc, meta in zip(snap.documents, snap.metadatas)
+        if meta and meta.get("parent_id") == parent_id
+    )
+    return next((text for text in (strip_headings(doc) for _, doc in chunks) if text), "")
+
+
+def _best_answer(docs: List[Dict[str, Any]]) -> str:
+    """Text of the best hit that has a body; heading-only hits fall through."""
+    for doc in docs:
+        if text := _answer_text(doc):
+            return text
+    meta = docs[0]["metadata"] or {}
+    text = _article_text(meta["parent_id"]) if "parent_id" in meta else ""
+    return text or meta.get("title") or " ".join(docs[0]["document"].replace("#", " ").split())
+
+
+@_ANSWERS.memoize
 def support_answer(query: str) -> Dict[str, Any]:
-    docs = _retrieve(query)
+    return _answer_from(_retrieve(query))
+
+
+def support_answer_batch(queries: Sequence[str]) -> List[Dict[str, Any]]:
+    """`support_answer` for many queries, in order (not cached)."""
+    return [_answer_from(docs) for docs in _retrieve_batch(queries)]
+
+
+def _answer_from(docs: List[Dict[str, Any]]) -> Dict[str, Any]:
     if not docs:
         return {
             "answer": (
@@ -74,16 +169,25 @@ def support_answer(query: str) -> Dict[str, Any]:
             "sources": [],
         }
 
-    best_doc = docs[0]["document"].strip()
-    first_para = best_doc.split("\n\n", 1)[0].replace("\n", " ").strip()
-
     return {
-        "answer": first_para,
+        "answer": _best_answer(docs),
         "tool": "support",
         "sources": [d["metadata"] for d in docs],
     }
 
 
+async def asupport_answer(query: str) -> Dict[str, Any]:
+    """
+    Async `support_answer`.  The query embedding is fetched with the async
+    provider call and lands in the embedding cache; the rest (generation
+    checks, which may be registry round-trips, the answer cache and the
+    fusion) runs in a worker thread.
+    """
+    if settings.EMBED_CACHE_ENABLED:  # otherwise the sync path would re-embed
+        await _EMBEDDER.aembed(query)
+    return await asyncio.to_thread(support_answer, query)
+
+
 # --------------------------------------------------------------------------- #
 # Back-compat export expected by earlier phases/tests
 answer = support_answer
@@ -0,0 +1,73 @@
+"""
+Background warm-up of the lazily created singletons.
+
+The Chroma client, the LangGraph graphs, langchain's OpenAI wrappers and
+the support-KB snapshot are all built on first use, so a worker imports
+and starts serving `/api/health` quickly.  With `STARTUP_WARMUP` on, the
+app factories call `start()` once the app is created; a daemon thread then
+builds everything in turn, so the first real request usually finds it ready
+instead of paying for it.  A failing step is logged and skipped – the
+request path builds the same objects on demand anyway.
+
+`status()` (shown under `/api/stats`) reports per-step timings.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.config import settings
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_thread: threading.Thread | None = None
+_state: Dict[str, Any] = {"state": "idle", "steps": {}}
+
+
+def _steps() -> List[Tuple[str, Callable[[], Any]]]:
+    from app.core import vector_store
+    from app.services import agent_router, support_rag
+
+    return [
+        ("chroma", vector_store.client),
+        ("router", agent_router.warm),
+        ("support_kb", support_rag.preload),
+    ]
+
+
+def run() -> Dict[str, Any]:
+    """Build every singleton now, in this thread; returns `status()`."""
+    _state["state"] = "running"
+    for name, step in _steps():
+        t0 = time.perf_counter()
+        try:
+            step()
+        except Exception:  # best effort: the request path retries lazily
+            log.exception("warm-up step %s failed", name)
+            _state["steps"][name] = "failed"
+            continue
+        _state["steps"][name] = round((time.perf_counter() - t0) * 1000, 1)
+    _state["state"] = "done"
+    log.info("warm-up finished: %s", _state["steps"])
+    return status()
+
+
+def start() -> bool:
+    """Run the warm-up on a daemon thread (once per process, if enabled)."""
+    global _thread
+    if not settings.STARTUP_WARMUP:
+        return False
+    with _lock:
+        if _thread is not None:
+            return False
+        _thread = threading.Thread(target=run, name="warmup", daemon=True)
+        _thread.start()
+    return True
+
+
+def status() -> Dict[str, Any]:
+    """`{"state": idle|running|done, "steps": {name: ms or "failed"}}`."""
+    return {"state": _state["state"], "steps": dict(_state["steps"])}
@@ -0,0 +1,67 @@
+"""
+Shared helpers for the stand-alone benchmark scripts in `scripts/`.
+
+Importing this module puts `backend/` on `sys.path` (same trick as
+`tests/conftest.py`) so the scripts can `import app...` when run with
+`python -m scripts.<name>` from the project root.
+"""
+from __future__ import annotations
+
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT_DIR / "backend"
+
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of `samples` (pct in [0, 100])."""
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples_s: Sequence[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    ms = [s * 1000.0 for s in samples_s]
+    return {
+        "n": len(ms),
+        "mean_ms": statistics.fmean(ms) if ms else float("nan"),
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "p99_ms": percentile(ms, 99),
+    }
+
+
+def time_calls(fn: Callable[[], object], repeat: int, warmup: int = 3) -> List[float]:
+    """Run `fn` `repeat` times (after `warmup` untimed calls); return seconds."""
+    for _ in range(warmup):
+        fn()
+    samples: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def print_table(rows: List[Dict[str, object]], columns: Sequence[str]) -> None:
+    """Minimal fixed-width table printer (no third-party deps)."""
+    widths = {c: max(len(c), *(len(_fmt(r.get(c))) for r in rows)) for c in columns}
+    print("  ".join(c.rjust(widths[c]) for c in columns))
+    for r in rows:
+        print("  ".join(_fmt(r.get(c)).rjust(widths[c]) for c in columns))
+
+
+def _fmt(value: object) -> str:
+    if isinstance(value, float):
+        return f"{value:.3f}"
+    return "" if value is None else str(value)
@@ -0,0 +1,127 @@
+"""
+Support KB vector search: exact `VectorIndex` scan vs the IVF index per nprobe.
+
+    python -m scripts.bench_ann_index --n 100000 --dim 384 --nprobes 1,2,4,8,16,32,64
+    python -m scripts.bench_ann_index --spread 0.3   # barely clustered: hard for IVF
+
+A synthetic KB (vectors around random cluster centres) is indexed twice:
+`VectorIndex` as the exact baseline, and `IVFIndex` built from 90% of the
+vectors with the last 10% inserted incrementally in batches of `--batch`
+(the way `support_loader` feeds it), so recall covers inserted rows too.
+Queries are fresh draws from the same clusters.
+
+The first table has one row per method: recall@k against the exact top-k,
+query latency and the speed-up over the exact scan.  The second one
+reports the build, incremental-insert, save and load costs and the size
+of the persisted `.npz`.
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from scripts._bench import print_table, summarize, time_calls  # puts backend/ on sys.path
+
+from app.core.ann_index import IVFIndex  # noqa: E402
+from app.core.retrieval import VectorIndex  # noqa: E402
+
+
+def _sample(n: int, dim: int, clusters: int, rng: np.random.Generator, centers: np.ndarray) -> np.ndarray:
+    points = centers[rng.integers(0, clusters, n)] + rng.standard_normal((n, dim), dtype=np.float32)
+    return points.astype(np.float32)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--n", type=int, default=100_000, help="vectors in the KB")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--clusters", type=int, default=200)
+    ap.add_argument("--spread", type=float, default=0.5, help="scale of the cluster centres (noise = 1)")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--nprobes", default="1,2,4,8,16,32,64")
+    ap.add_argument("--nlist", type=int, default=0, help="IVF cells (0 = about sqrt(n))")
+    ap.add_argument("--batch", type=int, default=500, help="vectors per incremental insert")
+    ap.add_argument("--metric", default="l2", choices=["l2", "cosine"])
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    centers = args.spread * rng.standard_normal((args.clusters, args.dim)).astype(np.float32)
+    vectors = _sample(args.n, args.dim, args.clusters, rng, centers)
+    queries = _sample(args.queries, args.dim, args.clusters, rng, centers)
+    ids = [str(i) for i in range(args.n)]
+
+    exact = VectorIndex(vectors, metric=args.metric)
+    truth = [set(exact.search(q, args.k)[0].tolist()) for q in queries]
+    it = iter(np.resize(np.arange(args.queries), 10**6))
+    exact_stats = summarize(time_calls(lambda: exact.search(queries[next(it)], args.k), args.queries))
+
+    split = int(args.n * 0.9)
+    t0 = time.perf_counter()
+    ivf = IVFIndex.build(ids[:split], vectors[:split], metric=args.metric, nlist=args.nlist)
+    build_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for start in range(split, args.n, args.batch):
+        ivf.add(ids[start : start + args.batch], vectors[start : start + args.batch])
+    insert_s = time.perf_counter() - t0
+    inserts = -(-(args.n - split) // args.batch)
+
+    rows = [
+        {
+            "method": "exact",
+            "nprobe": "-",
+            f"recall@{args.k}": 1.0,
+            "p50_ms": exact_stats["p50_ms"],
+            "p95_ms": exact_stats["p95_ms"],
+            "speedup": 1.0,
+        }
+    ]
+    for nprobe in (int(p) for p in args.nprobes.split(",")):
+        found = [ivf.search(q, args.k, nprobe=nprobe)[0] for q in queries]
+        recall = np.mean([len({int(i) for i in f} & t) / args.k for f, t in zip(found, truth)])
+        it = iter(np.resize(np.arange(args.queries), 10**6))
+        stats = summarize(time_calls(lambda: ivf.search(queries[next(it)], args.k, nprobe=nprobe), args.queries))
+        rows.append(
+            {
+                "method": "ivf",
+                "nprobe": nprobe,
+                f"recall@{args.k}": float(recall),
+                "p50_ms": stats["p50_ms"],
+                "p95_ms": stats["p95_ms"],
+                "speedup": exact_stats["p50_ms"] / stats["p50_ms"],
+            }
+        )
+    print_table(rows, ["method", "nprobe", f"recall@{args.k}", "p50_ms", "p95_ms", "speedup"])
+    print()
+
+    with tempfile.TemporaryDirectory(prefix="bench-ann-") as tmp:
+        path = Path(tmp) / "kb.npz"
+        t0 = time.perf_counter()
+        ivf.save(path)
+        save_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        IVFIndex.load(path)
+        load_s = time.perf_counter() - t0
+        size_mib = path.stat().st_size / 2**20
+    print_table(
+        [
+            {
+                "vectors": args.n,
+                "cells": ivf.cells,
+                "build_s": build_s,
+                "insert_ms": insert_s * 1000.0 / inserts,
+                "save_s": save_s,
+                "load_s": load_s,
+                "file_mib": size_mib,
+            }
+        ],
+        ["vectors", "cells", "build_s", "insert_ms", "save_s", "load_s", "file_mib"],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Chat throughput under load: threaded Flask vs the async ASGI app.
+
+    python -m scripts.bench_asgi_load --requests 400 --concurrency 100 --latency 0.25
+
+Each app is served by a child process (this script with `--serve`) on a
+loopback port and driven by the same asyncio HTTP client with
+`--concurrency` requests in flight.  The LLM is a
+`FakeLLM` that waits `--latency` seconds per call (a blocking sleep in
+`stream`, an `asyncio.sleep` in `astream`), the local intent fast path and
+response cache are switched off, so every request pays one "LLM" round
+trip – the I/O-bound case the async mode is for.
+
+  flask   werkzeug handing requests to a fixed pool of `--threads` workers
+          (the gunicorn gthread model); throughput ≈ threads / latency
+  asgi    `app.asgi:app` under uvicorn, one event loop, no request threads
+
+Queries alternate between recommendation and support questions, so both
+the fallback and the support-RAG node are exercised.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import atexit
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts._bench import print_table, summarize  # puts backend/ on sys.path
+
+_TMP = tempfile.mkdtemp(prefix="bench-asgi-")
+atexit.register(shutil.rmtree, _TMP, True)
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP}/bench.db"
+os.environ["CHROMA_DATA"] = _TMP
+os.environ["INTENT_FAST_PATH"] = "false"
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+
+import aiohttp  # noqa: E402
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from werkzeug.serving import BaseWSGIServer  # noqa: E402
+
+from app.asgi import app as asgi_app  # noqa: E402
+from app.core.llm import FakeLLM  # noqa: E402
+from app.main import create_app  # noqa: E402
+from app.services import agent_router  # noqa: E402
+
+
+class _SlowLLM(FakeLLM):
+    """FakeLLM with a fixed per-call latency, blocking or awaited."""
+
+    def __init__(self, latency: float) -> None:
+        super().__init__()
+        self.latency = latency
+
+    def stream(self, messages):
+        time.sleep(self.latency)
+        yield from super().stream(messages)
+
+    async def astream(self, messages):
+        await asyncio.sleep(self.latency)
+        async for chunk in super().astream(messages):
+            yield chunk
+
+
+class _PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug server that hands requests to a fixed-size thread pool."""
+
+    def __init__(self, app, threads: int, port: int) -> None:
+        super().__init__("127.0.0.1", port, app)
+        self._pool = ThreadPoolExecutor(threads)
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve(kind: str, port: int, latency: float, threads: int) -> None:
+    """Child-process entry: run one server with the slow LLM until killed."""
+    agent_router._llm = _SlowLLM(latency)
+    if kind == "flask":
+        server = _PooledWSGIServer(create_app(), threads, port)
+        server.serve_forever()
+    else:
+        uvicorn.run(asgi_app, host="127.0.0.1", port=port, log_level="warning", lifespan="on")
+
+
+def _spawn(kind: str, args) -> tuple[str, subprocess.Popen]:
+    port = _free_port()
+    cmd = [
+        sys.executable, "-m", "scripts.bench_asgi_load", "--serve", kind, "--port", str(port),
+        "--latency", str(args.latency), "--threads", str(args.threads),
+    ]
+    proc = subprocess.Popen(cmd, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/api/health").status_code == 200:
+                return base_url, proc
+        except httpx.TransportError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError(f"{kind} server did not come up")
+
+
+async def _drive(base_url: str, n: int, concurrency: int):
+    queries = [
+        f"suggest a gift idea {i}" if i % 2 else f"how do returns work for order {i}" for i in range(n)
+    ]
+    gate = asyncio.Semaphore(concurrency)
+    samples, errors = [], 0
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(base_url, connector=connector) as client:
+
+        async def one(q: str) -> None:
+            nonlocal errors
+            async with gate:
+                t0 = time.perf_counter()
+                async with client.post("/api/chat", json={"query": q}) as resp:
+                    await resp.read()
+                samples.append(time.perf_counter() - t0)
+                errors += resp.status != 200
+
+        await one("suggest something to warm up")
+        samples.clear()
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(q) for q in queries))
+        wall = time.perf_counter() - t0
+    return samples, errors, wall
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--requests", type=int, default=400)
+    ap.add_argument("--concurrency", type=int, default=100)
+    ap.add_argument("--latency", type=float, default=0.25, help="seconds per fake LLM call")
+    ap.add_argument("--threads", type=int, default=16, help="Flask worker threads")
+    ap.add_argument("--serve", choices=("flask", "asgi"), help=argparse.SUPPRESS)
+    ap.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.serve:
+        return _serve(args.serve, args.port, args.latency, args.threads)
+
+    rows = []
+    for name in ("flask", "asgi"):
+        base_url, proc = _spawn(name, args)
+        try:
+            samples, errors, wall = asyncio.run(_drive(base_url, args.requests, args.concurrency))
+        finally:
+            proc.terminate()
+            proc.wait()
+        rows.append(
+            {
+                "server": name,
+                "workers": f"{args.threads} threads" if name == "flask" else "1 loop",
+                "concurrency": args.concurrency,
+                "errors": errors,
+                "req_per_s": len(samples) / wall,
+                **summarize(samples),
+            }
+        )
+
+    print_table(rows, ["server", "workers", "concurrency", "n", "errors", "req_per_s", "p50_ms", "p95_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Bulk product search: one `/api/search` request per query vs `/api/search/batch`.
+
+    python -m scripts.bench_batch_search --products 5000 --queries 2000
+
+Seeds a throw-away SQLite DB and Chroma store (under a temp dir) with a
+synthetic catalogue, then runs the same queries through the Flask test
+client twice: one GET per query, and a single POST to the NDJSON batch
+endpoint consumed line by line.  Reported per mode: wall time, queries per
+second and peak Python heap (tracemalloc) while serving.
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from scripts._bench import print_table  # puts backend/ on sys.path
+
+_TMP = tempfile.mkdtemp(prefix="bench-batch-")
+atexit.register(shutil.rmtree, _TMP, True)
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP}/bench.db"
+os.environ["CHROMA_DATA"] = _TMP
+
+from app.core import vector_store  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import create_app  # noqa: E402
+from app.services import indexer  # noqa: E402
+from app.services.data_loader import save_products  # noqa: E402
+from scripts.bench_search_hydration import _WORDS, _HashEF, _catalogue  # noqa: E402
+
+
+def _single(client, queries):
+    for q in queries:
+        client.get("/api/search", query_string={"q": q}).get_json()
+
+
+def _batch(client, queries):
+    resp = client.post("/api/search/batch", json={"queries": queries}, buffered=False)
+    for line in resp.response:
+        json.loads(line)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--products", type=int, default=5000)
+    ap.add_argument("--queries", type=int, default=2000)
+    args = ap.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    collection = vector_store._client.get_or_create_collection("products", embedding_function=_HashEF())
+    indexer.get_collection = lambda _name="products": collection
+    with SessionLocal() as db:
+        save_products(db, _catalogue(args.products))
+        indexer.build_product_index(db)
+
+    client = create_app().test_client()
+    rng = random.Random(1)
+    queries = [" ".join(rng.sample(_WORDS, 2)) for _ in range(args.queries)]
+    _single(client, queries[:20])  # warm caches / lexical index
+
+    rows = []
+    for mode, run in (("single", _single), ("batch", _batch)):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        run(client, queries)
+        wall = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rows.append(
+            {
+                "mode": mode,
+                "queries": args.queries,
+                "wall_s": wall,
+                "qps": args.queries / wall,
+                "peak_heap_mib": peak / 2**20,
+            }
+        )
+
+    print_table(rows, ["mode", "queries", "wall_s", "qps", "peak_heap_mib"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Per-row `session.merge` vs chunked native upsert for product loading.
+
+    python -m scripts.bench_bulk_upsert --rows 100000 --batch 1000
+
+Each mode loads the synthetic catalogue twice into a fresh SQLite file:
+once into an empty table (pure inserts) and once more on top (all updates).
+Pass `--url` to run against another database (the table is recreated).
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from scripts._bench import print_table, summarize  # puts backend/ on sys.path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.bulk_upsert import bulk_upsert
+from app.core.database import Base
+from app.models.product import Product
+
+_CATEGORIES = ["home", "clothing", "footwear", "accessories", "electronics"]
+
+
+def _catalogue(n: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(1, n + 1):
+        yield {
+            "id": i,
+            "title": f"Product {i}",
+            "description": f"Synthetic product number {i}",
+            "category": rng.choice(_CATEGORIES),
+            "price": round(rng.uniform(1, 500), 2),
+            "image": None,
+        }
+
+
+def _merge_loop(session, items) -> None:
+    """The previous `save_products` body."""
+    for item in items:
+        session.merge(
+            Product(
+                id=item["id"],
+                title=item["title"],
+                description=item.get("description"),
+                category=item.get("category"),
+                price=item.get("price", 0),
+                image=item.get("image"),
+            )
+        )
+    session.commit()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--batch", type=int, default=1000)
+    ap.add_argument("--url", default="")
+    args = ap.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("merge", "bulk"):
+            url = args.url or f"sqlite:///{Path(tmp) / f'{mode}.db'}"
+            engine = create_engine(url)
+            Base.metadata.drop_all(bind=engine, tables=[Product.__table__])
+            Base.metadata.create_all(bind=engine, tables=[Product.__table__])
+            session = sessionmaker(bind=engine)()
+
+            for phase, seed in (("insert", 0), ("update", 1)):
+                batches = []
+                t0 = time.perf_counter()
+                if mode == "merge":
+                    _merge_loop(session, _catalogue(args.rows, seed))
+                else:
+                    report = bulk_upsert(session, Product, _catalogue(args.rows, seed), batch_size=args.batch)
+                    session.commit()
+                    batches = report.batch_seconds
+                seconds = time.perf_counter() - t0
+                batch = summarize(batches)
+                rows.append(
+                    {
+                        "mode": mode,
+                        "phase": phase,
+                        "rows": args.rows,
+                        "seconds": seconds,
+                        "rows_per_s": args.rows / seconds,
+                        "batches": batch["n"],
+                        "batch_p50_ms": batch["p50_ms"],
+                        "batch_p99_ms": batch["p99_ms"],
+                    }
+                )
+                session.expunge_all()
+            session.close()
+            engine.dispose()
+
+    print_table(rows, ["mode", "phase", "rows", "seconds", "rows_per_s", "batches", "batch_p50_ms", "batch_p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Whole-article vs passage indexing for the support KB.
+
+    python -m scripts.bench_chunking --articles 200 --sections 8
+
+Builds both index modes in memory from a synthetic KB of long, multi-section
+articles (no Chroma needed) and reports index size, query latency and the
+answer hit-rate: the share of queries whose answer text contains the fact
+the query asks for.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from scripts._bench import print_table, summarize  # puts backend/ on sys.path
+
+from app.config import settings
+from app.core.lexical_index import BM25Index
+from app.core.llm import EmbeddingModel
+from app.core.retrieval import VectorIndex
+from app.core.snapshot import Snapshot
+from app.services.chunker import split_markdown
+from app.services.support_rag import _answer_text, _retrieve_from
+
+_TOPICS = ["returns", "shipping", "warranty", "payments", "exchanges", "gift cards", "pre-orders", "repairs"]
+_FILLER = (
+    "Our team reviews every request carefully and keeps you informed by email. "
+    "Please keep your receipt and order number at hand when contacting us. "
+)
+
+
+def _article(i: int, sections: int, rng: random.Random):
+    facts = []
+    parts = [f"# Help article {i}"]
+    for j in range(sections):
+        topic = _TOPICS[j % len(_TOPICS)]
+        code = f"{topic[:3].upper()}{rng.randint(1000, 9999)}"
+        facts.append((f"what is the {topic} reference code for article {i}", code))
+        parts.append(
+            f"## {topic.title()}\n\n{_FILLER * 3}\n\n"
+            f"The {topic} reference code for article {i} is {code}.\n\n{_FILLER * 2}"
+        )
+    return "\n\n".join(parts), facts
+
+
+def _snapshot(docs, metas, embedder) -> Snapshot:
+    vecs = embedder.embed_batch(docs)
+    ids = tuple(str(i) for i in range(len(docs)))
+    index = VectorIndex(vecs, metric=settings.SUPPORT_RAG_METRIC)
+    return Snapshot(0, ids, tuple(docs), tuple(metas), index, BM25Index.build(zip(ids, docs)))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--articles", type=int, default=100)
+    ap.add_argument("--sections", type=int, default=6)
+    ap.add_argument("--queries", type=int, default=200)
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    embedder = EmbeddingModel()
+    articles, facts = [], []
+    for i in range(args.articles):
+        body, f = _article(i, args.sections, rng)
+        articles.append(body)
+        facts.extend(f)
+    queries = rng.sample(facts, min(args.queries, len(facts)))
+
+    passages, passage_meta = [], []
+    for i, body in enumerate(articles):
+        for p in split_markdown(body, settings.SUPPORT_CHUNK_CHARS, settings.SUPPORT_CHUNK_OVERLAP):
+            passages.append(p.text)
+            passage_meta.append({"parent_id": str(i), "heading": p.heading or "", "chunk": p.index})
+
+    rows = []
+    for mode, docs, metas in (
+        ("whole-document", articles, [{"title": f"article {i}"} for i in range(len(articles))]),
+        ("passages", passages, passage_meta),
+    ):
+        t0 = time.perf_counter()
+        snap = _snapshot(docs, metas, embedder)
+        build_s = time.perf_counter() - t0
+
+        hits, samples = 0, []
+        for query, code in queries:
+            embedder.embed(query)  # keep embedding cost out of the scoring time
+            t0 = time.perf_counter()
+            found = _retrieve_from(snap, query)
+            answer = _answer_text(found[0]) if found else ""
+            samples.append(time.perf_counter() - t0)
+            hits += code in answer
+        rows.append(
+            {
+                "mode": mode,
+                "docs": len(snap),
+                "index_kb": snap.nbytes / 1024,
+                "build_s": build_s,
+                **summarize(samples),
+                "hit_rate": hits / len(queries),
+            }
+        )
+
+    print_table(rows, ["mode", "docs", "index_kb", "build_s", "p50_ms", "p99_ms", "hit_rate"])
+
+
+if __name__ == "__main__":
+    main()
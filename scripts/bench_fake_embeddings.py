@@ -0,0 +1,73 @@
+"""
+Offline embedding generator: reseeded `random` lists vs NumPy `Generator` rows.
+
+    python -m scripts.bench_fake_embeddings --sizes 1,8,64,256,1024
+
+  legacy   the previous `EmbeddingModel._fake`: reseed the global `random`
+           module with the SHA-256 and build a 1536-float list per text
+  numpy    `embeddings.fake_embeddings`: a PCG64 `Generator` per text
+           writing float32 straight into one preallocated matrix
+
+Reports the time per batch and per vector, and the peak memory allocated
+while producing one batch (tracemalloc), for each batch size.  The
+embedding cache is not involved – these are raw generator calls.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import random
+import tracemalloc
+from typing import Callable, List
+
+from scripts._bench import print_table, summarize, time_calls  # puts backend/ on sys.path
+
+from app.core.embeddings import FAKE_DIM, fake_embeddings  # noqa: E402
+
+
+def _legacy(texts: List[str]) -> List[List[float]]:
+    out = []
+    for text in texts:
+        random.seed(hashlib.sha256(text.encode()).digest())
+        out.append([random.random() for _ in range(FAKE_DIM)])
+    return out
+
+
+def _peak_bytes(fn: Callable[[List[str]], object], texts: List[str]) -> int:
+    tracemalloc.start()
+    try:
+        fn(texts)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", default="1,8,64,256,1024", help="comma-separated batch sizes")
+    ap.add_argument("--vectors", type=int, default=4096, help="approx. vectors generated per size")
+    args = ap.parse_args()
+
+    rows = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        repeat = max(3, args.vectors // size)
+        for name, fn in (("legacy", _legacy), ("numpy", fake_embeddings)):
+            batches = iter([[f"{name} {size} {r} {i}" for i in range(size)] for r in range(repeat + 3)])
+            stats = summarize(time_calls(lambda: fn(next(batches)), repeat))
+            rows.append(
+                {
+                    "impl": name,
+                    "batch": size,
+                    "n": stats["n"],
+                    "p50_ms": stats["p50_ms"],
+                    "p95_ms": stats["p95_ms"],
+                    "us_per_vec": stats["p50_ms"] * 1000.0 / size,
+                    "peak_kib": _peak_bytes(fn, [f"peak {i}" for i in range(size)]) / 1024.0,
+                }
+            )
+
+    print_table(rows, ["impl", "batch", "n", "p50_ms", "p95_ms", "us_per_vec", "peak_kib"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Support retrieval quality/latency: substring heuristic vs BM25 vs hybrid.
+
+    python -m scripts.bench_hybrid --docs 2000 --queries 300
+
+Builds a synthetic KB in memory (no Chroma needed): each document mixes
+common filler words with a few words specific to it, and each query asks
+for a document by two of its specific words wrapped in everyday phrasing.
+Reports hit@1, MRR@k and scoring latency for
+
+  substring   vector top-2k, then the old `any(token in doc)` filter
+  bm25        inverted-index BM25 alone
+  hybrid      vector + BM25 fused by reciprocal rank fusion (current path)
+
+With the default offline embedder the vector ranking carries no meaning;
+"hybrid" then shows that fusing it does not drown the lexical signal.  Set
+OPENAI_API_KEY for real embeddings.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from scripts._bench import print_table, summarize  # puts backend/ on sys.path
+
+from app.config import settings
+from app.core.lexical_index import BM25Index
+from app.core.llm import EmbeddingModel
+from app.core.retrieval import VectorIndex
+from app.core.snapshot import Snapshot
+from app.services.support_rag import _retrieve_from
+
+_PHRASES = ["how do I {} {}", "what is the {} {} policy", "where can I find {} and {}", "{} {} not working"]
+
+
+def _corpus(n_docs: int, rng: random.Random):
+    common = [f"w{i}" for i in range(400)]
+    docs, keys = [], []
+    for d in range(n_docs):
+        specific = [f"k{d}x{j}" for j in range(3)]
+        words = rng.choices(common, k=60) + specific * 2
+        rng.shuffle(words)
+        docs.append(" ".join(words))
+        keys.append(specific)
+    return docs, keys
+
+
+def _substring(snap: Snapshot, embedder, query: str, k: int):
+    """The retrieval heuristic this module replaced."""
+    top, _ = snap.index.search(embedder.embed(query), k * 2)
+    candidates = [int(i) for i in top]
+    q_tokens = {t.lower() for t in query.split()}
+    best = [i for i in candidates if any(t in snap.documents[i].lower() for t in q_tokens)][:k]
+    return best or candidates[:k]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--docs", type=int, default=2000)
+    ap.add_argument("--queries", type=int, default=300)
+    ap.add_argument("--k", type=int, default=3)
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    embedder = EmbeddingModel()
+    docs, keys = _corpus(args.docs, rng)
+    ids = tuple(str(i) for i in range(len(docs)))
+    vectors = embedder.embed_batch(docs)
+    lexical = BM25Index.build(zip(ids, docs))
+    metas = tuple({"i": i} for i in range(len(docs)))
+    snap = Snapshot(0, ids, tuple(docs), metas, VectorIndex(vectors, metric=settings.SUPPORT_RAG_METRIC), lexical)
+
+    targets = rng.sample(range(len(docs)), min(args.queries, len(docs)))
+    queries = [(rng.choice(_PHRASES).format(*rng.sample(keys[t], 2)), t) for t in targets]
+    for q, _ in queries:
+        embedder.embed(q)  # warm the embedding cache: time scoring only
+
+    modes = {
+        "substring": lambda q: _substring(snap, embedder, q, args.k),
+        "bm25": lambda q: [snap.positions[d] for d, _ in lexical.search(q, args.k)],
+        "hybrid": lambda q: [r["metadata"]["i"] for r in _retrieve_from(snap, q, args.k)],
+    }
+    rows = []
+    for mode, fn in modes.items():
+        samples, hits, rr = [], 0, 0.0
+        for q, target in queries:
+            t0 = time.perf_counter()
+            found = fn(q)
+            samples.append(time.perf_counter() - t0)
+            hits += bool(found) and found[0] == target
+            rr += 1.0 / (found.index(target) + 1) if target in found else 0.0
+        rows.append(
+            {
+                "mode": mode,
+                "docs": len(docs),
+                "hit@1": hits / len(queries),
+                f"mrr@{args.k}": rr / len(queries),
+                **summarize(samples),
+            }
+        )
+
+    print_table(rows, ["mode", "docs", "hit@1", f"mrr@{args.k}", "p50_ms", "p95_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
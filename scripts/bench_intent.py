@@ -0,0 +1,109 @@
+"""
+Offline accuracy / latency of the intent fast path vs the LLM classifier.
+
+    python -m scripts.bench_intent
+    python -m scripts.bench_intent --llm-latency-ms 400 --data labelled.jsonl
+
+Four strategies are scored on a held-out labelled set:
+  • llm        – `ask_llm` with the fast path disabled (FakeLLM offline)
+  • classifier – `IntentClassifier` alone (rules + model, never defers)
+  • rules      – the default fast path: rules, LLM for everything else
+  • hybrid     – `INTENT_MODEL_FAST_PATH=true`: rules + model, LLM when unsure
+`--llm-latency-ms` adds a sleep per LLM call to mimic a real round-trip.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from scripts._bench import print_table, summarize  # puts backend/ on sys.path
+
+from app.core.llm import FakeLLM
+from app.services import agent_router
+from app.services.intent_classifier import IntentClassifier, default_examples, load_examples
+
+_HELD_OUT = [
+    ("wool scarf", "search"),
+    ("black leather boots", "search"),
+    ("usb-c charger", "search"),
+    ("ceramic coffee mug", "search"),
+    ("do you sell yoga mats", "search"),
+    ("kids rain boots", "search"),
+    ("shoes under $50", "search"),
+    ("silver necklace", "search"),
+    ("what would you suggest for a birthday", "fallback"),
+    ("recommend me a good jacket", "fallback"),
+    ("what are your most popular items", "fallback"),
+    ("i need ideas for a gift", "fallback"),
+    ("what should i buy my sister", "fallback"),
+    ("surprise me with something", "fallback"),
+    ("how do i send back a jacket", "support"),
+    ("when will my package arrive", "support"),
+    ("is there a warranty on electronics", "support"),
+    ("i want my money back", "support"),
+    ("can i change my shipping address", "support"),
+    ("my order never arrived", "support"),
+    ("what is your refund policy", "support"),
+    ("how much does delivery cost", "support"),
+]
+
+
+class _SlowLLM(FakeLLM):
+    def __init__(self, latency_s: float):
+        super().__init__()
+        self._latency_s = latency_s
+
+    def stream(self, messages):
+        time.sleep(self._latency_s)
+        yield from super().stream(messages)
+
+
+def _run(name, decide, data):
+    correct, samples = 0, []
+    for text, label in data:
+        t0 = time.perf_counter()
+        got = decide(text)
+        samples.append(time.perf_counter() - t0)
+        correct += got == label
+    return {"strategy": name, "accuracy": correct / len(data), **summarize(samples)}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--data", help="JSONL of {query, label} rows (default: built-in set)")
+    ap.add_argument("--llm-latency-ms", type=float, default=0.0)
+    args = ap.parse_args()
+
+    data = load_examples(args.data) if args.data else _HELD_OUT
+    agent_router._llm = _SlowLLM(args.llm_latency_ms / 1000.0)
+    agent_router.settings.INTENT_FAST_PATH = False  # `ask_llm` = pure LLM path
+
+    always = IntentClassifier(default_examples(), threshold=0.0, use_model=True)
+    rules = IntentClassifier(default_examples(), use_model=False)
+    hybrid = IntentClassifier(default_examples(), use_model=True)
+    always.predict_proba("warm-up")  # trains the model, not counted
+    hybrid.predict_proba("warm-up")
+
+    def llm_only(text):
+        return agent_router.ask_llm({"query": text})["tool"]
+
+    def fast_path(clf):
+        def decide(text):
+            intent = clf.classify(text)
+            return intent.label if intent else llm_only(text)
+
+        return decide
+
+    rows = [
+        _run("llm", llm_only, data),
+        _run("classifier", lambda t: always.classify(t).label, data),
+        _run("rules", fast_path(rules), data),
+        _run("hybrid", fast_path(hybrid), data),
+    ]
+    print_table(rows, ["strategy", "accuracy", "mean_ms", "p50_ms", "p99_ms"])
+    print("rules fast path:", rules.stats())
+    print("hybrid fast path:", hybrid.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Offline embeddings: relevance and throughput of hashing TF-IDF vs the fake provider.
+
+    python -m scripts.bench_local_embeddings --products 2000 --articles 300 --queries 300
+
+Two synthetic retrieval tasks, ranked by cosine similarity over all docs:
+
+  products  titles of 3 catalogue words; a query is 2 words of one title,
+            sometimes pluralised ("lamps"); relevant = every product whose
+            title holds both words.  Reported: precision@5 and MRR.
+  support   articles written from one topic's vocabulary; a query asks
+            about two words of a topic; relevant = the topic's articles.
+            Reported: accuracy@1.
+
+Providers: `fake` (hash noise – chance level), `hashing` (unfitted) and
+`hashing+idf` (`fit` on each task's documents).  Throughput is the raw,
+uncached `encode` rate on batches of `--batch` product titles.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from scripts._bench import print_table  # puts backend/ on sys.path
+
+from app.core.embeddings import FakeEmbeddingProvider, HashingEmbeddingProvider  # noqa: E402
+
+_WORDS = (
+    "ceramic cotton denim leather wireless lamp mug shirt jeans wallet desk shoe "
+    "wooden steel linen travel kitchen office running bamboo glass wool"
+).split()
+_TOPICS = {
+    "shipping": "delivery courier tracking parcel dispatch express international",
+    "returns": "return label refund exchange condition window receipt",
+    "payments": "card invoice paypal charge declined currency instalment",
+    "account": "password login email profile address newsletter",
+    "orders": "cancel modify status confirmation missing damaged",
+    "warranty": "repair defect guarantee claim replacement manufacturer",
+}
+
+
+def _products(n: int, queries: int, rng: random.Random):
+    titles = [rng.sample(_WORDS, 3) for _ in range(n)]
+    tasks = []
+    for _ in range(queries):
+        words = rng.sample(rng.choice(titles), 2)
+        relevant = {i for i, t in enumerate(titles) if set(words) <= set(t)}
+        text = " ".join(w + "s" if rng.random() < 0.5 else w for w in words)
+        tasks.append((text, relevant))
+    return [" ".join(t).title() for t in titles], tasks
+
+
+def _support(n: int, queries: int, rng: random.Random):
+    topics = sorted(_TOPICS)
+    docs, labels = [], []
+    for i in range(n):
+        topic = topics[i % len(topics)]
+        vocab = _TOPICS[topic].split()
+        sentences = [f"Our {topic} policy covers {' '.join(rng.sample(vocab, 3))}." for _ in range(4)]
+        docs.append(" ".join(sentences))
+        labels.append(topic)
+    tasks = []
+    for _ in range(queries):
+        topic = rng.choice(topics)
+        words = rng.sample(_TOPICS[topic].split(), 2)
+        tasks.append((f"how do I handle a {words[0]} {words[1]}?", {i for i, t in enumerate(labels) if t == topic}))
+    return docs, tasks
+
+
+def _rank(provider, docs: Sequence[str], queries: Sequence[str]) -> np.ndarray:
+    d, q = provider.encode(docs), provider.encode(queries)
+    d /= np.linalg.norm(d, axis=1, keepdims=True) + 1e-12
+    q /= np.linalg.norm(q, axis=1, keepdims=True) + 1e-12
+    return np.argsort(-(q @ d.T), axis=1, kind="stable")
+
+
+def _relevance(provider, docs, tasks: List[Tuple[str, set]]) -> Dict[str, float]:
+    order = _rank(provider, docs, [q for q, _ in tasks])
+    p5, rr, top1 = [], [], []
+    for ranking, (_, relevant) in zip(order, tasks):
+        hits = [int(i) in relevant for i in ranking]
+        p5.append(sum(hits[:5]) / 5)
+        rr.append(1.0 / (hits.index(True) + 1) if True in hits else 0.0)
+        top1.append(float(hits[0]))
+    return {"p@5": float(np.mean(p5)), "mrr": float(np.mean(rr)), "acc@1": float(np.mean(top1))}
+
+
+def _throughput(provider, texts: List[str], batch: int) -> float:
+    provider.encode(texts[:batch])  # warm-up
+    t0 = time.perf_counter()
+    for i in range(0, len(texts), batch):
+        provider.encode(texts[i : i + batch])
+    return len(texts) / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--products", type=int, default=2000)
+    ap.add_argument("--articles", type=int, default=300)
+    ap.add_argument("--queries", type=int, default=300)
+    ap.add_argument("--batch", type=int, default=256)
+    args = ap.parse_args()
+
+    rng = random.Random(0)
+    products, product_tasks = _products(args.products, args.queries, rng)
+    articles, support_tasks = _support(args.articles, args.queries, rng)
+
+    rows = []
+    for name in ("fake", "hashing", "hashing+idf"):
+        def provider_for(corpus):
+            if name == "fake":
+                return FakeEmbeddingProvider()
+            base = HashingEmbeddingProvider()
+            return base.fit(corpus) if name == "hashing+idf" else base
+
+        prod = _relevance(provider_for(products), products, product_tasks)
+        supp = _relevance(provider_for(articles), articles, support_tasks)
+        rows.append(
+            {
+                "provider": name,
+                "products_p@5": prod["p@5"],
+                "products_mrr": prod["mrr"],
+                "support_acc@1": supp["acc@1"],
+                "texts_per_s": _throughput(provider_for(products), products, args.batch),
+            }
+        )
+
+    print_table(rows, ["provider", "products_p@5", "products_mrr", "support_acc@1", "texts_per_s"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Cost of the latency instrumentation, enabled vs disabled.
+
+    python -m scripts.bench_metrics_overhead --calls 200000 --requests 300
+
+Two views:
+
+  micro     one `@timed` call around a no-op function, compared with calling
+            the function directly (ns per call)
+  request   a full `/api/chat` request through the Flask test client, with
+            METRICS_ENABLED on and off (fast-path routing, fresh queries so
+            the response cache never answers)
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from scripts._bench import print_table, summarize  # puts backend/ on sys.path
+
+from app.config import settings
+from app.core import metrics
+from app.main import create_app
+
+
+def _noop() -> None:
+    return None
+
+
+def _ns_per_call(fn, calls: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - t0) / calls * 1e9
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--calls", type=int, default=200_000)
+    ap.add_argument("--requests", type=int, default=300)
+    args = ap.parse_args()
+
+    timed_noop = metrics.timed(metrics.STAGE_SECONDS, "bench", stage="bench")(_noop)
+    micro = []
+    for label, fn, enabled in (("direct", _noop, True), ("timed/off", timed_noop, False), ("timed/on", timed_noop, True)):
+        settings.METRICS_ENABLED = enabled
+        micro.append({"call": label, "ns_per_call": _ns_per_call(fn, args.calls)})
+    print_table(micro, ["call", "ns_per_call"])
+    print()
+
+    client = create_app().test_client()
+    rows = []
+    for enabled in (False, True, False, True):  # interleave to even out warm-up
+        settings.METRICS_ENABLED = enabled
+        samples = []
+        for i in range(args.requests):
+            query = f"suggest a gift {enabled} {len(rows)} {i}"
+            t0 = time.perf_counter()
+            client.post("/api/chat", json={"query": query})
+            samples.append(time.perf_counter() - t0)
+        rows.append({"metrics": "on" if enabled else "off", **summarize(samples)})
+    print_table(rows[2:], ["metrics", "n", "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
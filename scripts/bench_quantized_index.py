@@ -0,0 +1,212 @@
+"""
+Product vectors: Chroma (HNSW, float32) vs the quantized, memory-mapped index.
+
+    python -m scripts.bench_quantized_index --sizes 100000,1000000 --dim 384
+    python -m scripts.bench_quantized_index --sizes 20000 --dim 1536 --workers 2
+
+For every size a synthetic catalogue (unit vectors drawn around random
+cluster centres, with a small product-like metadata payload) is written in
+chunks to each backend in a throw-away directory, then `--workers` worker
+processes open the index side by side, each runs the same `--queries`
+single-vector queries and reports its memory once all of them are loaded:
+
+  rss / pss / private   from /proc/self/smaps_rollup (Linux); PSS splits
+                        pages shared between workers, so it is the honest
+                        per-worker figure for memory-mapped files
+  index_pss             PSS growth from opening the index and querying it
+                        (the library import itself is excluded)
+
+Also reported: build time, size on disk, query latency and recall@k
+against an exact float32 scan.  Chroma is skipped above `--chroma-max`
+products, where its build alone takes too long on a small machine.
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from scripts._bench import percentile, print_table  # puts backend/ on sys.path
+
+from app.core.quantized_index import QuantizedCollection  # noqa: E402
+
+_CHUNK = 5000  # rows per upsert (below Chroma's max batch size)
+_CLUSTERS = 64
+
+
+def _chunks(n: int, dim: int, seed: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """`(start, unit vectors)` chunks of a deterministic clustered sample."""
+    centers = np.random.default_rng(seed).standard_normal((_CLUSTERS, dim)).astype(np.float32)
+    for start in range(0, n, _CHUNK):
+        rng = np.random.default_rng([seed, start])
+        size = min(_CHUNK, n - start)
+        points = centers[rng.integers(0, _CLUSTERS, size)]
+        points += 0.8 * rng.standard_normal((size, dim), dtype=np.float32)
+        points /= np.linalg.norm(points, axis=1, keepdims=True)
+        yield start, points
+
+
+def _queries(count: int, dim: int, seed: int) -> np.ndarray:
+    """Fresh draws from the same clusters as the catalogue."""
+    rng = np.random.default_rng([seed, 1 << 40])
+    centers = np.random.default_rng(seed).standard_normal((_CLUSTERS, dim)).astype(np.float32)
+    q = centers[rng.integers(0, _CLUSTERS, count)] + 0.8 * rng.standard_normal((count, dim), dtype=np.float32)
+    return q / np.linalg.norm(q, axis=1, keepdims=True)
+
+
+def _payload(start: int, size: int) -> Tuple[List[str], List[Dict[str, object]]]:
+    ids = [str(i) for i in range(start, start + size)]
+    metas = [
+        {"title": f"Product {i}", "price": float(i % 500), "category_key": f"cat{i % 20}", "payload": 1}
+        for i in range(start, start + size)
+    ]
+    return ids, metas
+
+
+def _ground_truth(n: int, dim: int, seed: int, queries: np.ndarray, k: int) -> np.ndarray:
+    """Exact top-`k` row ids per query (squared L2 = 2 - 2·dot on unit vectors)."""
+    best_d = np.full((len(queries), 0), np.inf, dtype=np.float32)
+    best_i = np.empty((len(queries), 0), dtype=np.int64)
+    for start, points in _chunks(n, dim, seed):
+        d = np.concatenate([best_d, -(queries @ points.T)], axis=1)
+        rows = np.broadcast_to(np.arange(start, start + len(points)), (len(queries), len(points)))
+        i = np.concatenate([best_i, rows], axis=1)
+        keep = np.argpartition(d, min(k, d.shape[1]) - 1, axis=1)[:, :k]
+        best_d, best_i = np.take_along_axis(d, keep, 1), np.take_along_axis(i, keep, 1)
+    return best_i
+
+
+# --------------------------------------------------------------------------- #
+# Building
+# --------------------------------------------------------------------------- #
+def _build(backend: str, path: Path, n: int, dim: int, seed: int) -> float:
+    t0 = time.perf_counter()
+    if backend == "quantized":
+        col = QuantizedCollection(path / "products", "products")
+    else:
+        import chromadb
+
+        col = chromadb.PersistentClient(path=str(path)).create_collection("products", embedding_function=None)
+    for start, points in _chunks(n, dim, seed):
+        ids, metas = _payload(start, len(points))
+        col.upsert(ids=ids, embeddings=points, metadatas=metas)
+    return time.perf_counter() - t0
+
+
+def _disk_mib(path: Path) -> float:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) / 2**20
+
+
+# --------------------------------------------------------------------------- #
+# Workers
+# --------------------------------------------------------------------------- #
+def _memory() -> Dict[str, float]:
+    """Rss / Pss / Private MiB of this process (nan where unavailable)."""
+    fields = {"Rss": float("nan"), "Pss": float("nan"), "Private_Clean": 0.0, "Private_Dirty": 0.0}
+    try:
+        with open("/proc/self/smaps_rollup") as fh:
+            for line in fh:
+                key, _, rest = line.partition(":")
+                if key in fields:
+                    fields[key] = int(rest.split()[0]) / 1024.0
+    except OSError:
+        return {"rss": float("nan"), "pss": float("nan"), "private": float("nan")}
+    return {"rss": fields["Rss"], "pss": fields["Pss"], "private": fields["Private_Clean"] + fields["Private_Dirty"]}
+
+
+def _worker(backend: str, path: str, queries: np.ndarray, k: int, barrier, results) -> None:
+    if backend == "chroma":
+        import chromadb
+    before = _memory()
+    if backend == "quantized":
+        col = QuantizedCollection(Path(path) / "products", "products")
+    else:
+        col = chromadb.PersistentClient(path=path).get_collection("products")
+    ids, latencies = [], []
+    for q in queries:
+        t0 = time.perf_counter()
+        res = col.query(query_embeddings=[q], n_results=k, include=["distances"])
+        latencies.append(time.perf_counter() - t0)
+        ids.append([int(i) for i in res["ids"][0]])
+    barrier.wait()  # every worker holds its index now
+    after = _memory()
+    barrier.wait()
+    results.put({"before": before, "after": after, "latencies": latencies, "ids": ids})
+
+
+def _serve(backend: str, path: Path, queries: np.ndarray, k: int, workers: int) -> List[Dict[str, object]]:
+    ctx = mp.get_context("spawn")
+    barrier, results = ctx.Barrier(workers), ctx.Queue()
+    args = (backend, str(path), queries, k, barrier, results)
+    procs = [ctx.Process(target=_worker, args=args) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    out = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    return out
+
+
+def _recall(found: List[List[int]], truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return statistics.fmean(len(set(f[:k]) & set(t.tolist())) / k for f, t in zip(found, truth))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", default="100000,1000000", help="comma-separated catalogue sizes")
+    ap.add_argument("--dim", type=int, default=384)
+    ap.add_argument("--queries", type=int, default=100)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--chroma-max", type=int, default=200_000, help="skip Chroma above this many products")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    rows = []
+    queries = _queries(args.queries, args.dim, args.seed)
+    for n in (int(s) for s in args.sizes.split(",")):
+        truth = _ground_truth(n, args.dim, args.seed, queries, args.k)
+        for backend in ("chroma", "quantized"):
+            if backend == "chroma" and n > args.chroma_max:
+                rows.append({"backend": backend, "products": n, "dim": args.dim, "build_s": "skipped"})
+                continue
+            with tempfile.TemporaryDirectory(prefix="bench-qindex-") as tmp:
+                build_s = _build(backend, Path(tmp), n, args.dim, args.seed)
+                served = _serve(backend, Path(tmp), queries, args.k, args.workers)
+                disk = _disk_mib(Path(tmp))
+            latencies = [s for w in served for s in w["latencies"]]
+            mean = lambda key, when: statistics.fmean(w[when][key] for w in served)  # noqa: E731
+            rows.append(
+                {
+                    "backend": backend,
+                    "products": n,
+                    "dim": args.dim,
+                    "build_s": build_s,
+                    "disk_mib": disk,
+                    "workers": args.workers,
+                    "rss_mib": mean("rss", "after"),
+                    "pss_mib": mean("pss", "after"),
+                    "private_mib": mean("private", "after"),
+                    "index_pss_mib": mean("pss", "after") - mean("pss", "before"),
+                    f"recall@{args.k}": _recall(served[0]["ids"], truth),
+                    "p50_ms": percentile(latencies, 50) * 1000.0,
+                    "p95_ms": percentile(latencies, 95) * 1000.0,
+                }
+            )
+
+    print_table(
+        rows,
+        ["backend", "products", "dim", "build_s", "disk_mib", "workers", "rss_mib", "pss_mib", "private_mib",
+         "index_pss_mib", f"recall@{args.k}", "p50_ms", "p95_ms"],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark `VectorIndex` against the legacy pure-Python scorer.
+
+    python -m scripts.bench_retrieval                       # 1k / 10k / 100k
+    python -m scripts.bench_retrieval --sizes 1000 --legacy # include old loop
+
+Reports p50/p99 query latency for both metrics at each KB size.  The legacy
+`_euclidean` loop is O(n·d) in the interpreter, so it is only timed when
+`--legacy` is passed and for sizes up to `--legacy-max`.
+"""
+from __future__ import annotations
+
+import argparse
+import math
+import time
+
+from scripts._bench import print_table, summarize, time_calls  # puts backend/ on sys.path
+
+import numpy as np
+
+from app.core.retrieval import VectorIndex
+
+
+def _legacy_top_k(q: list, rows: list, k: int) -> list:
+    """The scorer `support_rag._retrieve` used before VectorIndex."""
+    scored = [
+        (math.sqrt(sum((x - y) ** 2 for x, y in zip(q, e))), i) for i, e in enumerate(rows)
+    ]
+    scored.sort()
+    return scored[:k]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    ap.add_argument("--dim", type=int, default=1536)
+    ap.add_argument("--k", type=int, default=6)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--legacy", action="store_true", help="also time the pure-Python loop")
+    ap.add_argument("--legacy-max", type=int, default=10_000)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    rows = []
+    for n in args.sizes:
+        data = rng.random((n, args.dim), dtype=np.float32)
+        queries = rng.random((args.queries, args.dim), dtype=np.float32)
+
+        for metric in ("l2", "cosine"):
+            t0 = time.perf_counter()
+            index = VectorIndex(data, metric=metric)
+            build_ms = (time.perf_counter() - t0) * 1000.0
+
+            it = iter(queries)
+            samples = time_calls(lambda: index.search(next(it), args.k), repeat=args.queries - 3)
+            rows.append({"impl": "VectorIndex", "metric": metric, "articles": n, "build_ms": build_ms, **summarize(samples)})
+
+        if args.legacy and n <= args.legacy_max:
+            as_lists = data.tolist()
+            q_lists = queries[:10].tolist()
+            it = iter(q_lists)
+            samples = time_calls(lambda: _legacy_top_k(next(it), as_lists, args.k), repeat=7)
+            rows.append({"impl": "legacy loop", "metric": "l2", "articles": n, **summarize(samples)})
+
+    print_table(rows, ["impl", "metric", "articles", "build_ms", "p50_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
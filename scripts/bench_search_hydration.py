@@ -0,0 +1,109 @@
+"""
+`/api/search` latency: vector query + SQL hydration vs metadata payloads.
+
+    python -m scripts.bench_search_hydration --products 5000 --requests 500
+
+Seeds a throw-away SQLite DB and Chroma store (under a temp dir), indexes
+the synthetic catalogue, then drives `/api/search` through the Flask test
+client twice: once with the previous two-store path (`search_products` +
+`as_dict()`) and once with `search_product_payloads`.  Queries are embedded
+with a cheap local function so the numbers isolate the hydration cost.
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import os
+import random
+import shutil
+import tempfile
+
+from scripts._bench import print_table, summarize, time_calls  # puts backend/ on sys.path
+
+_TMP = tempfile.mkdtemp(prefix="bench-search-")
+atexit.register(shutil.rmtree, _TMP, True)
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP}/bench.db"
+os.environ["CHROMA_DATA"] = _TMP
+
+from chromadb.api.types import EmbeddingFunction  # noqa: E402
+
+from app.api import routes  # noqa: E402
+from app.core import vector_store  # noqa: E402
+from app.core.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import create_app  # noqa: E402
+from app.services import indexer  # noqa: E402
+from app.services.data_loader import save_products  # noqa: E402
+
+_WORDS = "ceramic cotton denim leather wireless lamp mug shirt jeans wallet desk shoes".split()
+
+
+class _HashEF(EmbeddingFunction):
+    """Bag-of-words hashed into 64 dims – fast and deterministic."""
+
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        out = []
+        for text in input:
+            vec = [0.0] * 64
+            for word in text.lower().split():
+                vec[hash(word) % 64] += 1.0
+            out.append(vec)
+        return out
+
+    @staticmethod
+    def name():
+        return "bench-hash"
+
+
+def _catalogue(n: int):
+    rng = random.Random(0)
+    for i in range(1, n + 1):
+        words = rng.sample(_WORDS, 3)
+        yield {
+            "id": i,
+            "title": " ".join(words).title(),
+            "description": f"{' '.join(words)} product number {i}",
+            "category": rng.choice(["home", "clothing", "accessories"]),
+            "price": round(rng.uniform(1, 200), 2),
+            "image": f"https://example.com/{i}.png",
+        }
+
+
+def _two_store(query: str, k: int = 5):
+    """The previous read path: Chroma ids, then a SQL IN query."""
+    with SessionLocal() as db:
+        return [p.as_dict() for p in indexer.search_products(db, query, k)]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--products", type=int, default=5000)
+    ap.add_argument("--requests", type=int, default=500)
+    args = ap.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    ef = _HashEF()
+    collection = vector_store._client.get_or_create_collection("products", embedding_function=ef)
+    indexer.get_collection = lambda _name="products": collection
+    with SessionLocal() as db:
+        save_products(db, _catalogue(args.products))
+        indexer.build_product_index(db)
+
+    client = create_app().test_client()
+    rng = random.Random(1)
+    queries = [" ".join(rng.sample(_WORDS, 2)) for _ in range(args.requests)]
+
+    rows = []
+    for mode, search in (("two-store", _two_store), ("payload", indexer.search_product_payloads)):
+        routes.search_product_payloads = search
+        it = iter(queries * 2)
+        samples = time_calls(lambda: client.get("/api/search", query_string={"q": next(it)}), args.requests)
+        rows.append({"mode": mode, "products": args.products, **summarize(samples)})
+
+    print_table(rows, ["mode", "products", "n", "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Sequential vs speculative agent routing: end-to-end and per-node latency.
+
+    python -m scripts.bench_speculative --requests 60 --llm-ms 300 --retrieval-ms 150
+
+Runs `agent_router.router` in-process with the local intent fast path off
+and latency injected into the three remote calls on the request path: the
+routing LLM, product search and support retrieval (a `FakeLLM` and stubs
+that sleep).  Queries alternate between product and support questions.
+
+  sequential   ask_llm, then the chosen retrieval        ≈ llm + retrieval
+  speculative  both retrievals start with ask_llm        ≈ max(llm, retrieval)
+
+Per-node columns are medians of `state["timings"]`; under speculation the
+tool node only waits for a branch that has been running all along.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+
+from scripts._bench import print_table, summarize  # puts backend/ on sys.path
+
+from app.config import settings
+from app.core.llm import FakeLLM
+from app.services import agent_router
+
+
+class _SlowLLM(FakeLLM):
+    def __init__(self, latency: float) -> None:
+        super().__init__()
+        self.latency = latency
+
+    def stream(self, messages):
+        time.sleep(self.latency)
+        yield from super().stream(messages)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--requests", type=int, default=60)
+    ap.add_argument("--llm-ms", type=float, default=300.0)
+    ap.add_argument("--retrieval-ms", type=float, default=150.0)
+    args = ap.parse_args()
+
+    delay = args.retrieval_ms / 1000.0
+
+    def search(query, filters=None):
+        time.sleep(delay)
+        return [{"id": 1, "title": "stub"}]
+
+    def support(query):
+        time.sleep(delay)
+        return {"answer": "stub", "tool": "support", "sources": []}
+
+    agent_router._llm = _SlowLLM(args.llm_ms / 1000.0)
+    agent_router.search_product_payloads = search
+    agent_router.support_answer = support
+    settings.INTENT_FAST_PATH = False
+
+    queries = [f"find a desk lamp {i}" if i % 2 else f"how do returns work {i}" for i in range(args.requests)]
+    rows = []
+    for mode, speculative in (("sequential", False), ("speculative", True)):
+        settings.ROUTER_SPECULATIVE = speculative
+        samples, nodes = [], {}
+        for q in queries:
+            t0 = time.perf_counter()
+            final = agent_router.router.invoke({"query": q})
+            samples.append(time.perf_counter() - t0)
+            tool_ms = final["timings"].get(final["tool"], 0.0)
+            nodes.setdefault("ask_llm", []).append(final["timings"]["ask_llm"])
+            nodes.setdefault("tool", []).append(tool_ms)
+        rows.append(
+            {
+                "mode": mode,
+                "ask_llm_ms": statistics.median(nodes["ask_llm"]),
+                "tool_node_ms": statistics.median(nodes["tool"]),
+                **summarize(samples),
+            }
+        )
+
+    print_table(rows, ["mode", "n", "ask_llm_ms", "tool_node_ms", "p50_ms", "p95_ms", "p99_ms"])
+
+
+if __name__ == "__main__":
+    main()
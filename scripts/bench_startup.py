@@ -0,0 +1,140 @@
+"""
+Cold-start cost: `import app.main`, app creation and the first requests.
+
+    python -m scripts.bench_startup --repeat 5 --baseline HEAD~1
+
+Every sample is a fresh interpreter (`python -X importtime`) against a
+throw-away SQLite DB / Chroma dir, which runs
+
+  import      `import app.main` (also taken from the importtime log)
+  create_app  building the Flask app (tables, blueprints)
+  health      the first `GET /api/health`
+  warmup      waiting for the `STARTUP_WARMUP` thread (0 when it is off)
+  first_chat  the first `POST /api/chat` – pays for whatever was deferred
+
+and reports medians, plus which heavy libraries the import pulled in.  The
+working tree is measured with and without the warm-up hook.
+`--baseline REF` measures the `backend/` tree of a git ref (exported with
+`git archive`) the same way, for a before / after comparison.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+from scripts._bench import BACKEND_DIR, ROOT_DIR, print_table
+
+_HEAVY = ("chromadb", "langgraph", "langchain", "openai")
+
+_PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app.main
+t1 = time.perf_counter()
+app = app.main.create_app()
+t2 = time.perf_counter()
+client = app.test_client()
+client.get("/api/health")
+t3 = time.perf_counter()
+try:
+    from app.services import warmup
+except ImportError:  # trees without the hook
+    warmup = None
+if warmup is not None and warmup._thread is not None:
+    warmup._thread.join()
+t4 = time.perf_counter()
+client.post("/api/chat", json={"query": "how do returns work?"})
+t5 = time.perf_counter()
+print(json.dumps(
+    {"import": t1 - t0, "create_app": t2 - t1, "health": t3 - t2, "warmup": t4 - t3, "first_chat": t5 - t4}
+))
+"""
+
+
+def _importtime(log: str) -> tuple[float, List[str]]:
+    """Cumulative ms of the top-level `app.main` import and heavy libs seen."""
+    total, heavy = float("nan"), set()
+    for line in log.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        module = name.strip()
+        if name.rstrip() == " app.main":
+            total = int(cumulative) / 1000.0
+            break  # later lines are imports deferred to first use
+        if module.split(".")[0] in _HEAVY:
+            heavy.add(module.split(".")[0])
+    return total, sorted(heavy)
+
+
+def _sample(backend: Path, warmup: bool) -> Dict[str, object]:
+    with tempfile.TemporaryDirectory(prefix="bench-startup-") as tmp:
+        env = {
+            **os.environ,
+            "PYTHONPATH": str(backend),
+            "PYTHONWARNINGS": "ignore",
+            "DATABASE_URL": f"sqlite:///{tmp}/bench.db",
+            "CHROMA_DATA": tmp,
+            "STARTUP_WARMUP": "true" if warmup else "false",
+        }
+        env.pop("OPENAI_API_KEY", None)
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _PROBE],
+            cwd=backend, env=env, capture_output=True, text=True, check=True,
+        )
+    phases = json.loads(proc.stdout.strip().splitlines()[-1])
+    importtime_ms, heavy = _importtime(proc.stderr)
+    return {**{k: v * 1000.0 for k, v in phases.items()}, "importtime": importtime_ms, "heavy": heavy}
+
+
+def _measure(label: str, backend: Path, repeat: int, warmup: bool = False) -> Dict[str, object]:
+    samples = [_sample(backend, warmup) for _ in range(repeat)]
+    row: Dict[str, object] = {"tree": label, "n": repeat}
+    for key in ("importtime", "import", "create_app", "health", "warmup", "first_chat"):
+        row[f"{key}_ms"] = statistics.median(s[key] for s in samples)
+    row["heavy_imports"] = ",".join(samples[0]["heavy"]) or "-"
+    return row
+
+
+def _export(ref: str, dest: Path) -> Path:
+    """Extract `backend/` at git `ref` into `dest`; returns its path."""
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", ref, "backend"], cwd=ROOT_DIR, capture_output=True, check=True
+    ).stdout
+    tar_path = dest / "backend.tar"
+    tar_path.write_bytes(archive)
+    with tarfile.open(tar_path) as tar:
+        tar.extractall(dest)
+    return dest / "backend"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--baseline", metavar="REF", help="git ref to compare against, e.g. HEAD~1")
+    args = ap.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="bench-startup-ref-") as tmp:
+        if args.baseline:
+            rows.append(_measure(args.baseline, _export(args.baseline, Path(tmp)), args.repeat))
+        rows.append(_measure("working tree", BACKEND_DIR, args.repeat))
+        rows.append(_measure("+ warm-up", BACKEND_DIR, args.repeat, warmup=True))
+
+    print_table(
+        rows,
+        ["tree", "n", "importtime_ms", "import_ms", "create_app_ms", "health_ms", "warmup_ms", "first_chat_ms",
+         "heavy_imports"],
+    )
+
+
+if __name__ == "__main__":
+    main()
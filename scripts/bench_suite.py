@@ -0,0 +1,465 @@
+"""
+Offline benchmark suite: synthetic data at several scales, replayed traffic.
+
+    python -m scripts.bench_suite --scales 500x50,5000x200 --requests 300 \
+        --out bench_results/$(git rev-parse --short HEAD).json
+    python -m scripts.bench_suite --diff bench_results/old.json bench_results/new.json
+
+For every `<products>x<articles>` scale a child process (this script with
+`--child`) seeds a throw-away SQLite DB and Chroma store with a synthetic
+catalogue and a generated Markdown support KB, then replays the traffic
+through the Flask test client:
+
+  /api/search   GET, `params` as the query string
+  /api/chat     POST, `body` as JSON (`"stream": true` is read to the end)
+
+Traffic is a JSONL file (`--traffic`) with one request per line, e.g.
+
+    {"endpoint": "/api/search", "params": {"q": "leather wallet", "max_price": 50}}
+    {"endpoint": "/api/chat", "body": {"query": "how do I return an order?"}}
+
+or, without `--traffic`, a deterministic mix of product searches and
+product / support / recommendation chat queries (`--save-traffic` writes
+it out).  Everything runs offline: products are embedded by a stable local
+hash function, the support KB by the fake `EmbeddingModel`, and the LLM is
+`FakeLLM` – once as is ("fake") and once with `--llm-latency` ms injected
+per call ("slow").  The response cache is off unless `--cache` is given.
+
+Each endpoint's requests are replayed as their own phase (with
+`--concurrency` threads), so per-endpoint throughput is real.  Per-stage
+latency comes from the `Server-Timing` header of each response (spans of
+the same name are summed per request; streamed chat responses send their
+headers before any span has finished, so they only count end to end).
+
+Results – commit, settings, and for each scale / LLM mode the endpoint and
+stage summaries – are written as JSON to `--out`; `--diff OLD NEW` compares
+two such files and exits 1 when a latency grows or a throughput drops by
+more than `--threshold` percent.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from scripts._bench import ROOT_DIR, print_table, summarize  # puts backend/ on sys.path
+
+_WORDS = (
+    "ceramic cotton denim leather wireless lamp mug shirt jeans wallet desk shoes "
+    "wooden steel linen travel kitchen office running bamboo glass wool"
+).split()
+_CATEGORIES = ("home", "clothing", "accessories", "electronics", "sports")
+_TOPICS = {
+    "shipping": "delivery courier tracking parcel dispatch express international",
+    "returns": "return label refund exchange condition window receipt",
+    "payments": "card invoice paypal charge declined currency instalments",
+    "account": "password login email profile address newsletter delete",
+    "orders": "cancel modify status confirmation missing item damaged",
+    "warranty": "repair defect guarantee claim replacement manufacturer",
+}
+_LLM_MODES = ("fake", "slow")
+_LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+# --------------------------------------------------------------------------- #
+# Synthetic data
+# --------------------------------------------------------------------------- #
+def _stable_hash(word: str) -> int:
+    return zlib.crc32(word.encode())  # `hash()` is salted per process
+
+
+def catalogue(n: int, seed: int = 0) -> Iterable[Dict[str, Any]]:
+    rng = random.Random(seed)
+    for i in range(1, n + 1):
+        words = rng.sample(_WORDS, 3)
+        yield {
+            "id": i,
+            "title": " ".join(words).title(),
+            "description": f"{' '.join(words)} product number {i}",
+            "category": rng.choice(_CATEGORIES),
+            "price": round(rng.uniform(1, 200), 2),
+            "image": f"https://example.com/{i}.png",
+        }
+
+
+def write_kb(path: Path, n: int, seed: int = 0) -> None:
+    """`n` Markdown articles spread over topic sub-directories."""
+    rng = random.Random(seed)
+    topics = sorted(_TOPICS)
+    for i in range(n):
+        topic = topics[i % len(topics)]
+        vocab = _TOPICS[topic].split()
+        sections = []
+        for s in range(3):
+            sentences = [
+                f"Our {topic} policy covers {' '.join(rng.sample(vocab, 3))} for case {i}-{s}-{j}."
+                for j in range(rng.randint(3, 8))
+            ]
+            sections.append(f"## {rng.choice(vocab).title()} {s}\n\n" + " ".join(sentences))
+        article = path / topic / f"article-{i:05d}.md"
+        article.parent.mkdir(parents=True, exist_ok=True)
+        article.write_text(f"# {topic.title()} question {i}\n\n" + "\n\n".join(sections) + "\n", encoding="utf-8")
+
+
+def make_traffic(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Deterministic request mix; queries repeat like real traffic does."""
+    rng = random.Random(seed)
+
+    def product_words() -> str:
+        return " ".join(rng.sample(_WORDS, 2))
+
+    pool: List[Dict[str, Any]] = []
+    for _ in range(max(1, n // 4)):
+        kind = rng.random()
+        if kind < 0.4:
+            params: Dict[str, Any] = {"q": product_words()}
+            if rng.random() < 0.3:
+                params["max_price"] = rng.choice((25, 50, 100))
+            pool.append({"endpoint": "/api/search", "params": params})
+        elif kind < 0.65:
+            pool.append({"endpoint": "/api/chat", "body": {"query": f"find a {product_words()}"}})
+        elif kind < 0.9:
+            topic = rng.choice(sorted(_TOPICS))
+            word = rng.choice(_TOPICS[topic].split())
+            pool.append({"endpoint": "/api/chat", "body": {"query": f"how does {topic} work, {word}?"}})
+        else:
+            pool.append({"endpoint": "/api/chat", "body": {"query": "suggest a gift", "stream": True}})
+    return [rng.choice(pool) for _ in range(n)]
+
+
+def load_traffic(path: Path) -> List[Dict[str, Any]]:
+    with path.open(encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+# --------------------------------------------------------------------------- #
+# Child process: one scale
+# --------------------------------------------------------------------------- #
+def _parse_server_timing(header: str) -> Dict[str, float]:
+    """`name;dur=ms, …` → {name: total ms}."""
+    spans: Dict[str, float] = defaultdict(float)
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if name and params.startswith("dur="):
+            spans[name] += float(params[4:])
+    return dict(spans)
+
+
+def _replay(app, traffic: List[Dict[str, Any]], concurrency: int) -> Dict[str, Any]:
+    local = threading.local()
+
+    def one(req: Dict[str, Any]) -> Tuple[float, bool, Dict[str, float]]:
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        t0 = time.perf_counter()
+        if req["endpoint"] == "/api/chat":
+            resp = client.post("/api/chat", json=req["body"])
+        else:
+            resp = client.get(req["endpoint"], query_string=req.get("params", {}))
+        resp.get_data()  # drain streamed bodies
+        elapsed = time.perf_counter() - t0
+        return elapsed, resp.status_code == 200, _parse_server_timing(resp.headers.get("Server-Timing", ""))
+
+    t0 = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(concurrency) as pool:
+            outcomes = list(pool.map(one, traffic))
+    else:
+        outcomes = [one(req) for req in traffic]
+    wall = time.perf_counter() - t0
+
+    stages: Dict[str, List[float]] = defaultdict(list)
+    for _, _, spans in outcomes:
+        for name, ms in spans.items():
+            stages[name].append(ms / 1000.0)
+    return {
+        "summary": {
+            **summarize([elapsed for elapsed, _, _ in outcomes]),
+            "errors": sum(not ok for _, ok, _ in outcomes),
+            "rps": len(outcomes) / wall if wall else float("nan"),
+        },
+        "stages": {name: summarize(samples) for name, samples in sorted(stages.items())},
+    }
+
+
+def _run_child(args) -> Dict[str, Any]:
+    """Seed one scale in a fresh temp dir and replay the traffic against it."""
+    tmp = tempfile.mkdtemp(prefix="bench-suite-")
+    try:
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+        os.environ["CHROMA_DATA"] = tmp
+        os.environ["METRICS_ENABLED"] = "true"
+        os.environ["RESPONSE_CACHE_ENABLED"] = "true" if args.cache else "false"
+        os.environ["INTENT_FAST_PATH"] = "true" if args.fast_path else "false"
+        return _bench_scale(args, Path(tmp))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def _bench_scale(args, tmp: Path) -> Dict[str, Any]:
+    from chromadb.api.types import EmbeddingFunction
+
+    from app.core import metrics, vector_store
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.llm import FakeLLM
+    from app.main import create_app
+    from app.services import agent_router, indexer, support_loader
+    from app.services.data_loader import save_products
+
+    class HashEF(EmbeddingFunction):
+        """Bag-of-words hashed into 64 dims – fast and stable across runs."""
+
+        def __init__(self):
+            pass
+
+        def __call__(self, input):
+            out = []
+            for text in input:
+                vec = [0.0] * 64
+                for word in text.lower().split():
+                    vec[_stable_hash(word) % 64] += 1.0
+                out.append(vec)
+            return out
+
+        @staticmethod
+        def name():
+            return "bench-suite-hash"
+
+    class SlowLLM(FakeLLM):
+        """FakeLLM that waits `latency` seconds before answering."""
+
+        def __init__(self, latency: float) -> None:
+            super().__init__()
+            self.latency = latency
+
+        def stream(self, messages):
+            time.sleep(self.latency)
+            yield from super().stream(messages)
+
+    products, articles = (int(x) for x in args.child.split("x"))
+    setup: Dict[str, float] = {}
+
+    t0 = time.perf_counter()
+    Base.metadata.create_all(bind=engine)
+    collection = metrics.instrument_collection(
+        vector_store._client.get_or_create_collection("products", embedding_function=HashEF())
+    )
+    indexer.get_collection = lambda _name="products": collection
+    with SessionLocal() as db:
+        save_products(db, catalogue(products, args.seed))
+        indexer.build_product_index(db)
+    setup["products_s"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    support_loader._KB_PATH = tmp / "support_kb"
+    write_kb(support_loader._KB_PATH, articles, args.seed)
+    support_loader.main()
+    setup["support_kb_s"] = time.perf_counter() - t0
+
+    traffic = load_traffic(Path(args.traffic)) if args.traffic else make_traffic(args.requests, args.seed)
+    by_endpoint: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for req in traffic:
+        by_endpoint[req["endpoint"]].append(req)
+
+    app = create_app()
+    runs = []
+    for mode in args.llm:
+        agent_router._llm = SlowLLM(args.llm_latency / 1000.0) if mode == "slow" else FakeLLM()
+        _replay(app, traffic[: args.warmup], 1)
+        endpoints, stages = {}, {}
+        for endpoint, reqs in sorted(by_endpoint.items()):
+            result = _replay(app, reqs, args.concurrency)
+            endpoints[endpoint], stages[endpoint] = result["summary"], result["stages"]
+        runs.append(
+            {
+                "scale": args.child,
+                "products": products,
+                "articles": articles,
+                "llm": mode,
+                "setup": setup,
+                "endpoints": endpoints,
+                "stages": stages,
+            }
+        )
+    return {"runs": runs}
+
+
+# --------------------------------------------------------------------------- #
+# Driver
+# --------------------------------------------------------------------------- #
+def _git(*cmd: str) -> Optional[str]:
+    try:
+        out = subprocess.run(["git", *cmd], cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def _child_cmd(args, scale: str, part: Path) -> List[str]:
+    cmd = [
+        sys.executable, "-m", "scripts.bench_suite", "--child", scale, "--part", str(part),
+        "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+        "--warmup", str(args.warmup), "--seed", str(args.seed),
+        "--llm", ",".join(args.llm), "--llm-latency", str(args.llm_latency),
+    ]
+    if args.traffic:
+        cmd += ["--traffic", args.traffic]
+    if args.cache:
+        cmd.append("--cache")
+    if not args.fast_path:
+        cmd.append("--no-fast-path")
+    return cmd
+
+
+def run_suite(args) -> Dict[str, Any]:
+    runs: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="bench-suite-") as parts:
+        for scale in args.scales:
+            part = Path(parts) / f"{scale}.json"
+            print(f"scale {scale} …", file=sys.stderr)
+            subprocess.run(_child_cmd(args, scale, part), cwd=ROOT_DIR, check=True)
+            runs.extend(json.loads(part.read_text())["runs"])
+    return {
+        "meta": {
+            "commit": _git("rev-parse", "HEAD"),
+            "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "settings": {
+                "requests": args.requests,
+                "traffic": args.traffic,
+                "concurrency": args.concurrency,
+                "llm_latency_ms": args.llm_latency,
+                "response_cache": args.cache,
+                "intent_fast_path": args.fast_path,
+                "seed": args.seed,
+            },
+        },
+        "runs": runs,
+    }
+
+
+def _rows(result: Dict[str, Any]) -> List[Dict[str, Any]]:
+    rows = []
+    for run in result["runs"]:
+        for endpoint, s in run["endpoints"].items():
+            rows.append({"scale": run["scale"], "llm": run["llm"], "name": endpoint, **s})
+            for stage, st in run["stages"][endpoint].items():
+                rows.append({"scale": "", "llm": "", "name": f"  {stage}", **st})
+    return rows
+
+
+def _series(result: Dict[str, Any]) -> Dict[Tuple[str, str, str], Dict[str, float]]:
+    """(scale, llm, endpoint or endpoint/stage) → summary."""
+    out = {}
+    for run in result["runs"]:
+        for endpoint, summary in run["endpoints"].items():
+            out[(run["scale"], run["llm"], endpoint)] = summary
+            for stage, st in run["stages"].get(endpoint, {}).items():
+                out[(run["scale"], run["llm"], f"{endpoint} {stage}")] = st
+    return out
+
+
+def diff(old: Dict[str, Any], new: Dict[str, Any], threshold: float, min_ms: float = 0.5) -> List[Dict[str, Any]]:
+    """
+    Per-series changes between two result files, in percent.
+
+    A row is a regression when a latency percentile grew by more than
+    `threshold` % (and by at least `min_ms`, to ignore sub-ms jitter) or
+    throughput fell by more than `threshold` %.
+    """
+    before, after = _series(old), _series(new)
+    rows = []
+    for key in sorted(before.keys() & after.keys()):
+        a, b = before[key], after[key]
+        row: Dict[str, Any] = {"scale": key[0], "llm": key[1], "name": key[2], "regression": ""}
+        slower = []
+        for metric in _LATENCY_KEYS:
+            row[metric] = b[metric]
+            row[f"{metric[:3]}_delta_%"] = _pct(a[metric], b[metric])
+            if row[f"{metric[:3]}_delta_%"] > threshold and b[metric] - a[metric] >= min_ms:
+                slower.append(metric[:3])
+        if "rps" in a and "rps" in b:
+            row["rps"] = b["rps"]
+            row["rps_delta_%"] = _pct(a["rps"], b["rps"])
+            if row["rps_delta_%"] < -threshold:
+                slower.append("rps")
+        row["regression"] = ",".join(slower)
+        rows.append(row)
+    return rows
+
+
+def _pct(before: float, after: float) -> float:
+    return (after - before) / before * 100.0 if before else 0.0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--scales", default="500x50,5000x200", help="comma-separated <products>x<articles>")
+    ap.add_argument("--requests", type=int, default=300, help="generated requests per scale")
+    ap.add_argument("--traffic", help="JSONL file of requests to replay instead")
+    ap.add_argument("--save-traffic", help="write the generated traffic to this JSONL file")
+    ap.add_argument("--concurrency", type=int, default=1)
+    ap.add_argument("--warmup", type=int, default=20, help="untimed requests per LLM mode")
+    ap.add_argument("--llm", default=",".join(_LLM_MODES), help="LLM modes: fake, slow")
+    ap.add_argument("--llm-latency", type=float, default=50.0, help="ms per call in slow mode")
+    ap.add_argument("--cache", action="store_true", help="keep the response cache on")
+    ap.add_argument("--no-fast-path", dest="fast_path", action="store_false", help="always ask the LLM")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", help="write JSON results here")
+    ap.add_argument("--diff", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    ap.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    ap.add_argument("--part", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    args.llm = [m for m in args.llm.split(",") if m]
+    if unknown := set(args.llm) - set(_LLM_MODES):
+        ap.error(f"unknown LLM mode(s): {', '.join(sorted(unknown))}")
+
+    if args.diff:
+        old, new = (json.loads(Path(p).read_text()) for p in args.diff)
+        rows = diff(old, new, args.threshold)
+        print_table(
+            rows,
+            ["scale", "llm", "name", "p50_ms", "p50_delta_%", "p95_ms", "p95_delta_%",
+             "p99_ms", "p99_delta_%", "rps", "rps_delta_%", "regression"],
+        )
+        sys.exit(1 if any(r["regression"] for r in rows) else 0)
+
+    if args.child:
+        Path(args.part).write_text(json.dumps(_run_child(args)))
+        return
+
+    if args.save_traffic and not args.traffic:
+        with open(args.save_traffic, "w", encoding="utf-8") as fh:
+            fh.writelines(json.dumps(req) + "\n" for req in make_traffic(args.requests, args.seed))
+
+    args.scales = [s.strip() for s in args.scales.split(",") if s.strip()]
+    result = run_suite(args)
+    print_table(_rows(result), ["scale", "llm", "name", "n", "errors", "rps", "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+    if args.out:
+        out = Path(args.out)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"results written to {out}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
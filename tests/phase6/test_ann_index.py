@@ -0,0 +1,101 @@
+"""
+IVF approximate nearest-neighbour index for the support KB.
+"""
+import numpy as np
+import pytest
+
+from app.core import vector_store
+from app.core.ann_index import IVFIndex, ann_path
+from app.core.retrieval import VectorIndex
+from app.core.snapshot import SnapshotCache
+from app.core.vector_store import bump_generation, get_collection
+
+_NAME = "ann-snapshot-test"
+
+
+def _vectors(n, dim=16, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = 4 * rng.standard_normal((20, dim))
+    return (centers[rng.integers(0, 20, n)] + rng.standard_normal((n, dim))).astype(np.float32)
+
+
+def _recall(index, exact, queries, k, nprobe):
+    hits = 0
+    for q in queries:
+        ids, _ = index.search(q, k, nprobe=nprobe)
+        hits += len(set(ids) & {str(i) for i in exact.search(q, k)[0]})
+    return hits / (k * len(queries))
+
+
+@pytest.mark.parametrize("metric", ["l2", "cosine"])
+def test_probing_every_cell_is_exact(metric):
+    vectors = _vectors(3000)
+    index = IVFIndex.build([str(i) for i in range(3000)], vectors, metric=metric)
+    exact = VectorIndex(vectors, metric=metric)
+    assert index.cells == 55  # about √n
+
+    for q in _vectors(10, seed=1):
+        ids, dist = index.search(q, 5, nprobe=index.cells)
+        top, exact_dist = exact.search(q, 5)
+        assert ids == [str(i) for i in top]
+        assert np.allclose(dist, exact_dist, atol=1e-4)
+
+
+def test_nprobe_trades_recall_for_work():
+    vectors = _vectors(3000)
+    index = IVFIndex.build([str(i) for i in range(3000)], vectors)
+    exact, queries = VectorIndex(vectors), _vectors(50, seed=2)
+    recalls = [_recall(index, exact, queries, 10, nprobe) for nprobe in (1, 8, index.cells)]
+    assert recalls == sorted(recalls) and recalls[-1] == 1.0 and recalls[1] >= 0.9
+
+
+def test_incremental_updates_and_persistence(tmp_path):
+    vectors = _vectors(1500)
+    index = IVFIndex(nprobe=4)
+    index.add([str(i) for i in range(1000)], vectors[:1000])
+    assert index.cells == 1  # too small to cluster yet
+    index.add([str(i) for i in range(1000, 1500)], vectors[1000:])
+    index.add([str(i) for i in range(1500, 2048)], _vectors(548, seed=3))
+    assert len(index) == 2048 and index.cells > 1  # re-clustered once it doubled
+
+    index.remove(["0", "1", "missing"])
+    index.add(["5"], vectors[7:8])  # replace
+    assert len(index) == 2046 and "0" not in index
+    assert index.search(vectors[7], 2, nprobe=index.cells)[0][0] in {"5", "7"}
+    assert np.array_equal(index.vectors(["5"])[0], vectors[7])
+
+    path = tmp_path / "kb.npz"
+    index.save(path)
+    loaded = IVFIndex.load(path)
+    assert len(loaded) == len(index) and loaded.cells == index.cells and loaded.nprobe == 4
+    for q in _vectors(5, seed=4):
+        (ids, dist), (want_ids, want_dist) = loaded.search(q, 5), index.search(q, 5)
+        assert ids == want_ids and np.allclose(dist, want_dist)
+    assert IVFIndex.load(tmp_path / "missing.npz") is None
+    with pytest.raises(ValueError):
+        index.add(["x"], np.ones((1, 3)))
+
+
+def test_emptied_index_accepts_a_new_dimension():
+    index = IVFIndex.build(["a", "b"], _vectors(2, dim=8))
+    index.remove(["a", "b"])
+    assert len(index) == 0 and index.dim is None and index.cells == 0
+    index.add(["c"], _vectors(1, dim=16))
+    assert index.dim == 16 and index.search(_vectors(1, dim=16)[0], 1)[0] == ["c"]
+
+
+def test_snapshot_searches_through_the_ivf_index(monkeypatch):
+    monkeypatch.setattr("app.core.snapshot.settings.SUPPORT_ANN_MIN_DOCS", 2)
+    collection = get_collection(_NAME)
+    try:
+        collection.add(ids=["a", "b", "c"], documents=["alpha", "beta", "gamma"], embeddings=[[1, 0], [0, 1], [1, 1]])
+        bump_generation(_NAME)
+        ann_path(_NAME).unlink(missing_ok=True)  # built from the collection when nothing is persisted
+
+        snap = SnapshotCache(_NAME, ann=True).get()
+        assert snap.ann is not None and len(snap.ann) == 3
+        assert snap.documents[snap.search([0.1, 0.9], 1)[0]] == "beta"
+        assert snap.documents[snap.index.search([0.1, 0.9], 1)[0][0]] == "beta"  # exact index on demand
+        assert SnapshotCache(_NAME).get().ann is None
+    finally:
+        vector_store._client.delete_collection(_NAME)
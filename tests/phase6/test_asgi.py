@@ -0,0 +1,113 @@
+"""
+Async serving mode: the ASGI app, async LLM / embedding variants.
+"""
+import asyncio
+import json
+import threading
+import time
+
+import httpx
+import numpy as np
+
+from app.asgi import app
+from app.config import settings
+from app.core import lexical_index, response_cache, snapshot, vector_store
+from app.core.llm import EmbeddingModel, FakeLLM
+from app.services import agent_router, indexer
+
+
+class _SlowLLM(FakeLLM):
+    """Fake LLM whose async stream waits like a remote model would."""
+
+    async def astream(self, messages):
+        await asyncio.sleep(0.2)
+        async for chunk in super().astream(messages):
+            yield chunk
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+async def _client_call(method, url, **kwargs):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.request(method, url, **kwargs)
+
+
+def test_async_variants_match_sync():
+    llm = FakeLLM(chunk_size=2)
+    messages = [{"role": "user", "content": "any shipping news?"}]
+
+    async def collect():
+        return [c async for c in llm.astream(messages)]
+
+    assert _run(collect()) == list(llm.stream(messages))
+
+    model = EmbeddingModel()
+    vec = _run(model.aembed("async embedding parity"))
+    assert np.array_equal(vec, model.embed("async embedding parity"))
+    assert all(np.array_equal(a, b) for a, b in zip(_run(model.aembed_batch(["x", "y"])), model.embed_batch(["x", "y"])))
+
+
+def test_health_cors_and_errors():
+    resp = _run(_client_call("GET", "/api/health"))
+    assert resp.status_code == 200 and resp.json() == {"status": "ok"}
+    assert resp.headers["access-control-allow-origin"] == "*"
+
+    assert _run(_client_call("GET", "/api/search")).json() == []
+    assert _run(_client_call("GET", "/api/search?q=mug&max_price=abc")).status_code == 400
+    assert _run(_client_call("POST", "/api/chat", json={"query": " "})).status_code == 400
+    assert _run(_client_call("GET", "/api/chat")).status_code == 405
+    assert _run(_client_call("GET", "/nope")).status_code == 404
+
+
+def test_chat_stream_events(monkeypatch):
+    monkeypatch.setattr(agent_router, "_llm", FakeLLM(chunk_size=2))
+    resp = _run(_client_call("POST", "/api/chat", json={"query": "Give me some recommendations", "stream": True}))
+    assert resp.headers["content-type"].startswith("text/event-stream")
+
+    events = []
+    for block in resp.text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    names = [name for name, _ in events]
+    assert events[0] == ("route", {"tool": "fallback"})
+    assert names.count("result") == 5 and names[-1] == "done"
+    assert "".join(p["text"] for n, p in events if n == "token") == events[-1][1]["answer"]
+
+
+def test_concurrent_chats_overlap_llm_waits(monkeypatch):
+    monkeypatch.setattr(agent_router, "_llm", _SlowLLM())
+    monkeypatch.setattr(settings, "INTENT_FAST_PATH", False)
+
+    async def burst(n):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            calls = [client.post("/api/chat", json={"query": f"suggest a gift {i}"}) for i in range(n)]
+            return await asyncio.gather(*calls)
+
+    t0 = time.perf_counter()
+    responses = _run(burst(20))
+    elapsed = time.perf_counter() - t0
+
+    payloads = [json.loads(r.text.removeprefix("data: ")) for r in responses]
+    assert all(len(p["results"]) == 5 for p in payloads)
+    assert elapsed < 20 * 0.2 / 4  # serial would take 4 s
+
+
+def test_registry_reads_stay_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(agent_router, "_llm", FakeLLM(chunk_size=2))
+    on_loop = []
+
+    def generation(name):
+        on_loop.append(threading.current_thread() is threading.main_thread())
+        return vector_store.collection_generation(name)
+
+    for module in (indexer, response_cache, lexical_index, snapshot):
+        monkeypatch.setattr(module, "collection_generation", generation)
+
+    _run(_client_call("GET", "/api/search?q=mug"))
+    _run(_client_call("POST", "/api/chat", json={"query": "What is the return policy?"}))
+    _run(_client_call("POST", "/api/chat", json={"query": "what is your refund policy", "stream": True}))
+    assert on_loop and not any(on_loop)
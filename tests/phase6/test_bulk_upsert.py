@@ -0,0 +1,51 @@
+"""
+Bulk product upsert: native ON CONFLICT path, streaming input, fallback.
+"""
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import bulk_upsert as bulk
+from app.core.database import Base
+from app.models.product import Product
+from app.services.data_loader import save_products
+
+
+def _session():
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def _items(n, price=1.0):
+    for i in range(1, n + 1):
+        yield {"id": i, "title": f"Item {i}", "category": "misc", "price": price}
+
+
+def test_streaming_upsert_inserts_then_updates():
+    session = _session()
+    assert save_products(session, _items(25), batch_size=10) == 25
+    assert save_products(session, _items(30, price=2.5), batch_size=10) == 30
+
+    rows = session.query(Product).order_by(Product.id).all()
+    assert len(rows) == 30 and {float(p.price) for p in rows} == {2.5}
+
+
+def test_batches_are_timed_and_duplicates_collapse():
+    session = _session()
+    seen = []
+    rows = [{"id": 1, "title": "old", "price": 1}, {"id": 1, "title": "new", "price": 1}]
+    rows += [{"id": i, "title": "x", "price": 1} for i in range(2, 6)]
+    report = bulk.bulk_upsert(session, Product, iter(rows), batch_size=3, on_batch=lambda *a: seen.append(a))
+
+    assert report.batches == len(report.batch_seconds) == len(seen) == 2
+    assert [n for _, n, _ in seen] == [3, 2]
+    assert session.get(Product, 1).title == "new"
+
+
+def test_generic_fallback_matches_native(monkeypatch):
+    session = _session()
+    save_products(session, _items(5))
+    bulk._fallback(session, Product, [{"id": 5, "title": "five", "price": 3}, {"id": 6, "title": "six", "price": 3}], "id")
+    session.commit()
+    assert session.get(Product, 5).title == "five"
+    assert session.query(Product).count() == 6
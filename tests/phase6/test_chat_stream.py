@@ -0,0 +1,34 @@
+"""
+`/api/chat` streaming mode: route first, then results/tokens, then done.
+"""
+import json
+
+from app.core.llm import FakeLLM
+from app.main import create_app
+from app.services import agent_router
+
+
+def _parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_chat_stream_events(monkeypatch):
+    monkeypatch.setattr(agent_router, "_llm", FakeLLM(chunk_size=2))
+    client = create_app().test_client()
+
+    resp = client.post("/api/chat", json={"query": "Give me some recommendations", "stream": True})
+    events = _parse_sse(b"".join(resp.response).decode())
+
+    names = [name for name, _ in events]
+    assert names[0] == "route" and events[0][1] == {"tool": "fallback"}
+    assert names.count("result") == 5
+    assert names[-1] == "done"
+
+    done = events[-1][1]
+    tokens = "".join(p["text"] for name, p in events if name == "token")
+    assert tokens == done["answer"] == "Here are popular picks for you."
+    assert len(done["results"]) == 5
@@ -0,0 +1,82 @@
+"""
+Heading-aware chunking: bounded passages, heading context, overlap.
+"""
+import pathlib
+
+from app.services import support_loader
+from app.services.chunker import split_markdown, strip_headings
+
+_ARTICLE = """Intro line.
+
+## Shipping
+
+{long}
+
+## Returns
+
+Send items back within 30 days.
+"""
+
+
+def test_passages_are_bounded_and_keep_headings():
+    words = " ".join(f"w{i}" for i in range(300))
+    passages = split_markdown(_ARTICLE.format(long=words), max_chars=200, overlap=40)
+
+    assert all(len(p.text) <= 200 for p in passages)
+    assert passages[0].heading is None and passages[0].text == "Intro line."
+    shipping = [p for p in passages if p.heading == "Shipping"]
+    assert len(shipping) > 2 and all(p.text.startswith("## Shipping\n") for p in shipping)
+    assert passages[-1].heading == "Returns"
+    assert [p.index for p in passages] == list(range(len(passages)))
+
+    # consecutive windows of a long paragraph overlap
+    first, second = (strip_headings(p.text).split() for p in shipping[:2])
+    assert first[-1] in second
+
+
+def test_loader_emits_passages_with_parent_metadata(monkeypatch, tmp_path):
+    monkeypatch.setattr(support_loader, "_KB_PATH", tmp_path)
+    md = tmp_path / "faq.md"
+    md.write_text("## A\n\nalpha\n\n## B\n\nbeta\n")
+
+    docs = list(support_loader._passages("abc", pathlib.Path(md), md.read_text(), {"title": "FAQ"}))
+    assert [d.id for d in docs] == ["abc#0", "abc#1"]
+    assert docs[1].metadata == {"title": "FAQ", "parent_id": "abc", "source": "faq.md", "heading": "B", "chunk": 1}
+
+
+_NESTED = """# Return Policy
+
+## Eligibility
+
+Items can be returned within 30 days of delivery.
+
+## Refunds
+
+Refunds reach your card in 5 business days.
+"""
+
+
+def test_heading_only_sections_fold_into_the_next_passage():
+    passages = split_markdown(_NESTED, max_chars=300, overlap=40)
+    assert [p.heading for p in passages] == ["Eligibility", "Refunds"]
+    assert passages[0].text.startswith("# Return Policy\n## Eligibility\nItems can be returned")
+    assert all(strip_headings(p.text) for p in passages)
+    assert split_markdown("# Only a title\n")[0].text == "# Only a title"  # nothing to fold into
+
+
+def test_support_answer_is_never_just_a_heading(monkeypatch):
+    from app.services import support_rag
+
+    docs = [
+        {"document": "# Return Policy", "metadata": {"parent_id": "p", "chunk": 0}, "score": 1.0},
+        {"document": "## Eligibility\nItems can be returned within 30 days.", "metadata": {"parent_id": "p"}, "score": 0.5},
+    ]
+    assert support_rag._best_answer(docs) == "Items can be returned within 30 days."
+    assert support_rag._answer_text({"document": "# Return Policy\n\nSend it back.", "metadata": {}}) == "Send it back."
+
+    class _Snap:
+        documents = ["# Return Policy", "## Eligibility\nWithin 30 days."]
+        metadatas = [{"parent_id": "p", "chunk": 0}, {"parent_id": "p", "chunk": 1}]
+
+    monkeypatch.setattr(support_rag._SNAPSHOTS, "get", lambda: _Snap)
+    assert support_rag._best_answer(docs[:1]) == "Within 30 days."  # falls back to the parent article
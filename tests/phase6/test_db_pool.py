@@ -0,0 +1,52 @@
+"""
+Engine pool settings, SQLite pragmas and pool metrics.
+"""
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.core import database, metrics
+
+
+def test_file_engine_uses_configured_pool_and_wal(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 3)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 2)
+    monkeypatch.setattr(settings, "SQLITE_BUSY_TIMEOUT_MS", 1234)
+    eng = database.make_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+    try:
+        assert eng.pool.size() == 3 and eng.pool._max_overflow == 2
+        with eng.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 1234
+            assert eng.pool.checkedout() == 1
+        assert eng.pool.checkedout() == 0
+    finally:
+        eng.dispose()
+
+    memory = database.make_engine("sqlite:///:memory:")
+    assert type(memory.pool).__name__ != "_TimedQueuePool"
+
+
+def test_pool_metrics_are_exported():
+    waits = metrics.DB_POOL_WAIT_SECONDS.count()
+    with database.SessionLocal() as db:
+        db.execute(text("SELECT 1"))
+    assert metrics.DB_POOL_WAIT_SECONDS.count() == waits + 1
+
+    body = metrics.render()
+    assert "# TYPE db_pool_connections_in_use gauge" in body
+    assert "db_pool_connections_in_use 0" in body
+
+
+def test_request_path_sessions_are_timed(monkeypatch):
+    from app.services import indexer
+
+    eng = database.make_engine("sqlite:///:memory:")
+    database.Base.metadata.create_all(bind=eng)
+    monkeypatch.setattr(indexer, "SessionLocal", sessionmaker(bind=eng))
+    monkeypatch.setattr(indexer, "_categories", (None, ()))
+    sessions = metrics.DB_SESSION_SECONDS.count()
+    indexer.known_categories()
+    indexer._hydrate_legacy_many([(["1"], [None])])
+    assert metrics.DB_SESSION_SECONDS.count() == sessions + 2
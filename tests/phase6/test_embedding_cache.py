@@ -0,0 +1,63 @@
+"""
+Embedding memoisation: only misses reach the provider; disk tier survives
+a restart.
+"""
+import numpy as np
+
+from app.core.embedding_cache import EmbeddingCache, cached_embeddings
+from app.core.embeddings import EmbeddingProvider
+
+
+class _CountingProvider(EmbeddingProvider):
+    model_name = "counting"
+
+    def __init__(self, cache):
+        self.embedding_cache = cache
+        self.seen = []
+
+    @cached_embeddings
+    def embed(self, texts):
+        self.seen.extend(texts)
+        return [[float(len(t)), float(ord(t[0]))] for t in texts]
+
+
+def test_only_misses_are_embedded():
+    provider = _CountingProvider(EmbeddingCache(max_entries=10))
+
+    first = provider.embed(["a", "b"])
+    again = provider.embed(["b", "c", "a"])
+    assert provider.seen == ["a", "b", "c"]
+    np.testing.assert_array_equal(first[0], again[2])
+    assert again[0].dtype == np.float32 and not again[0].flags.writeable
+
+
+def test_lru_limit_and_disk_tier(tmp_path):
+    db = tmp_path / "emb.sqlite"
+    cache = EmbeddingCache(max_entries=2, disk_path=db, disk_max_entries=3)
+    vecs = [np.full(4, i, dtype=np.float32) for i in range(4)]
+    cache.put_many(["k0", "k1", "k2", "k3"], vecs)
+
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["disk_entries"] == 3
+
+    warm = EmbeddingCache(max_entries=2, disk_path=db)  # "restart"
+    got = warm.get_many(["k3", "k0"])
+    np.testing.assert_array_equal(got[0], vecs[3])
+    assert got[1] is None  # oldest row was dropped by the disk limit
+    assert warm.stats()["disk_hits"] == 1 and warm.stats()["misses"] == 1
+
+
+def test_disk_row_count_is_tracked_without_scans(tmp_path):
+    db = tmp_path / "emb.sqlite"
+    cache = EmbeddingCache(max_entries=1, disk_path=db, disk_max_entries=4)
+    vecs = [np.full(2, i, dtype=np.float32) for i in range(6)]
+    cache.put_many(["a", "b", "a"], vecs[:3])  # duplicate within the batch
+    cache.put_many(["b", "c"], vecs[3:5])  # "b" replaced, not counted twice
+    assert cache.stats()["disk_entries"] == 3
+    cache.put_many(["d", "e"], vecs[4:6])
+    assert cache.stats()["disk_entries"] == 4
+    assert EmbeddingCache(disk_path=db).stats()["disk_entries"] == 4  # FIFO: "a" went first
+    assert EmbeddingCache(disk_path=db).get_many(["a", "e"])[0] is None
+
+    plan = cache._db.execute("EXPLAIN QUERY PLAN SELECT rowid FROM embeddings ORDER BY created_at").fetchall()
+    assert "embeddings_created_at" in str(plan)
@@ -0,0 +1,42 @@
+"""
+Offline embeddings: one deterministic, production-width float32 generator.
+"""
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.config import settings
+from app.core.embeddings import FAKE_DIM, FakeEmbeddingProvider, fake_embeddings
+from app.core.llm import EmbeddingModel
+
+
+def test_vectors_are_deterministic_float32_rows():
+    texts = ["red mug", "blue lamp", "red mug"]
+    batch = fake_embeddings(texts)
+    assert batch.shape == (3, FAKE_DIM) and batch.dtype == np.float32
+    assert np.array_equal(batch[0], batch[2]) and not np.array_equal(batch[0], batch[1])
+    assert np.array_equal(batch[1], fake_embeddings(["blue lamp"])[0])
+    assert 0.0 <= batch.min() and batch.max() < 1.0
+
+
+def test_no_global_rng_state_and_thread_safe():
+    state = random.getstate()
+    expected = fake_embeddings([f"query {i}" for i in range(64)])
+    assert random.getstate() == state
+
+    with ThreadPoolExecutor(8) as pool:
+        rows = list(pool.map(lambda i: fake_embeddings([f"query {i}"])[0], range(64)))
+    assert np.array_equal(np.stack(rows), expected)
+
+
+def test_model_and_provider_agree(monkeypatch):
+    monkeypatch.setattr(settings, "EMBED_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "LOCAL_EMBEDDINGS", "fake")
+    model, provider = EmbeddingModel(), FakeEmbeddingProvider()
+    assert model.model_name == provider.model_name
+
+    vec = model.embed("desk lamp")
+    assert vec.dtype == np.float32 and vec.shape == (FAKE_DIM,)
+    assert np.array_equal(vec, provider.embed(["desk lamp"])[0])
+    assert all(np.array_equal(a, b) for a, b in zip(model.embed_batch(["a", "b"]), fake_embeddings(["a", "b"])))
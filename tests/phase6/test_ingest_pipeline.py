@@ -0,0 +1,65 @@
+"""
+Batched ingestion pipeline: batching, chunked writes, retries and resume.
+"""
+import pytest
+
+from app.services import ingest_pipeline
+from app.services.ingest_pipeline import Doc, run_pipeline, token_batches
+
+
+def _docs(n):
+    return [Doc(f"d{i}", "x" * 40, {"i": i}) for i in range(n)]  # 10 tokens each
+
+
+def test_token_budget_and_doc_cap():
+    sizes = [len(b) for b in token_batches(_docs(10), max_tokens=35, max_docs=5)]
+    assert sizes == [3, 3, 3, 1]
+    sizes = [len(b) for b in token_batches(_docs(10), max_tokens=10_000, max_docs=4)]
+    assert sizes == [4, 4, 2]
+
+
+def test_chunked_writes_and_retry(monkeypatch):
+    monkeypatch.setattr(ingest_pipeline.time, "sleep", lambda _s: None)
+    calls = {"n": 0}
+
+    def flaky_embed(texts):
+        calls["n"] += 1
+        if calls["n"] == 2:
+            raise RuntimeError("429 Too Many Requests")
+        return [[float(len(t))] for t in texts]
+
+    chunks = []
+    report = run_pipeline(
+        iter(_docs(10)),
+        flaky_embed,
+        lambda ids, docs, metas, vecs: chunks.append(list(ids)),
+        workers=1,
+        batch_docs=3,
+        write_chunk=4,
+    )
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    assert sum(chunks, []) == [f"d{i}" for i in range(10)]
+    assert report["documents"] == 10 and report["batches"] == 4
+
+
+def test_resume_after_crash():
+    stored = {}
+
+    def write(ids, docs, metas, vecs):
+        stored.update(zip(ids, vecs))
+
+    def crashing_embed(texts):
+        if len(stored) >= 4:
+            raise RuntimeError("provider down")
+        return [[1.0] for _ in texts]
+
+    with pytest.raises(RuntimeError):
+        run_pipeline(iter(_docs(10)), crashing_embed, write, workers=1, batch_docs=2, write_chunk=2, retries=0)
+    assert 0 < len(stored) < 10
+
+    done_before = set(stored)
+    embedded = []
+    remaining = (d for d in _docs(10) if d.id not in done_before)
+    run_pipeline(remaining, lambda t: embedded.extend(t) or [[2.0] for _ in t], write, workers=2, batch_docs=2)
+    assert len(stored) == 10
+    assert len(embedded) == 10 - len(done_before)
@@ -0,0 +1,39 @@
+"""
+SnapshotCache loads once per generation and reloads after `bump_generation`.
+"""
+import pytest
+
+from app.core import vector_store
+from app.core.snapshot import SnapshotCache
+from app.core.vector_store import bump_generation, get_collection
+
+_NAME = "snapshot-test"
+
+
+@pytest.fixture()
+def collection():
+    col = get_collection(_NAME)
+    yield col
+    vector_store._client.delete_collection(_NAME)
+
+
+def test_reload_only_after_generation_bump(collection):
+    collection.add(ids=["a"], documents=["alpha"], embeddings=[[1.0, 0.0]])
+    bump_generation(_NAME)
+
+    cache = SnapshotCache(_NAME)
+    first = cache.get()
+    assert cache.get() is first  # served from memory
+    assert len(first) == 1
+
+    collection.add(ids=["b"], documents=["beta"], embeddings=[[0.0, 1.0]])
+    assert cache.get() is first  # no bump yet → still the old snapshot
+
+    bump_generation(_NAME)
+    second = cache.get()
+    assert second is not first and len(second) == 2
+    assert second.documents[second.index.search([0.0, 1.0], 1)[0][0]] == "beta"
+
+    stats = cache.stats()
+    assert stats["reloads"] == 2 and stats["hits"] == 2
+    assert stats["documents"] == 2 and stats["bytes"] > 0
@@ -0,0 +1,38 @@
+"""
+Cheap imports: heavy clients are built on first use or by the warm-up hook.
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+from app.config import settings
+from app.services import agent_router, warmup
+
+_BACKEND = Path(__file__).resolve().parents[2] / "backend"
+
+
+def test_importing_the_app_skips_heavy_libraries():
+    code = (
+        "import sys, app.main, app.asgi; "
+        "print(sorted(m for m in ('chromadb', 'langgraph', 'langchain', 'openai') if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=_BACKEND, capture_output=True, text=True, check=True
+    ).stdout
+    assert out.strip() == "[]"
+
+
+def test_router_is_built_on_first_access():
+    router = agent_router.router
+    assert agent_router.router is router
+    assert agent_router.cached_router._graph is router
+
+
+def test_warmup_runs_every_step(monkeypatch):
+    monkeypatch.setattr(settings, "STARTUP_WARMUP", False)
+    assert warmup.start() is False
+
+    status = warmup.run()
+    assert status["state"] == "done"
+    assert set(status["steps"]) == {"chroma", "router", "support_kb"}
+    assert "failed" not in status["steps"].values()
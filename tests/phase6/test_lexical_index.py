@@ -0,0 +1,68 @@
+"""
+BM25 inverted index: ranking, incremental updates, persistence and fusion.
+"""
+import numpy as np
+import pytest
+
+from app.core.lexical_index import BM25Index, rrf, tokenize
+from app.core.retrieval import VectorIndex
+from app.core.snapshot import Snapshot
+from app.services import support_rag
+
+_DOCS = {
+    "returns": "How to return an item: returns are accepted within 30 days of delivery.",
+    "shipping": "Shipping takes 3-5 business days. Express shipping is available.",
+    "warranty": "Every product carries a two year warranty against defects.",
+    "payments": "We accept cards and PayPal. Payments are charged at dispatch.",
+}
+
+
+def test_tokenize_drops_stopwords_and_folds_plurals():
+    assert tokenize("How do I return my Boxes?") == ["return", "box"]
+
+
+def test_bm25_ranks_term_matches_first():
+    index = BM25Index.build(_DOCS.items())
+    hits = index.search("how long does shipping take", k=3)
+    assert hits[0][0] == "shipping"
+    assert all(doc_id != "warranty" for doc_id, _ in hits)
+    assert index.search("the of and", k=3) == []
+
+
+def test_incremental_updates_match_a_fresh_build(tmp_path):
+    index = BM25Index.build(_DOCS.items())
+    index.add("returns", "Refunds are issued to the original card.")
+    index.remove("payments")
+    index.add("gift", "Gift cards never expire.")
+
+    expected = dict(_DOCS, returns="Refunds are issued to the original card.", gift="Gift cards never expire.")
+    del expected["payments"]
+    fresh = BM25Index.build(expected.items())
+    for q in ("card refunds", "shipping", "gift card warranty"):
+        assert index.search(q) == pytest.approx(fresh.search(q))
+
+    index.save(tmp_path / "kb.json")
+    loaded = BM25Index.load(tmp_path / "kb.json")
+    assert len(loaded) == 4 and loaded.search("card") == pytest.approx(index.search("card"))
+    assert BM25Index.load(tmp_path / "missing.json") is None
+
+
+def test_rrf_prefers_agreement():
+    fused = rrf([["a", "b", "c"], ["c", "d"]])
+    assert fused[0][0] == "c"
+    assert [d for d, _ in fused][1:] == ["a", "b", "d"]  # ties: earlier ranking first
+    assert rrf([["a"], ["b"]], weights=[1.0, 2.0])[0][0] == "b"
+
+
+def test_support_retrieval_fuses_lexical_hits():
+    ids = tuple(_DOCS)
+    docs = tuple(_DOCS.values())
+    snap = Snapshot(
+        1,
+        ids,
+        docs,
+        tuple({} for _ in ids),
+        VectorIndex(np.ones((len(ids), 1536), dtype=np.float32)),  # uninformative vectors
+        BM25Index.build(zip(ids, docs)),
+    )
+    assert support_rag._retrieve_from(snap, "when is my payment charged", k=2)[0]["document"] == _DOCS["payments"]
@@ -0,0 +1,68 @@
+"""
+Offline hashed n-gram TF-IDF embeddings and their use for products.
+"""
+import uuid
+
+import numpy as np
+from chromadb.api.types import EmbeddingFunction
+
+from app.config import settings
+from app.core import vector_store
+from app.core.embeddings import HashingEmbeddingProvider, local_provider
+from app.services import indexer
+
+_DOCS = [
+    "Bright red cotton shirt",
+    "Classic denim jeans",
+    "Wireless desk lamp with USB charger",
+    "Returns are free within 30 days of delivery.",
+]
+
+
+class _OwnEF(EmbeddingFunction):
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        return [[1.0, 0.0] for _ in input]
+
+    @staticmethod
+    def name():
+        return "test-own"
+
+
+def test_similar_texts_rank_first():
+    provider = HashingEmbeddingProvider()
+    docs = provider.encode(_DOCS)
+    assert docs.dtype == np.float32 and docs.shape == (4, provider.dim)
+    assert np.allclose(np.linalg.norm(docs, axis=1), 1.0)
+
+    queries = ["red shirts", "lamps", "how do I return my order"]
+    assert list((provider.encode(queries) @ docs.T).argmax(axis=1)) == [0, 2, 3]
+    assert np.array_equal(provider.encode(["lamps"])[0], provider.encode(["jeans", "lamps"])[1])
+    assert not provider.encode(["", "the of"]).any()  # nothing left after stop words
+
+
+def test_fit_adds_idf_and_changes_the_model_name():
+    provider = HashingEmbeddingProvider()
+    fitted = provider.fit(_DOCS)
+    assert fitted.idf.shape == (provider.dim,)
+    assert fitted.model_name.startswith(provider.model_name + "-idf")
+    assert fitted.model_name == provider.fit(_DOCS).model_name
+
+
+def test_products_use_local_vectors_unless_the_collection_has_its_own(monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_EMBEDDINGS", "hashing")
+    default = vector_store._client.get_or_create_collection(f"t-{uuid.uuid4().hex[:8]}")
+    own = vector_store._client.get_or_create_collection(f"t-{uuid.uuid4().hex[:8]}", embedding_function=_OwnEF())
+    try:
+        assert indexer._local_embedder(default) is local_provider()
+        assert indexer._local_embedder(vector_store.ThreadedCollection(default)) is local_provider()
+        assert indexer._local_embedder(own) is None
+        assert list(indexer._query_input(own, "lamp")) == ["query_texts"]
+
+        monkeypatch.setattr(settings, "LOCAL_EMBEDDINGS", "fake")
+        assert indexer._local_embedder(default) is None
+    finally:
+        for col in (default, own):
+            vector_store._client.delete_collection(col.name)
@@ -0,0 +1,86 @@
+"""
+Latency metrics, Prometheus exposition and request tracing.
+"""
+import asyncio
+import uuid
+
+import httpx
+
+from app.asgi import app as asgi_app
+from app.config import settings
+from app.core import metrics
+from app.main import create_app
+
+
+def test_histogram_exposition():
+    hist = metrics.Histogram("demo_seconds", "Demo.", ("op",), buckets=(0.1, 1.0))
+    hist.observe(0.05, op='say "hi"')
+    hist.observe(0.5, op='say "hi"')
+    hist.observe(3.0, op='say "hi"')
+    lines = list(hist.samples())
+    assert lines[:3] == [
+        'demo_seconds_bucket{op="say \\"hi\\"",le="0.1"} 1',
+        'demo_seconds_bucket{op="say \\"hi\\"",le="1"} 2',
+        'demo_seconds_bucket{op="say \\"hi\\"",le="+Inf"} 3',
+    ]
+    assert lines[3:] == ['demo_seconds_sum{op="say \\"hi\\""} 3.55', 'demo_seconds_count{op="say \\"hi\\""} 3']
+
+
+def test_samples_are_a_consistent_snapshot():
+    hist = metrics.Histogram("snap_seconds", "Demo.", buckets=(1.0,))
+    counter = metrics.Counter("snap_total", "Demo.", ("op",))
+    hist.observe(0.5)
+    counter.inc(op="a")
+    hist_lines, counter_lines = hist.samples(), counter.samples()
+    first = next(hist_lines), next(counter_lines)
+    hist.observe(2.0)  # concurrent writers while a scrape is formatting
+    counter.inc(op="b")
+    assert first == ('snap_seconds_bucket{le="1"} 1', 'snap_total{op="a"} 1')
+    assert list(hist_lines) == ['snap_seconds_bucket{le="+Inf"} 1', "snap_seconds_sum 0.5", "snap_seconds_count 1"]
+    assert list(counter_lines) == []
+
+
+def test_chat_request_is_traced_and_exported():
+    client = create_app().test_client()
+    before = metrics.NODE_SECONDS.count(node="ask_llm")
+
+    query = f"suggest a gift {uuid.uuid4().hex}"
+    resp = client.post("/api/chat", json={"query": query}, headers={"X-Request-ID": "req-42"})
+    assert resp.headers["X-Request-ID"] == "req-42"
+    assert "node-ask_llm;dur=" in resp.headers["Server-Timing"]
+    assert metrics.NODE_SECONDS.count(node="ask_llm") == before + 1
+
+    generated = client.get("/api/health").headers["X-Request-ID"]
+    assert len(generated) == 32
+
+    body = client.get("/api/metrics").get_data(as_text=True)
+    assert "# TYPE chat_node_seconds histogram" in body
+    assert 'http_requests_total{method="POST",endpoint="/api/chat",status="200"}' in body
+    assert 'chat_route_total{tool="fallback"}' in body
+
+
+def test_disabled_metrics_are_pass_through(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+    sentinel = object()
+    assert metrics.instrument_collection(sentinel) is sentinel
+
+    client = create_app().test_client()
+    before = metrics.NODE_SECONDS.count(node="ask_llm")
+    resp = client.post("/api/chat", json={"query": f"suggest a lamp {uuid.uuid4().hex}"})
+    assert "Server-Timing" not in resp.headers and resp.headers["X-Request-ID"]
+    assert metrics.NODE_SECONDS.count(node="ask_llm") == before
+
+
+def test_asgi_app_traces_requests():
+    async def call():
+        transport = httpx.ASGITransport(app=asgi_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            body = {"query": f"suggest a mug {uuid.uuid4().hex}"}
+            chat = await client.post("/api/chat", json=body, headers={"X-Request-ID": "a1"})
+            return chat, await client.get("/api/metrics")
+
+    chat, exported = asyncio.run(call())
+    assert chat.headers["x-request-id"] == "a1"
+    assert "node-ask_llm" in chat.headers["server-timing"]
+    assert exported.headers["content-type"].startswith("text/plain")
+    assert 'endpoint="/api/chat"' in exported.text
@@ -0,0 +1,98 @@
+"""
+Incremental product indexing and shadow-collection rebuilds.
+"""
+import uuid
+
+import pytest
+from chromadb.api.types import EmbeddingFunction
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import vector_store
+from app.core.database import Base
+from app.core.lexical_index import index_path
+from app.models.index_state import ProductIndexState
+from app.models.product import Product
+from app.services import indexer
+
+
+class _LengthEF(EmbeddingFunction):
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        return [[float(len(t)), float(sum(map(ord, t)) % 97)] for t in input]
+
+    @staticmethod
+    def name():
+        return "test-length"
+
+
+@pytest.fixture()
+def env(monkeypatch):
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    logical = f"prod{uuid.uuid4().hex[:8]}"
+    upserts = []
+    ef = _LengthEF()
+
+    def get_collection(name):
+        col = vector_store._client.get_or_create_collection(vector_store.resolve_alias(name), embedding_function=ef)
+        real = col.upsert
+        col.upsert = lambda **kw: upserts.append(list(kw["ids"])) or real(**kw)
+        return col
+
+    monkeypatch.setattr(indexer, "_COLLECTION", logical)
+    monkeypatch.setattr(indexer, "get_collection", get_collection)
+    monkeypatch.setattr(indexer.settings, "PRODUCT_INDEX_CHUNK", 2)
+    yield session, logical, upserts
+    for name in vector_store.collection_names():
+        if name.startswith(logical):
+            vector_store.drop_collection(name)
+    index_path(logical).unlink(missing_ok=True)
+
+
+def _add(session, *ids, price=10.0):
+    for i in ids:
+        session.merge(Product(id=i, title=f"P{i}", description=f"product {i}", price=price))
+    session.commit()
+
+
+def test_only_new_or_changed_rows_are_upserted(env):
+    session, logical, upserts = env
+    _add(session, 1, 2, 3)
+    assert indexer.build_product_index(session) == 3
+    assert indexer.build_product_index(session) == 0
+
+    _add(session, 2, price=99.0)
+    _add(session, 4)
+    upserts.clear()
+    assert indexer.build_product_index(session) == 2
+    assert sorted(sum(upserts, [])) == ["2", "4"]
+
+    session.delete(session.get(Product, 1))
+    session.commit()
+    indexer.build_product_index(session)
+    assert sorted(vector_store.get_collection(logical).get()["ids"]) == ["2", "3", "4"]
+    assert session.query(ProductIndexState).count() == 3
+
+
+def test_rebuild_swaps_in_a_shadow_collection(env):
+    session, logical, upserts = env
+    _add(session, 1, 2)
+    indexer.build_product_index(session)
+    before = vector_store.resolve_alias(logical)
+    gen = vector_store.collection_generation(logical)
+
+    _add(session, 3)
+    assert indexer.rebuild_product_index(session) == 3
+    after = vector_store.resolve_alias(logical)
+    assert after != before and after.startswith(f"{logical}-")
+    assert vector_store.collection_generation(logical) == gen + 1
+    assert before in vector_store.collection_names()  # kept for in-flight readers
+    assert sorted(vector_store.get_collection(logical).get()["ids"]) == ["1", "2", "3"]
+
+    indexer.rebuild_product_index(session)
+    assert before not in vector_store.collection_names()
@@ -0,0 +1,100 @@
+"""
+Quantized, memory-mapped product index: exact re-ranking, persistence and
+routing through `get_collection`.
+"""
+import uuid
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import vector_store
+from app.core.database import Base
+from app.core.quantized_index import QuantizedCollection, matches_where, quantize
+from app.core.retrieval import VectorIndex
+from app.models.product import Product
+from app.services import indexer
+
+
+def _vectors(n, dim=32, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((8, dim))
+    return (centers[rng.integers(0, 8, n)] + 0.5 * rng.standard_normal((n, dim))).astype(np.float32)
+
+
+def test_quantize_round_trip():
+    vectors = _vectors(50)
+    codes, scales = quantize(vectors)
+    assert codes.dtype == np.int8 and scales.dtype == np.float32
+    assert np.abs(codes.astype(np.float32) * scales[:, None] - vectors).max() <= scales.max() / 2 + 1e-6
+
+
+def test_query_matches_brute_force(tmp_path):
+    vectors = _vectors(3000)
+    col = QuantizedCollection(tmp_path / "products")
+    for start in range(0, len(vectors), 1000):  # appended in chunks, like the indexer
+        ids = [str(i) for i in range(start, start + 1000)]
+        col.upsert(ids=ids, embeddings=vectors[start : start + 1000], metadatas=[{"i": int(i)} for i in ids])
+
+    queries = _vectors(20, seed=1)
+    res = col.query(query_embeddings=queries, n_results=10, include=["distances", "metadatas"])
+    exact = VectorIndex(vectors)
+    for ids, dists, metas, q in zip(res["ids"], res["distances"], res["metadatas"], queries):
+        top, d = exact.search(q, 10)
+        assert ids == [str(i) for i in top]
+        assert np.allclose(dists, d**2, rtol=1e-4, atol=1e-3)  # squared L2, like Chroma
+        assert [m["i"] for m in metas] == top.tolist()
+
+
+def test_upsert_delete_get_and_where(tmp_path):
+    writer = QuantizedCollection(tmp_path / "products")
+    vectors = _vectors(6)
+    metas = [{"category_key": "mugs" if i % 2 else "lamps", "price": float(i)} for i in range(6)]
+    writer.upsert(ids=[str(i) for i in range(6)], embeddings=vectors, metadatas=metas, documents=list("abcdef"))
+    reader = QuantizedCollection(tmp_path / "products")  # e.g. another worker
+    assert reader.count() == 6
+
+    writer.upsert(ids=["1"], embeddings=vectors[5:6] * 2, metadatas=[{"category_key": "mugs", "price": 9.0}])
+    writer.delete(ids=["4", "missing"])
+    assert reader.count() == 5
+    got = reader.get(ids=["4", "1", "0"], include=["metadatas", "documents"])
+    assert got["ids"] == ["1", "0"] and got["metadatas"][0]["price"] == 9.0 and got["documents"] == [None, "a"]
+
+    where = {"$and": [{"category_key": {"$eq": "mugs"}}, {"price": {"$lte": 5.0}}]}
+    res = reader.query(query_embeddings=[vectors[1]], n_results=5, where=where, include=["metadatas"])
+    assert sorted(res["ids"][0]) == ["3", "5"]
+    assert all(matches_where(m, where) for m in res["metadatas"][0])
+    assert not matches_where({"price": 1.0}, {"category_key": "mugs"})
+
+    with pytest.raises(ValueError):
+        writer.upsert(ids=["9"], embeddings=np.ones((1, 3), dtype=np.float32))
+    assert QuantizedCollection(tmp_path / "empty").query(query_embeddings=[[1.0]], n_results=3)["ids"] == [[]]
+
+
+def test_products_use_the_quantized_backend(monkeypatch, tmp_path):
+    monkeypatch.setenv("CHROMA_DATA", str(tmp_path))
+    monkeypatch.setattr(indexer.settings, "PRODUCT_INDEX_BACKEND", "quantized")
+    monkeypatch.setattr(indexer.settings, "LOCAL_EMBEDDINGS", "hashing")
+    logical = f"products-t{uuid.uuid4().hex[:8]}"
+    monkeypatch.setattr(indexer, "_COLLECTION", logical)
+
+    engine = create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    for i, title in enumerate(["Red cotton shirt", "Wireless desk lamp", "Denim jeans"], start=1):
+        session.add(Product(id=i, title=title, description=title, price=10.0 * i))
+    session.commit()
+
+    assert indexer.build_product_index(session) == 3
+    col = vector_store.get_collection(logical)
+    assert isinstance(getattr(col, "_collection", col), QuantizedCollection)
+    assert (tmp_path / "chromadb" / "quantized" / logical / "codes.i8").exists()
+    res = col.query(**indexer._query_input(col, "desk lamps"), n_results=1, include=["metadatas"])
+    assert res["ids"] == [["2"]] and res["metadatas"][0][0]["title"] == "Wireless desk lamp"
+
+    assert indexer.rebuild_product_index(session) == 3
+    shadow = vector_store.resolve_alias(logical)
+    assert shadow in vector_store.collection_names() and vector_store.get_collection(logical).count() == 3
+    vector_store.drop_collection(shadow)
+    assert shadow not in vector_store.collection_names()
@@ -0,0 +1,53 @@
+"""
+ResponseCache: exact + semantic tiers, TTL, LRU and generation invalidation.
+"""
+import time
+
+from app.core.response_cache import ResponseCache
+from app.core.vector_store import bump_generation
+
+_VECTORS = {
+    "what is your return policy": [1.0, 0.0, 0.0],
+    "tell me the return policy": [0.99, 0.05, 0.0],
+    "how long does shipping take": [0.0, 1.0, 0.0],
+}
+
+
+def _embed(text):
+    return _VECTORS.get(text.lower().strip("?!. "), [0.0, 0.0, 1.0])
+
+
+def test_exact_and_semantic_hits():
+    cache = ResponseCache("t", embed=_embed, similarity=0.95)
+    compute = cache.memoize(lambda q: {"answer": f"answer to {q}"})
+
+    first = compute("What is your return policy?")
+    assert compute("what is your   RETURN policy") == first  # exact (normalised)
+    assert compute("Tell me the return policy") == first  # semantic
+    assert compute("How long does shipping take?") != first
+
+    stats = cache.stats()
+    assert stats["exact_hits"] == 1 and stats["semantic_hits"] == 1
+    assert stats["misses"] == 2 and stats["hit_ratio"] == 0.5
+
+
+def test_ttl_and_lru_eviction():
+    cache = ResponseCache("t", ttl=0.05, max_entries=2, similarity=2.0)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    cache.get("a")  # a is now most recently used
+    cache.put("c", {"v": 3})
+    assert cache.get("b") is None and cache.get("a") == {"v": 1}
+
+    time.sleep(0.06)
+    assert cache.get("c") is None
+
+
+def test_invalidated_when_dependency_rebuilt():
+    cache = ResponseCache("t", depends_on=("cache-dep-test",), similarity=2.0)
+    cache.put("q", {"v": 1})
+    assert cache.get("q") == {"v": 1}
+
+    bump_generation("cache-dep-test")
+    assert cache.get("q") is None
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,32 @@
+"""
+VectorIndex must agree with a naive brute-force ranking for both metrics.
+"""
+import numpy as np
+import pytest
+
+from app.core.retrieval import VectorIndex
+
+
+@pytest.mark.parametrize("metric", ["l2", "cosine"])
+def test_matches_brute_force(metric):
+    rng = np.random.default_rng(42)
+    data = rng.normal(size=(200, 16)).astype(np.float32)
+    query = rng.normal(size=16).astype(np.float32)
+
+    if metric == "l2":
+        expected = np.linalg.norm(data - query, axis=1)
+    else:
+        expected = 1 - (data @ query) / (np.linalg.norm(data, axis=1) * np.linalg.norm(query))
+
+    top, dist = VectorIndex(data, metric=metric).search(query, k=5)
+    assert list(top) == list(np.argsort(expected)[:5])
+    np.testing.assert_allclose(dist, np.sort(expected)[:5], rtol=1e-4, atol=1e-5)
+
+
+def test_k_larger_than_index_and_empty():
+    index = VectorIndex([[0.0, 1.0], [1.0, 0.0]])
+    top, _ = index.search([0.9, 0.1], k=10)
+    assert list(top) == [1, 0]
+
+    top, dist = VectorIndex([]).search([0.0, 1.0], k=3)
+    assert len(top) == 0 and len(dist) == 0
@@ -0,0 +1,165 @@
+"""
+Batch product search: one multi-query vector call and one SQL statement per
+chunk, exposed as a streamed NDJSON endpoint; batched support retrieval.
+"""
+import asyncio
+import json
+import uuid
+
+import httpx
+import numpy as np
+import pytest
+from chromadb.api.types import EmbeddingFunction
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.asgi import app as asgi_app
+from app.core import vector_store
+from app.core.database import Base
+from app.core.lexical_index import index_path
+from app.core.retrieval import VectorIndex
+from app.main import create_app
+from app.models.product import Product
+from app.services import indexer, support_rag
+
+_TITLES = ["Green Mug", "Blue Jeans", "Desk Lamp", "Red Shirt", "Travel Mug", "Wool Socks"]
+_QUERIES = ["mug", "jeans under $30", "", "lamp for my desk", "red shirt", "mug"]
+
+
+class _LengthEF(EmbeddingFunction):
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        return [[float(len(t)), float(sum(map(ord, t)) % 97)] for t in input]
+
+    @staticmethod
+    def name():
+        return "test-length"
+
+
+class _CountingCollection:
+    """Records the number of query texts per `query` call."""
+
+    def __init__(self, col):
+        self._col, self.queries = col, []
+
+    def query(self, **kwargs):
+        self.queries.append(len(kwargs.get("query_texts") or kwargs.get("query_embeddings")))
+        return self._col.query(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._col, name)
+
+
+@pytest.fixture()
+def env(monkeypatch):
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    for i, title in enumerate(_TITLES, start=1):
+        session.add(Product(id=i, title=title, description=title.lower(), category="home", price=10.0 * i))
+    session.commit()
+
+    name = f"batch{uuid.uuid4().hex[:8]}"
+    col = _CountingCollection(vector_store._client.get_or_create_collection(name, embedding_function=_LengthEF()))
+    monkeypatch.setattr(indexer, "_COLLECTION", name)
+    monkeypatch.setattr(indexer, "get_collection", lambda _n: col)
+    monkeypatch.setattr(indexer, "SessionLocal", factory)
+    indexer.build_product_index(session)
+    col.queries.clear()
+    yield session, col, engine
+    vector_store.drop_collection(name)
+    index_path(name).unlink(missing_ok=True)
+
+
+def _statements(engine):
+    seen = []
+    event.listen(engine, "before_cursor_execute", lambda *args: seen.append(args[2]))
+    return seen
+
+
+def test_batch_matches_single_queries(env, monkeypatch):
+    _session, col, _engine = env
+    monkeypatch.setattr(indexer.settings, "SEARCH_BATCH_CHUNK", 4)
+    single = [indexer.search_product_payloads(q) if q.strip() else [] for q in _QUERIES]
+    col.queries.clear()
+
+    assert list(indexer.search_product_payloads_batch(_QUERIES)) == single
+    # one call per chunk and distinct `where` ("under $30" adds a price filter)
+    assert sum(col.queries) == 5 and len(col.queries) < 5
+
+
+def test_legacy_entries_are_hydrated_with_one_statement(env):
+    _session, col, engine = env
+    ids = [str(i) for i in range(1, 7)]
+    col.delete(ids=ids)
+    col.add(ids=ids, documents=_TITLES, metadatas=[{"title": "x", "price": 1.0}] * 6)  # pre-payload entries
+    indexer.known_categories()
+    seen = _statements(engine)
+    results = list(indexer.search_product_payloads_batch(["mug", "lamp", "shirt"]))
+    assert len(seen) == 1
+    assert all(results) and all(p["title"] in _TITLES for hits in results for p in hits)
+    assert results == [indexer.search_product_payloads(q) for q in ["mug", "lamp", "shirt"]]
+
+
+def test_search_products_batch(env):
+    session, col, engine = env
+    seen = _statements(engine)
+    batch = indexer.search_products_batch(session, ["mug", "lamp"], k=2)
+    assert col.queries == [2] and len(seen) == 1
+    assert [[p.id for p in hits] for hits in batch] == [
+        [int(i) for i in col.query(query_texts=[q], n_results=2, include=[])["ids"][0]] for q in ["mug", "lamp"]
+    ]
+    assert indexer.search_products_batch(session, []) == []
+
+
+def test_flask_endpoint_streams_ndjson(env):
+    client = create_app().test_client()
+    resp = client.post("/api/search/batch", json={"queries": ["mug", " ", "lamp"], "k": 2})
+    assert resp.status_code == 200 and resp.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [(line["index"], line["query"]) for line in lines] == [(0, "mug"), (1, " "), (2, "lamp")]
+    assert lines[0]["results"] == indexer.search_product_payloads("mug", k=2) and lines[1]["results"] == []
+
+    for body in [{"queries": []}, {"queries": ["a", 1]}, {"queries": ["a"], "k": 0}, {"queries": ["a"], "k": True},
+                 {"queries": ["a"], "filters": {"max_price": "x"}}, {"queries": ["a"], "filters": {"max_price": [1]}},
+                 {"queries": ["a"], "filters": {"category": 5}}, ["a"]]:
+        assert client.post("/api/search/batch", json=body).status_code == 400
+
+
+def test_asgi_endpoint_streams_ndjson(env, monkeypatch):
+    monkeypatch.setattr(indexer.settings, "SEARCH_BATCH_CHUNK", 2)
+    monkeypatch.setattr(indexer.settings, "SEARCH_BATCH_MAX", 3)
+
+    async def call(body):
+        transport = httpx.ASGITransport(app=asgi_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/search/batch", json=body)
+
+    resp = asyncio.run(call({"queries": ["mug", "jeans", "lamp"], "filters": {"max_price": 30}}))
+    assert resp.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert all(p["price"] <= 30 for line in lines for p in line["results"])
+    for body in [{"queries": ["a"] * 4}, {"queries": ["a"], "filters": {"max_price": [1]}},
+                 {"queries": ["a"], "filters": {"category": 5}}]:
+        assert asyncio.run(call(body)).status_code == 400
+
+
+def test_search_many_matches_search():
+    rng = np.random.default_rng(0)
+    index = VectorIndex(rng.standard_normal((200, 8)), metric="cosine")
+    queries = rng.standard_normal((5, 8))
+    ids, dists = index.search_many(queries, 4)
+    assert ids.shape == dists.shape == (5, 4)
+    for q, row, d in zip(queries, ids, dists):
+        want, want_d = index.search(q, 4)
+        assert row.tolist() == want.tolist() and np.allclose(d, want_d)
+
+
+def test_support_answer_batch_matches_single():
+    queries = ["How do I return an item?", "shipping times", "zzz"]
+    assert support_rag.support_answer_batch(queries) == [support_rag.support_answer(q) for q in queries]
+    assert support_rag.support_answer_batch([]) == []
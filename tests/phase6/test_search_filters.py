@@ -0,0 +1,118 @@
+"""
+Category / price filters: parsing from text and push-down into Chroma.
+"""
+import uuid
+
+import pytest
+from chromadb.api.types import EmbeddingFunction
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import vector_store
+from app.core.database import Base
+from app.core.lexical_index import index_path
+from app.main import create_app
+from app.models.product import Product
+from app.services import indexer
+from app.services.search_filters import SearchFilters, extract_filters
+
+_CATEGORIES = ("electronics", "footwear", "men's clothing")
+
+
+@pytest.mark.parametrize(
+    "query, text, expected",
+    [
+        ("running shoes under $50", "running shoes", SearchFilters(None, None, 50.0)),
+        ("mugs between 5 and 15 dollars", "mugs", SearchFilters(None, 5.0, 15.0)),
+        ("electronics over $100", "electronics", SearchFilters("electronics", 100.0, None)),
+        ("men's clothing $20-$40", "men's clothing", SearchFilters("men's clothing", 20.0, 40.0)),
+        ("cheap footwear", "cheap footwear", SearchFilters("footwear")),
+        ("a blue mug", "a blue mug", SearchFilters()),
+    ],
+)
+def test_extract_filters(query, text, expected):
+    assert extract_filters(query, _CATEGORIES) == (text, expected)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "laptop under 2kg",
+        "iPhone 12 Pro Max 256GB",
+        "tv from 2020",
+        "monitor over 27 inch",
+        "toys for kids under 10",
+        "pack of at least 6 batteries",
+        "phones under 128 gb below $",
+        "tv between 2019 and 2021",
+    ],
+)
+def test_bare_numbers_are_not_prices(query):
+    assert extract_filters(query, _CATEGORIES) == (query, SearchFilters())
+
+
+def test_currency_marker_on_either_side():
+    assert extract_filters("laptop under 2kg under 900 bucks")[1] == SearchFilters(max_price=900.0)
+    assert extract_filters("tv from 2020 over 300usd")[1] == SearchFilters(min_price=300.0)
+    assert extract_filters("lamp from 10 to $25")[1] == SearchFilters(None, 10.0, 25.0)
+
+
+def test_where_clause_and_explicit_values_win():
+    assert not SearchFilters()
+    assert SearchFilters().where() is None
+    assert SearchFilters(max_price=9.5).where() == {"price": {"$lte": 9.5}}
+    f = SearchFilters.from_mapping({"category": "Home", "min_price": "3"}).merged(SearchFilters("x", 1.0, 8.0))
+    assert f == SearchFilters("home", 3.0, 8.0)
+    assert f.where() == {"$and": [{"category_key": {"$eq": "home"}}, {"price": {"$gte": 3.0}}, {"price": {"$lte": 8.0}}]}
+    for bad in [{"max_price": "cheap"}, {"max_price": [1]}, {"min_price": True}, {"max_price": "nan"},
+                {"category": 5}, {"category": ["home"]}, ["home"]]:
+        with pytest.raises(ValueError):
+            SearchFilters.from_mapping(bad)
+
+
+class _ConstantEF(EmbeddingFunction):
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        return [[1.0, 0.0] for _ in input]
+
+    @staticmethod
+    def name():
+        return "test-constant"
+
+
+def test_filters_are_pushed_down(monkeypatch):
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    session.add_all(
+        [
+            Product(id=1, title="Trail Shoes", description="shoes", category="Footwear", price=45),
+            Product(id=2, title="Boots", description="shoes", category="Footwear", price=120),
+            Product(id=3, title="Headphones", description="audio", category="Electronics", price=40),
+        ]
+    )
+    session.commit()
+
+    name = f"flt{uuid.uuid4().hex[:8]}"
+    col = vector_store._client.get_or_create_collection(name, embedding_function=_ConstantEF())
+    monkeypatch.setattr(indexer, "_COLLECTION", name)
+    monkeypatch.setattr(indexer, "get_collection", lambda _n: col)
+    monkeypatch.setattr(indexer, "SessionLocal", factory)
+    monkeypatch.setattr(indexer, "_categories", (-1, ()))
+    try:
+        indexer.build_product_index(session)
+        titles = lambda rs: sorted(r["title"] for r in rs)  # noqa: E731
+
+        assert titles(indexer.search_product_payloads("footwear under $50", k=3)) == ["Trail Shoes"]
+        assert titles(indexer.search_product_payloads("anything", k=3, filters=SearchFilters(min_price=100))) == ["Boots"]
+
+        client = create_app().test_client()
+        resp = client.get("/api/search", query_string={"q": "gear", "category": "electronics"})
+        assert [p["title"] for p in resp.get_json()] == ["Headphones"]
+        assert client.get("/api/search?q=gear&max_price=abc").status_code == 400
+    finally:
+        vector_store.drop_collection(name)
+        index_path(name).unlink(missing_ok=True)
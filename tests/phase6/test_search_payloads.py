@@ -0,0 +1,88 @@
+"""
+Product search served from denormalized vector metadata (no SQL round-trip).
+"""
+import asyncio
+import uuid
+
+import pytest
+from chromadb.api.types import EmbeddingFunction
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import vector_store
+from app.core.database import Base
+from app.core.lexical_index import index_path
+from app.models.product import Product
+from app.services import indexer
+
+
+class _LengthEF(EmbeddingFunction):
+    def __init__(self):
+        pass
+
+    def __call__(self, input):
+        return [[float(len(t)), float(sum(map(ord, t)) % 97)] for t in input]
+
+    @staticmethod
+    def name():
+        return "test-length"
+
+
+@pytest.fixture()
+def env(monkeypatch):
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine)
+    session = factory()
+    session.add_all(
+        [
+            Product(id=1, title="Green Mug", description="Ceramic mug", category="home", price=5.0),
+            Product(id=2, title="Blue Jeans", description=None, category=None, price=19.99, image="j.png"),
+        ]
+    )
+    session.commit()
+
+    name = f"pay{uuid.uuid4().hex[:8]}"
+    ef = _LengthEF()
+    col = vector_store._client.get_or_create_collection(name, embedding_function=ef)
+    monkeypatch.setattr(indexer, "_COLLECTION", name)
+    monkeypatch.setattr(indexer, "get_collection", lambda _n: col)
+    monkeypatch.setattr(indexer, "SessionLocal", factory)
+    yield session, col
+    vector_store.drop_collection(name)
+    index_path(name).unlink(missing_ok=True)
+
+
+def test_payloads_match_orm_serialization_without_sql(env, monkeypatch):
+    session, _col = env
+    indexer.build_product_index(session)
+    expected = {p.id: p.as_dict() for p in session.query(Product)}
+    indexer.known_categories()  # one DISTINCT per index generation, not per search
+
+    def no_sql():
+        raise AssertionError("search hit the database")
+
+    monkeypatch.setattr(indexer, "SessionLocal", no_sql)
+    results = indexer.search_product_payloads("mug", k=2)
+    assert sorted(r["id"] for r in results) == [1, 2]
+    assert all(r == expected[r["id"]] for r in results)
+
+
+def test_legacy_entries_are_hydrated_from_sql(env):
+    session, col = env
+    col.upsert(ids=["1", "2"], documents=["Ceramic mug", "Blue Jeans"], metadatas=[{"title": "x", "price": 1.0}] * 2)
+
+    results = indexer.search_product_payloads("mug", k=2)
+    assert {r["title"] for r in results} == {"Green Mug", "Blue Jeans"}
+
+
+def test_async_search_matches_sync(env, monkeypatch):
+    session, col = env
+    indexer.build_product_index(session)
+
+    async def aget_collection(_name):
+        return vector_store.ThreadedCollection(col)
+
+    monkeypatch.setattr(indexer, "aget_collection", aget_collection)
+    expected = indexer.search_product_payloads("green mug", k=2)
+    assert asyncio.run(indexer.asearch_product_payloads("green mug", k=2)) == expected
@@ -0,0 +1,88 @@
+"""
+Speculative routing: retrieval runs alongside the LLM classification.
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.config import settings
+from app.core.llm import FakeLLM
+from app.services import agent_router
+
+_DELAY = 0.2
+
+
+class _SlowLLM(FakeLLM):
+    def stream(self, messages):
+        time.sleep(_DELAY)
+        yield from super().stream(messages)
+
+    async def astream(self, messages):
+        await asyncio.sleep(_DELAY)
+        async for chunk in super().astream(messages):
+            yield chunk
+
+
+@pytest.fixture()
+def slow(monkeypatch):
+    def search(query, filters=None):
+        time.sleep(_DELAY)
+        return [{"id": 1, "title": "Desk lamp"}]
+
+    def support(query):
+        time.sleep(_DELAY)
+        return {"answer": "Returns are free.", "tool": "support", "sources": []}
+
+    async def asearch(query, k=5, filters=None):
+        await asyncio.sleep(_DELAY)
+        return [{"id": 1, "title": "Desk lamp"}]
+
+    async def asupport(query):
+        await asyncio.sleep(_DELAY)
+        return {"answer": "Returns are free.", "tool": "support", "sources": []}
+
+    monkeypatch.setattr(agent_router, "_llm", _SlowLLM())
+    monkeypatch.setattr(agent_router, "search_product_payloads", search)
+    monkeypatch.setattr(agent_router, "support_answer", support)
+    monkeypatch.setattr(agent_router, "asearch_product_payloads", asearch)
+    monkeypatch.setattr(agent_router, "asupport_answer", asupport)
+    monkeypatch.setattr(settings, "INTENT_FAST_PATH", False)
+
+
+def _timed_invoke(query):
+    t0 = time.perf_counter()
+    final = agent_router.router.invoke({"query": query})
+    return final, time.perf_counter() - t0
+
+
+def test_speculation_takes_retrieval_off_the_critical_path(slow, monkeypatch):
+    final, sequential = _timed_invoke("find a desk lamp")
+    assert final["results"] == [{"id": 1, "title": "Desk lamp"}]
+    assert final["timings"]["search"] >= _DELAY * 1000 * 0.9
+
+    monkeypatch.setattr(settings, "ROUTER_SPECULATIVE", True)
+    final, speculative = _timed_invoke("find a desk lamp")
+    assert final["results"] == [{"id": 1, "title": "Desk lamp"}]
+    assert "speculative" not in final
+    assert final["timings"]["search"] < final["timings"]["ask_llm"]
+    assert speculative < sequential - _DELAY / 2
+
+    final, _ = _timed_invoke("how do returns work?")
+    assert final["answer"] == "Returns are free."
+
+
+def test_async_speculation(slow, monkeypatch):
+    monkeypatch.setattr(settings, "ROUTER_SPECULATIVE", True)
+
+    async def run(query):
+        t0 = time.perf_counter()
+        final = await agent_router.arouter.ainvoke({"query": query})
+        return final, time.perf_counter() - t0
+
+    final, elapsed = asyncio.run(run("how do returns work?"))
+    assert final["answer"] == "Returns are free."
+    assert elapsed < 2 * _DELAY
+
+    final, _ = asyncio.run(run("suggest something"))
+    assert final["tool"] == "fallback" and len(final["results"]) == 5
@@ -0,0 +1,165 @@
+"""
+Incremental support-KB sync: only new/changed files are embedded, removed
+files lose their vectors, unchanged files never reach Chroma.
+"""
+import os
+import uuid
+
+import numpy as np
+import pytest
+
+from app.core import vector_store
+from app.core.ann_index import IVFIndex
+from app.services import support_loader
+from app.services.kb_manifest import Manifest
+
+
+@pytest.fixture()
+def kb(monkeypatch, tmp_path):
+    root = tmp_path / "kb"
+    root.mkdir()
+    name = f"sync-{uuid.uuid4().hex[:8]}"
+    collection = vector_store._client.get_or_create_collection(name)
+    embedded = []
+
+    monkeypatch.setattr(support_loader, "_KB_PATH", root)
+    monkeypatch.setattr(support_loader, "get_collection", lambda _n="support_kb": vector_store._client.get_or_create_collection(name))
+    monkeypatch.setattr(support_loader, "bump_generation", lambda _n: 0)
+    monkeypatch.setattr(support_loader.settings, "SUPPORT_MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    monkeypatch.setattr(support_loader, "index_path", lambda _n: tmp_path / "bm25.json")
+    monkeypatch.setattr(support_loader, "ann_path", lambda _n: tmp_path / "ann.npz")
+    real = support_loader._EMBEDDER.embed_batch
+    monkeypatch.setattr(support_loader._EMBEDDER, "embed_batch", lambda texts: embedded.extend(texts) or real(texts))
+
+    yield root, collection, embedded
+    vector_store._client.delete_collection(name)
+
+
+def _write(path, text):
+    path.write_text(text)
+
+
+def test_only_changed_files_are_reembedded(kb):
+    root, collection, embedded = kb
+    _write(root / "a.md", "# Returns\n\nSend it back within 30 days.\n")
+    _write(root / "b.md", "# Shipping\n\nWe ship worldwide.\n")
+
+    report = support_loader.main()
+    assert report["added"] == 2 and collection.count() == 2
+    first = len(embedded)
+
+    assert support_loader.main()["unchanged"] == 2
+    assert len(embedded) == first  # nothing re-embedded
+
+    _write(root / "b.md", "# Shipping\n\nWe ship to 40 countries.\n\n## Costs\n\nFree over $50.\n")
+    report = support_loader.main()
+    assert (report["changed"], report["unchanged"]) == (1, 1)
+    assert all("ship" in t.lower() or "Costs" in t for t in embedded[first:])
+    docs = collection.get()["documents"]
+    assert len(docs) == 3 and not any("worldwide" in d for d in docs)
+
+
+def test_removed_files_lose_their_vectors_and_dry_run_writes_nothing(kb, capsys):
+    root, collection, embedded = kb
+    _write(root / "a.md", "# A\n\nalpha\n")
+    _write(root / "b.md", "# B\n\nbeta\n")
+    support_loader.main()
+
+    (root / "a.md").unlink()
+    report = support_loader.main(dry_run=True)
+    assert report["removed"] == 1 and collection.count() == 2
+    assert "- a.md" in capsys.readouterr().out
+
+    support_loader.main()
+    assert [m["source"] for m in collection.get()["metadatas"]] == ["b.md"]
+    assert list(Manifest.load(support_loader._manifest_path()).files) == ["b.md"]
+
+
+def test_touch_without_edit_and_model_change(kb, monkeypatch):
+    root, collection, embedded = kb
+    md = root / "a.md"
+    _write(md, "# A\n\nalpha\n")
+    support_loader.main()
+    n = len(embedded)
+
+    st = md.stat()
+    os.utime(md, (st.st_atime + 10, st.st_mtime + 10))
+    assert support_loader.main()["unchanged"] == 1 and len(embedded) == n
+
+    monkeypatch.setattr(support_loader.settings, "SUPPORT_CHUNK_CHARS", 400)
+    assert support_loader.main()["changed"] == 1 and len(embedded) > n
+
+
+def test_crash_after_settings_change_reembeds_on_next_run(kb, monkeypatch):
+    root, collection, embedded = kb
+    _write(root / "a.md", "# A\n\nalpha\n")
+    _write(root / "b.md", "# B\n\nbeta\n")
+    support_loader.main()
+
+    def crash(*args, **kwargs):
+        raise RuntimeError("embedding service down")
+
+    monkeypatch.setattr(support_loader.settings, "SUPPORT_CHUNK_CHARS", 400)
+    with monkeypatch.context() as m:
+        m.setattr(support_loader, "run_pipeline", crash)
+        with pytest.raises(RuntimeError):
+            support_loader.main()
+    assert collection.count() == 0 and not Manifest.load(support_loader._manifest_path()).files
+
+    report = support_loader.main()
+    assert report["added"] == 2 and collection.count() == 2
+
+
+def test_ann_index_follows_a_wiped_store_with_new_dimensions(kb, monkeypatch, tmp_path):
+    root, collection, embedded = kb
+    _write(root / "a.md", "# A\n\nalpha\n")
+    _write(root / "b.md", "# B\n\nbeta\n")
+    monkeypatch.setattr(support_loader._EMBEDDER, "embed_batch", lambda texts: [np.ones(8)] * len(texts))
+    support_loader.main()
+    assert IVFIndex.load(tmp_path / "ann.npz").dim == 8
+
+    name = collection.name  # store wiped, then re-ingested with a different model
+    vector_store._client.delete_collection(name)
+    vector_store._client.create_collection(name)
+    monkeypatch.setattr(support_loader._EMBEDDER, "embed_batch", lambda texts: [np.ones(16)] * len(texts))
+    assert support_loader.main()["added"] == 2
+    ann = IVFIndex.load(tmp_path / "ann.npz")
+    assert ann.dim == 16 and len(ann) == 2
+
+
+def test_manifest_is_checkpointed_not_rewritten_per_chunk(kb, monkeypatch):
+    root, collection, embedded = kb
+    for i in range(6):
+        _write(root / f"{i}.md", f"# Doc {i}\n\nbody {i}\n")
+    saves = []
+    real = Manifest.save
+    monkeypatch.setattr(Manifest, "save", lambda self: saves.append(1) or real(self))
+    monkeypatch.setattr(support_loader.settings, "INGEST_WRITE_CHUNK", 1)
+    monkeypatch.setattr(support_loader.settings, "INGEST_BATCH_DOCS", 1)
+
+    assert support_loader.main()["added"] == 6 and collection.count() == 6
+    assert len(saves) == 2  # before deleting stale vectors, and once at the end
+    assert len(Manifest.load(support_loader._manifest_path()).files) == 6
+
+
+def test_watch_keeps_polling_after_a_failed_sync(kb, monkeypatch, caplog):
+    root, collection, embedded = kb
+    _write(root / "a.md", "# A\n\nalpha\n")
+    calls, sleeps = [], []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("embedding service down")
+
+    def sleep(_seconds):
+        sleeps.append(1)
+        if len(sleeps) == 3:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(support_loader, "main", flaky)
+    monkeypatch.setattr(support_loader.time, "sleep", sleep)
+    with pytest.raises(KeyboardInterrupt):
+        support_loader.watch(0.01)
+    assert len(calls) == 2  # retried, then idle once the tree is in sync
+    assert "support KB sync failed" in caplog.text